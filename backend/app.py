@@ -11,12 +11,20 @@ from sqlalchemy import event
 from sqlalchemy.engine import Engine
 import sqlite3
 from flask_cors import CORS
+from utils.occupancy import OccupancyGrid
+from utils.skill_index import SkillIndex
+from utils.slot_cache import SlotCache
+from utils.background import BackgroundTasks
+from utils.outbox import EmailOutboxWorkers
+from utils.email_templates import EmailTemplates
+from utils.leader import SchedulerLeader
+from utils.job_telemetry import JobTelemetry
 
 
 app = Flask(__name__)
 
 
-CORS(app, supports_credentials=True, origins=["http://localhost:5173"])
+CORS(app, supports_credentials=True, origins=["http://localhost:5173"], expose_headers=["X-Next-Cursor", "Idempotent-Replayed"])
 # migration initialization
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("DATABASE_URL")
 migrate = Migrate(app, db)
@@ -44,6 +52,66 @@ app.config['MAIL_DEFAULT_SENDER'] = "ashley.testingmoringa@gmail.com"
 
 mail = Mail(app)
 
+# How bookings are assigned when no employee is requested: best_fit, least_loaded or random
+app.config["ASSIGNMENT_STRATEGY"] = os.getenv("ASSIGNMENT_STRATEGY", "best_fit")
+
+# How long the booking preview holds its stylist for the confirm step
+app.config["BOOKING_HOLD_SECONDS"] = int(os.getenv("BOOKING_HOLD_SECONDS", 300))
+
+# How long a freed slot offered to a waitlisted customer stays held for them
+app.config["WAITLIST_OFFER_SECONDS"] = int(os.getenv("WAITLIST_OFFER_SECONDS", 1800))
+
+# How long a response stored under an Idempotency-Key can be replayed
+app.config["IDEMPOTENCY_KEY_TTL_HOURS"] = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", 24))
+
+# How long a request under an Idempotency-Key can stay unfinished before a retry treats it as abandoned
+app.config["IDEMPOTENCY_IN_FLIGHT_SECONDS"] = int(os.getenv("IDEMPOTENCY_IN_FLIGHT_SECONDS", 60))
+
+# How long delivered emails stay in the outbox before cleanup
+app.config["EMAIL_OUTBOX_RETENTION_DAYS"] = int(os.getenv("EMAIL_OUTBOX_RETENTION_DAYS", 7))
+
+# Expired-booking cleanup: bookings deleted per transaction, pause between chunks, and time budget per run
+app.config["CLEANUP_CHUNK_SIZE"] = int(os.getenv("CLEANUP_CHUNK_SIZE", 500))
+app.config["CLEANUP_PAUSE_SECONDS"] = float(os.getenv("CLEANUP_PAUSE_SECONDS", 0.05))
+app.config["CLEANUP_MAX_SECONDS"] = float(os.getenv("CLEANUP_MAX_SECONDS", 60))
+
+# Reminder batches: parallel SMTP connections, messages/second per connection (0 = no limit), retries per message
+app.config["REMINDER_SMTP_CONNECTIONS"] = int(os.getenv("REMINDER_SMTP_CONNECTIONS", 4))
+app.config["REMINDER_SMTP_RATE"] = float(os.getenv("REMINDER_SMTP_RATE", 0))
+app.config["REMINDER_SMTP_RETRIES"] = int(os.getenv("REMINDER_SMTP_RETRIES", 2))
+
+# Scheduled jobs run only in the process holding the scheduler lease; it lasts SCHEDULER_LEASE_SECONDS and is renewed every SCHEDULER_LEASE_RENEW_SECONDS
+app.config["SCHEDULER_LEASE_SECONDS"] = int(os.getenv("SCHEDULER_LEASE_SECONDS", 60))
+app.config["SCHEDULER_LEASE_RENEW_SECONDS"] = int(os.getenv("SCHEDULER_LEASE_RENEW_SECONDS", 15))
+
+# Scheduled job runs kept in memory for /api/scheduler/stats, and how long they're kept in scheduler_job_runs
+app.config["SCHEDULER_JOB_HISTORY"] = int(os.getenv("SCHEDULER_JOB_HISTORY", 200))
+app.config["SCHEDULER_JOB_RUN_RETENTION_DAYS"] = int(os.getenv("SCHEDULER_JOB_RUN_RETENTION_DAYS", 7))
+
+# Shared per-minute occupancy grid used by availability checks
+occupancy_grid = OccupancyGrid(app)
+
+# Process-level service -> skilled employees index
+skill_index = SkillIndex(app)
+
+# Computed /available-slots payloads, invalidated by booking and schedule writes
+slot_cache = SlotCache(app)
+
+# Thread pool for receipts and emails sent after a response
+background_tasks = BackgroundTasks(app)
+
+# Workers that deliver the email outbox, so requests never wait on SMTP
+email_outbox = EmailOutboxWorkers(app)
+
+# Notification templates, compiled once at startup
+email_templates = EmailTemplates(app)
+
+# Database lease electing the one process that runs scheduled jobs
+scheduler_leader = SchedulerLeader(app)
+
+# Timings and counts for every scheduled job run
+job_telemetry = JobTelemetry(app)
+
 app.config["JWT_TOKEN_LOCATION"] = ["headers", "cookies"]
 app.config["JWT_COOKIE_SECURE"] = False  
 app.config["JWT_COOKIE_SAMESITE"] = "Lax"
@@ -62,6 +130,7 @@ app.register_blueprint(receipt_bp)
 app.register_blueprint(reminder_bp)
 app.register_blueprint(allergy_bp)
 app.register_blueprint(attendance_bp)
+app.register_blueprint(waitlist_bp)
 
 from views.reminder import start_scheduler
 
@@ -86,7 +155,24 @@ def check_if_token_revoked(jwt_header, jwt_payload: dict) -> bool:
 
 
 
-if __name__ == "__main__":
+def start_background_workers():
+    """
+    Start this process's scheduler and email outbox workers. Every process
+    runs a scheduler; the scheduler lease picks the one that runs the jobs.
+    Safe to call more than once.
+    """
     with app.app_context():
         start_scheduler()
+    email_outbox.start()
+
+
+# Under a WSGI server other than gunicorn (which uses gunicorn.conf.py), set
+# START_BACKGROUND_WORKERS=1 to start them as each worker imports the app.
+# Off by default so flask db commands, tests and scripts don't run jobs or send email.
+if os.getenv("START_BACKGROUND_WORKERS", "").lower() in ("1", "true", "yes"):
+    start_background_workers()
+
+
+if __name__ == "__main__":
+    start_background_workers()
     app.run(debug=True)
@@ -0,0 +1,376 @@
+"""
+Benchmarks for the booking and availability hot paths.
+
+Seeds a synthetic salon into a throwaway SQLite database, then drives the
+real endpoints through the Flask test client and reports latency
+percentiles and SQL statements per request.
+
+    cd backend
+    python benchmarks/bench_booking.py                      # 200 employees, 50 services, 100k bookings
+    python benchmarks/bench_booking.py --bookings 10000 --iterations 50
+    python benchmarks/bench_booking.py --json results.json  # keep numbers to compare later runs
+
+Nothing here touches instance/salon.sqlite or sends email.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time as timer
+from datetime import date, time, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = tempfile.mkdtemp(prefix="salon-bench-")
+
+# Must be set before app.py reads them at import time
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'bench.sqlite')}"
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-benchmark-secret-key")
+sys.path.insert(0, BACKEND_DIR)
+
+from app import app  # noqa: E402
+from models import db, User, Category, Service, Employee, Booking, BookingClaim, employee_skills  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+from sqlalchemy import event, insert  # noqa: E402
+from utils.constants import SALON_OPEN, BUFFER_MINUTES  # noqa: E402
+from utils.claims import claim_units  # noqa: E402
+from utils.slot_cache import get_slot_cache  # noqa: E402
+from utils.skill_index import get_skill_index  # noqa: E402
+
+
+app.config.update(
+    TESTING=True,
+    OCCUPANCY_GRID_DIR=os.path.join(WORK_DIR, "occupancy"),
+    # /login issues integer identities; newer flask-jwt-extended rejects them by default
+    JWT_VERIFY_SUB=False,
+)
+app.extensions["occupancy_grid"].directory = app.config["OCCUPANCY_GRID_DIR"]
+app.extensions["skill_index"].stamp_path = os.path.join(WORK_DIR, "skill_index.version")
+app.extensions["mail"].suppress = True
+
+
+class QueryCounter:
+    """Counts SQL statements executed on the app's engine."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+
+def time_at(minute):
+    return time(minute // 60, minute % 60)
+
+
+def seed(args):
+    rng = random.Random(args.seed)
+    today = date.today()
+    opening = SALON_OPEN.hour * 60 + SALON_OPEN.minute
+
+    db.drop_all()
+    db.create_all()
+
+    categories = [Category(name=f"Category {i}") for i in range(5)]
+    db.session.add_all(categories)
+    db.session.flush()
+
+    services = [
+        Service(
+            title=f"Service {i}",
+            price=rng.choice([150, 280, 450, 900]),
+            duration_minutes=rng.choice([20, 30, 45, 60, 90, 120]),
+            category_id=categories[i % len(categories)].id,
+        )
+        for i in range(args.services)
+    ]
+    db.session.add_all(services)
+    db.session.flush()
+
+    db.session.execute(insert(User), [
+        {"username": f"user{i}", "email": f"user{i}@example.com", "password": "x",
+         "is_beautician": i < args.employees, "is_receptionist": i == args.employees}
+        for i in range(args.employees + args.customers + 1)
+    ])
+    users = [uid for (uid,) in db.session.query(User.id).order_by(User.id)]
+    staff, customers = users[:args.employees], users[args.employees + 1:]
+
+    db.session.execute(insert(Employee), [
+        {"user_id": uid, "full_name": f"Stylist {i}", "work_start": time(8), "work_end": time(20),
+         "work_days": "0,1,2,3,4,5", "work_days_mask": 0b0111111, "_is_active": True}
+        for i, uid in enumerate(staff)
+    ])
+    employee_ids = [eid for (eid,) in db.session.query(Employee.id).order_by(Employee.id)]
+
+    # Every stylist covers a handful of services; every service has stylists
+    skills = set()
+    for i, emp_id in enumerate(employee_ids):
+        skills.add((emp_id, services[i % len(services)].id))
+        for service in rng.sample(services, 4):
+            skills.add((emp_id, service.id))
+    db.session.execute(insert(employee_skills), [
+        {"employee_id": emp_id, "service_id": service_id} for emp_id, service_id in skills
+    ])
+    skilled = {}
+    for emp_id, service_id in skills:
+        skilled.setdefault(emp_id, []).append(service_id)
+    durations = {s.id: s.duration_minutes for s in services}
+    prices = {s.id: s.price for s in services}
+
+    # Back-to-back bookings per stylist-day, roughly half in the past and half
+    # ahead; keep adding days until the requested number is reached
+    per_day = 6
+    estimated_days = max(4, args.bookings // (len(employee_ids) * 4) + 1)
+    day = today - timedelta(days=estimated_days // 2)
+    loyal_customer = customers[0]
+    rows = []
+    while len(rows) < args.bookings or day <= today + timedelta(days=3):
+        day += timedelta(days=1)
+        if day.weekday() == 6:
+            continue
+        for emp_id in employee_ids:
+            minute = rng.choice([0, 30, 60])
+            for _ in range(per_day):
+                service_id = rng.choice(skilled[emp_id])
+                end = minute + durations[service_id]
+                if end > 12 * 60 or len(rows) >= args.bookings:
+                    break
+                rows.append({
+                    "user_id": loyal_customer if len(rows) % 300 == 0 else rng.choice(customers),
+                    "service_id": service_id,
+                    "employee_id": emp_id,
+                    "booking_date": day,
+                    "start_time": time_at(opening + minute),
+                    "end_time": time_at(opening + end),
+                    "price": prices[service_id],
+                    "status": "completed" if day < today else "confirmed",
+                })
+                minute = end + BUFFER_MINUTES + rng.choice([0, 0, 30, 60])
+    db.session.execute(insert(Booking), rows)
+
+    claims = [
+        {"booking_id": b_id, "employee_id": emp_id, "booking_date": day, "unit": unit}
+        for b_id, emp_id, day, start, end in db.session.query(
+            Booking.id, Booking.employee_id, Booking.booking_date, Booking.start_time, Booking.end_time
+        ).filter(Booking.status == "confirmed")
+        for unit in claim_units(start, end)
+    ]
+    if claims:
+        db.session.execute(insert(BookingClaim), claims)
+
+    db.session.commit()
+    return {
+        "services": [s.id for s in services],
+        "customers": customers,
+        "loyal_customer": loyal_customer,
+        "receptionist": users[args.employees],
+        "days_ahead": (day - today).days,
+        "bookings": len(rows),
+    }
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_case(name, make_request, iterations, counter, before=None):
+    latencies, queries, statuses = [], [], {}
+    for _ in range(iterations):
+        if before:
+            before()
+        counter.count = 0
+        started = timer.perf_counter()
+        status = make_request()
+        latencies.append((timer.perf_counter() - started) * 1000)
+        queries.append(counter.count)
+        statuses[status] = statuses.get(status, 0) + 1
+
+    return {
+        "endpoint": name,
+        "requests": iterations,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.mean(latencies), 2),
+        "queries_per_request": round(statistics.mean(queries), 1),
+        "statuses": statuses,
+    }
+
+
+def run_checkout_race(data, rng, threads):
+    """
+    Parallel checkouts for one slot of a service only one stylist does, on
+    a day past the seeded bookings: exactly one may win, the rest get 409.
+    """
+    day = date.today() + timedelta(days=data["days_ahead"] + 1)
+    while day.weekday() == 6:
+        day += timedelta(days=1)
+    start = time(10)
+
+    with app.app_context():
+        stylist = rng.choice([emp_id for (emp_id,) in db.session.query(Employee.id)])
+        service = Service(title="Race service", price=450, duration_minutes=45,
+                          category_id=db.session.query(Category.id).limit(1).scalar())
+        db.session.add(service)
+        db.session.flush()
+        db.session.execute(insert(employee_skills), [{"employee_id": stylist, "service_id": service.id}])
+        db.session.commit()
+        service_id = service.id
+        get_skill_index().invalidate()
+
+    barrier = threading.Barrier(threads)
+    statuses = []
+
+    def checkout(customer_id):
+        with app.app_context():
+            token = create_access_token(identity=customer_id)
+        client = app.test_client()
+        barrier.wait()
+        response = client.post("/book", headers={"Authorization": f"Bearer {token}"}, json={
+            "service_id": service_id, "date": day.isoformat(), "start_time": start.strftime("%H:%M"),
+        })
+        statuses.append(response.status_code)
+
+    workers = [threading.Thread(target=checkout, args=(c,)) for c in rng.sample(data["customers"], threads)]
+    started = timer.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = (timer.perf_counter() - started) * 1000
+
+    # Any two of a stylist's bookings that day whose times overlap, not just equal starts
+    with app.app_context():
+        bookings = db.session.query(Booking.employee_id, Booking.start_time, Booking.end_time).filter(
+            Booking.booking_date == day,
+            Booking.status == "confirmed",
+        ).order_by(Booking.employee_id, Booking.start_time).all()
+    overlaps = sum(
+        1 for before, after in zip(bookings, bookings[1:])
+        if before.employee_id == after.employee_id and after.start_time < before.end_time
+    )
+
+    return {
+        "endpoint": f"POST /book x{threads} in parallel",
+        "wall_ms": round(elapsed, 2),
+        "statuses": {code: statuses.count(code) for code in set(statuses)},
+        "winners": statuses.count(201),
+        "double_bookings": overlaps,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--services", type=int, default=50)
+    parser.add_argument("--bookings", type=int, default=100_000)
+    parser.add_argument("--customers", type=int, default=2_000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--race-threads", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        started = timer.perf_counter()
+        data = seed(args)
+        print(f"Seeded {data['bookings']} bookings in {timer.perf_counter() - started:.1f}s ({WORK_DIR})")
+
+        counter = QueryCounter()
+        event.listen(db.engine, "before_cursor_execute", counter)
+        client = app.test_client()
+
+        def auth(user_id):
+            return {"Authorization": f"Bearer {create_access_token(identity=user_id)}"}
+
+        def future_day():
+            day = date.today() + timedelta(days=rng.randint(2, data["days_ahead"] - 1))
+            return day + timedelta(days=1) if day.weekday() == 6 else day
+
+        def random_start():
+            return f"{rng.randint(8, 18):02d}:{rng.choice(['00', '30'])}"
+
+        # The cold and cached cases ask for the same (service, day) pairs, so the cached one measures hits
+        slot_keys = [(rng.choice(data["services"]), future_day().isoformat()) for _ in range(args.iterations)]
+
+        def slot_requests():
+            keys = iter(slot_keys)
+
+            def available_slots():
+                service_id, day = next(keys)
+                return client.get("/available-slots", query_string={"service_id": service_id, "date": day}).status_code
+            return available_slots
+
+        def booking_preview():
+            return client.get("/bookings/preview", query_string={
+                "service_id": rng.choice(data["services"]), "date": future_day().isoformat(),
+                "start_time": random_start(),
+            }).status_code
+
+        def create_booking():
+            return client.post("/book", headers=auth(rng.choice(data["customers"])), json={
+                "service_id": rng.choice(data["services"]), "date": future_day().isoformat(),
+                "start_time": random_start(),
+            }).status_code
+
+        reschedulable = [
+            (b_id, user_id) for b_id, user_id in db.session.query(Booking.id, Booking.user_id).filter(
+                Booking.status == "confirmed",
+                Booking.booking_date >= date.today() + timedelta(days=2),
+            ).limit(args.iterations * 4)
+        ]
+
+        def reschedule_booking():
+            booking_id, user_id = reschedulable.pop(rng.randrange(len(reschedulable)))
+            return client.patch(f"/bookings/reschedule/{booking_id}", headers=auth(user_id), json={
+                "date": future_day().isoformat(), "start_time": random_start(),
+            }).status_code
+
+        def user_bookings():
+            return client.get("/bookings", headers=auth(data["loyal_customer"])).status_code
+
+        cold = run_case("GET /available-slots (cold)", slot_requests(), args.iterations, counter,
+                        before=get_slot_cache().invalidate_all)
+        # The cold case empties the cache before every request; load each key once, untimed
+        warm = slot_requests()
+        for _ in slot_keys:
+            warm()
+
+        results = [
+            cold,
+            run_case("GET /available-slots (cached)", slot_requests(), args.iterations, counter),
+            run_case("GET /bookings/preview", booking_preview, args.iterations, counter),
+            run_case("POST /book", create_booking, args.iterations, counter),
+            run_case("PATCH /bookings/reschedule", reschedule_booking,
+                     min(args.iterations, len(reschedulable)), counter),
+            run_case("GET /bookings (loyal customer)", user_bookings, args.iterations, counter),
+        ]
+        event.remove(db.engine, "before_cursor_execute", counter)
+
+    race = run_checkout_race(data, rng, args.race_threads)
+
+    print()
+    print(f"{'endpoint':<34}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'mean ms':>9}{'queries':>9}  statuses")
+    for row in results:
+        print(f"{row['endpoint']:<34}{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}"
+              f"{row['mean_ms']:>9}{row['queries_per_request']:>9}  {row['statuses']}")
+    print()
+    print(f"{race['endpoint']}: {race['wall_ms']} ms, statuses {race['statuses']}, "
+          f"double bookings {race['double_bookings']}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"args": vars(args), "results": results, "race": race}, fh, indent=2)
+
+    return 1 if race["double_bookings"] or race["winners"] != 1 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Benchmark for the expired-booking cleanup (delete_expired_bookings).
+
+Seeds a throwaway SQLite database with --expired past bookings (each with
+its booking claims, which the delete cascades to), then runs the cleanup
+while a second thread keeps committing new bookings for next month, and
+reports how long those writes waited.
+
+The "single statement" run sets CLEANUP_CHUNK_SIZE above the number of
+expired rows with no pause, which is how the cleanup used to work: one
+DELETE over the whole table.
+
+    cd backend
+    python benchmarks/bench_cleanup.py                           # 200k expired bookings
+    python benchmarks/bench_cleanup.py --expired 500000 --chunk 1000 --pause-ms 20
+    python benchmarks/bench_cleanup.py --max-seconds 2           # stop early, like a capped run in business hours
+
+Nothing here touches instance/salon.sqlite.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time as timer
+from datetime import date, time, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = tempfile.mkdtemp(prefix="salon-bench-")
+
+# Must be set before app.py reads them at import time
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'bench.sqlite')}"
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-benchmark-secret-key")
+sys.path.insert(0, BACKEND_DIR)
+
+from app import app  # noqa: E402
+from models import db, User, Category, Service, Employee, Booking, BookingClaim  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from utils.claims import claim_units  # noqa: E402
+import views.reminder as reminder  # noqa: E402
+
+app.config.update(OCCUPANCY_GRID_DIR=os.path.join(WORK_DIR, "occupancy"))
+app.extensions["occupancy_grid"].directory = app.config["OCCUPANCY_GRID_DIR"]
+
+# How often the writer thread commits while the cleanup runs
+WRITE_INTERVAL = 0.005
+
+
+def seed(expired):
+    db.drop_all()
+    db.create_all()
+
+    category = Category(name="Category")
+    db.session.add(category)
+    db.session.flush()
+    service = Service(title="Service", price=450, duration_minutes=45, category_id=category.id)
+    user = User(username="customer", email="customer@example.com", password="x")
+    staff = User(username="stylist", email="stylist@example.com", password="x", is_beautician=True)
+    db.session.add_all([service, user, staff])
+    db.session.flush()
+    employee = Employee(user_id=staff.id, full_name="Stylist", work_start=time(8), work_end=time(20),
+                        work_days="0,1,2,3,4,5,6", work_days_mask=0b1111111, _is_active=True)
+    db.session.add(employee)
+    db.session.flush()
+
+    # Ten bookings a day going back as far as needed, all still "confirmed"
+    first_day = date.today() - timedelta(days=2 + expired // 10)
+    rows = [
+        {"user_id": user.id, "service_id": service.id, "employee_id": employee.id,
+         "booking_date": first_day + timedelta(days=i // 10), "start_time": time(8 + i % 10),
+         "end_time": time(8 + i % 10, 45), "price": 450, "status": "confirmed"}
+        for i in range(expired)
+    ]
+    for start in range(0, len(rows), 20000):
+        db.session.execute(insert(Booking), rows[start:start + 20000])
+
+    claims = [
+        {"booking_id": b_id, "employee_id": employee.id, "booking_date": day, "unit": unit}
+        for b_id, day, start, end in db.session.query(
+            Booking.id, Booking.booking_date, Booking.start_time, Booking.end_time
+        )
+        for unit in claim_units(start, end)
+    ]
+    for start in range(0, len(claims), 50000):
+        db.session.execute(insert(BookingClaim), claims[start:start + 50000])
+    db.session.commit()
+    return {"user_id": user.id, "service_id": service.id, "employee_id": employee.id}
+
+
+def write_while(running, ids, latencies, failures):
+    """Commit one future booking at a time until `running` is cleared."""
+    day = date.today() + timedelta(days=30)
+    count = 0
+    with app.app_context():
+        while running.is_set():
+            started = timer.perf_counter()
+            try:
+                db.session.add(Booking(
+                    **ids, booking_date=day + timedelta(days=count // 10), start_time=time(8 + count % 10),
+                    end_time=time(8 + count % 10, 45), price=450, status="confirmed"
+                ))
+                db.session.commit()
+                latencies.append((timer.perf_counter() - started) * 1000)
+            except Exception:
+                db.session.rollback()
+                failures.append((timer.perf_counter() - started) * 1000)
+            count += 1
+            timer.sleep(WRITE_INTERVAL)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))], 2)
+
+
+def run_case(name, expired, chunk, pause, max_seconds):
+    with app.app_context():
+        ids = seed(expired)
+    app.config.update(CLEANUP_CHUNK_SIZE=chunk, CLEANUP_PAUSE_SECONDS=pause, CLEANUP_MAX_SECONDS=max_seconds)
+
+    running = threading.Event()
+    running.set()
+    latencies, failures = [], []
+    writer = threading.Thread(target=write_while, args=(running, ids, latencies, failures))
+    writer.start()
+    timer.sleep(0.2)  # let the writer settle first
+    deleted = reminder.delete_expired_bookings(app)
+    running.clear()
+    writer.join()
+
+    cleanup = reminder.last_cleanup
+    return {
+        "run": name,
+        "deleted": deleted,
+        "chunks": cleanup["chunks"],
+        "finished": cleanup["finished"],
+        "cleanup_seconds": cleanup["elapsed_seconds"],
+        "max_chunk_ms": cleanup["max_chunk_ms"],
+        "writes": len(latencies),
+        "write_failures": len(failures),
+        "write_p50_ms": percentile(latencies, 50),
+        "write_p99_ms": percentile(latencies, 99),
+        "write_max_ms": round(max(latencies + failures), 2) if latencies or failures else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--expired", type=int, default=200000)
+    parser.add_argument("--chunk", type=int, default=500, help="CLEANUP_CHUNK_SIZE")
+    parser.add_argument("--pause-ms", type=float, default=50, help="CLEANUP_PAUSE_SECONDS, in ms")
+    parser.add_argument("--max-seconds", type=float, default=600, help="CLEANUP_MAX_SECONDS")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = [
+        run_case("single statement", args.expired, args.expired + 1, 0, args.max_seconds),
+        run_case(f"chunks of {args.chunk}", args.expired, args.chunk, args.pause_ms / 1000, args.max_seconds),
+    ]
+
+    print()
+    print(f"{args.expired} expired bookings, a booking write every {WRITE_INTERVAL * 1000:g} ms during cleanup")
+    print(f"{'run':<20}{'deleted':>9}{'chunks':>8}{'seconds':>9}{'max chunk ms':>14}"
+          f"{'writes':>8}{'failed':>8}{'p50 ms':>8}{'p99 ms':>9}{'max ms':>9}")
+    for row in results:
+        print(f"{row['run']:<20}{row['deleted']:>9}{row['chunks']:>8}{row['cleanup_seconds']:>9}"
+              f"{row['max_chunk_ms']:>14}{row['writes']:>8}{row['write_failures']:>8}"
+              f"{row['write_p50_ms']!s:>8}{row['write_p99_ms']!s:>9}{row['write_max_ms']!s:>9}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"args": vars(args), "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Benchmark for the reminder batch sender.
+
+Starts a local SMTP stand-in that waits --latency-ms before accepting each
+message, like a real provider, then sends a batch of reminders through
+send_reminder_email_batch with different connection counts and reports
+throughput. One connection matches how reminders used to go out, one
+after another.
+
+    cd backend
+    python benchmarks/bench_reminders.py                         # 800 reminders, 1/4/8 connections
+    python benchmarks/bench_reminders.py --messages 2000 --latency-ms 30 --connections 1,8,16
+    python benchmarks/bench_reminders.py --fail-every 10         # every 10th message gets a 451
+
+Nothing here touches instance/salon.sqlite or a real mail server.
+"""
+import argparse
+import json
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+import time as timer
+from datetime import date, time, timedelta
+from types import SimpleNamespace
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = tempfile.mkdtemp(prefix="salon-bench-")
+
+# Must be set before app.py reads them at import time
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'bench.sqlite')}"
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-benchmark-secret-key")
+sys.path.insert(0, BACKEND_DIR)
+
+from app import app, mail  # noqa: E402
+from views.reminder import send_reminder_email_batch  # noqa: E402
+
+
+class SmtpStandIn(socketserver.ThreadingTCPServer):
+    """
+    Just enough SMTP to accept mail: every command gets a 2xx/3xx reply,
+    DATA waits `latency` seconds and, with `fail_every`, every Nth message
+    is refused with a 451 so retries show up in the numbers.
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, latency, fail_every=0):
+        super().__init__(("127.0.0.1", 0), SmtpHandler)
+        self.latency = latency
+        self.fail_every = fail_every
+        self.received = 0
+        self.lock = threading.Lock()
+
+    def accept_message(self):
+        """True to accept the message just received, False to refuse it."""
+        timer.sleep(self.latency)
+        with self.lock:
+            self.received += 1
+            return not (self.fail_every and self.received % self.fail_every == 0)
+
+
+class SmtpHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.reply("220 stand-in ready")
+        in_data = False
+        for raw in self.rfile:
+            line = raw.rstrip(b"\r\n")
+            if in_data:
+                if line == b".":
+                    in_data = False
+                    self.reply("250 queued" if self.server.accept_message() else "451 try again later")
+                continue
+
+            command = line[:4].upper()
+            if command == b"EHLO":
+                self.reply("250-stand-in")
+                self.reply("250 8BITMIME")
+            elif command == b"DATA":
+                in_data = True
+                self.reply("354 end with <CRLF>.<CRLF>")
+            elif command == b"QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+def reminder_batch(count):
+    """Reminder inputs shaped like check_and_send_reminders builds them."""
+    tomorrow = date.today() + timedelta(days=1)
+    services = [SimpleNamespace(title=f"Service {i}") for i in range(20)]
+    employees = [SimpleNamespace(full_name=f"Stylist {i}") for i in range(40)]
+    return [
+        {
+            "user": SimpleNamespace(username=f"user{i}", email=f"user{i}@example.com"),
+            "booking": SimpleNamespace(
+                id=i, booking_date=tomorrow, start_time=time(8 + i % 12), end_time=time(8 + i % 12, 45),
+                price=450, status="confirmed"
+            ),
+            "service": services[i % len(services)],
+            "employee": employees[i % len(employees)],
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=800)
+    parser.add_argument("--latency-ms", type=float, default=10)
+    parser.add_argument("--connections", default="1,4,8", help="comma-separated connection counts to try")
+    parser.add_argument("--rate", type=float, default=0, help="messages/second per connection, 0 for no limit")
+    parser.add_argument("--fail-every", type=int, default=0, help="refuse every Nth message with a 451")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    server = SmtpStandIn(args.latency_ms / 1000, args.fail_every)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    state = app.extensions["mail"]
+    state.server, state.port = server.server_address
+    state.use_tls = state.use_ssl = False
+    state.username = state.password = None
+    state.suppress = False
+    app.config.update(REMINDER_SMTP_RATE=args.rate, REMINDER_SMTP_RETRIES=2)
+
+    batch = reminder_batch(args.messages)
+    results = []
+    with app.app_context():
+        for connections in [int(c) for c in args.connections.split(",")]:
+            app.config["REMINDER_SMTP_CONNECTIONS"] = connections
+            stats = send_reminder_email_batch(mail, batch)
+            results.append({"run": f"{connections} connection(s)", **stats.as_dict()})
+
+    server.shutdown()
+
+    print()
+    print(f"{args.messages} reminders, {args.latency_ms:g} ms per message at the server")
+    print(f"{'run':<20}{'sent':>7}{'failed':>8}{'retries':>9}{'seconds':>9}{'msg/s':>9}")
+    for row in results:
+        print(f"{row['run']:<20}{row['sent']:>7}{row['failed']:>8}{row['retries']:>9}"
+              f"{row['elapsed_seconds']:>9}{row['messages_per_second']:>9}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"args": vars(args), "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
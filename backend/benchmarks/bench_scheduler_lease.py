@@ -0,0 +1,188 @@
+"""
+Benchmark for scheduler leader election (utils/leader.py).
+
+Forks several processes that all compete for the scheduler lease in a
+throwaway SQLite database, like gunicorn workers each starting the
+scheduler, then measures:
+
+  - how long until the first leader is elected
+  - lease renewal latency
+  - failover when the leader is killed outright (lease runs out)
+  - failover when the leader shuts down cleanly (lease released)
+  - that no two processes ever believed they were leader at once
+
+    cd backend
+    python benchmarks/bench_scheduler_lease.py                     # 4 processes, 3 s lease, 1 s renewal
+    python benchmarks/bench_scheduler_lease.py --processes 8 --lease 10 --renew 2
+    python benchmarks/bench_scheduler_lease.py --json results.json
+
+Nothing here touches instance/salon.sqlite.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import statistics
+import sys
+import tempfile
+import threading
+import time as timer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = tempfile.mkdtemp(prefix="salon-bench-")
+
+# Must be set before app.py reads them at import time
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'bench.sqlite')}"
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-benchmark-secret-key")
+sys.path.insert(0, BACKEND_DIR)
+
+from app import app  # noqa: E402
+from models import db  # noqa: E402
+from utils.leader import SchedulerLeader  # noqa: E402
+
+# How often each process samples whether it thinks it is leader
+SAMPLE_SECONDS = 0.02
+
+
+def compete(events, stop_after):
+    """One worker process: hold the lease when possible, report every change."""
+    with app.app_context():
+        db.engine.dispose(close=False)  # don't share the parent's connections
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+
+    leader = SchedulerLeader(app)
+    leader.start()
+    pid = os.getpid()
+    was_leader = None
+    deadline = timer.time() + stop_after
+    while not stopping.is_set() and timer.time() < deadline:
+        is_leader = leader.is_leader()
+        if is_leader != was_leader:
+            events.put(("leader" if is_leader else "follower", pid, timer.time()))
+            was_leader = is_leader
+        timer.sleep(SAMPLE_SECONDS)
+
+    # Stop acting as leader before giving the lease up
+    events.put(("follower", pid, timer.time()))
+    leader.stop()
+    events.put(("stats", pid, leader.stats))
+
+
+def wait_for_leader(events, log, exclude=(), timeout=60):
+    """Read events until some process other than `exclude` becomes leader."""
+    deadline = timer.time() + timeout
+    while timer.time() < deadline:
+        event = events.get(timeout=timeout)
+        log.append(event)
+        kind, pid, at = event
+        if kind == "leader" and pid not in exclude:
+            return pid, at
+    raise TimeoutError("no leader elected")
+
+
+def overlaps(log):
+    """Moments where two processes both considered themselves leader."""
+    holding, found = {}, []
+    for kind, pid, at in sorted((e for e in log if e[0] != "stats"), key=lambda e: e[2]):
+        if kind == "leader":
+            others = [other for other in holding if other != pid]
+            if others:
+                found.append((pid, others, at))
+            holding[pid] = at
+        else:
+            holding.pop(pid, None)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--lease", type=float, default=3, help="SCHEDULER_LEASE_SECONDS")
+    parser.add_argument("--renew", type=float, default=1, help="SCHEDULER_LEASE_RENEW_SECONDS")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    app.config.update(SCHEDULER_LEASE_SECONDS=args.lease, SCHEDULER_LEASE_RENEW_SECONDS=args.renew)
+    with app.app_context():
+        db.create_all()
+        db.engine.dispose()
+
+    ctx = multiprocessing.get_context("fork")
+    events = ctx.Queue()
+    run_for = 10 * args.lease + 30
+    started = timer.time()
+    workers = {}
+    for _ in range(args.processes):
+        process = ctx.Process(target=compete, args=(events, run_for))
+        process.start()
+        workers[process.pid] = process
+
+    log = []
+    first, first_at = wait_for_leader(events, log)
+    results = {"first_election_seconds": round(first_at - started, 3)}
+
+    # Let it renew a few times, then kill it without letting it release
+    timer.sleep(args.renew * 3)
+    killed_at = timer.time()
+    os.kill(first, signal.SIGKILL)
+    log.append(("follower", first, killed_at))  # it can't report this itself
+    second, second_at = wait_for_leader(events, log, exclude={first})
+    results["failover_after_kill_seconds"] = round(second_at - killed_at, 3)
+
+    # Stop the new leader cleanly: it releases the lease on the way out
+    timer.sleep(args.renew * 3)
+    stopped_at = timer.time()
+    os.kill(second, signal.SIGTERM)
+    third, third_at = wait_for_leader(events, log, exclude={first, second})
+    results["failover_after_shutdown_seconds"] = round(third_at - stopped_at, 3)
+
+    for pid, process in workers.items():
+        if process.is_alive():
+            os.kill(pid, signal.SIGTERM)
+    renewals = []
+    for process in workers.values():
+        process.join(timeout=args.lease + 10)
+    while not events.empty():
+        event = events.get()
+        if event[0] == "stats":
+            renewals.append(event[2])
+        else:
+            log.append(event)
+
+    renewal_ms = [s["max_renewal_ms"] for s in renewals]
+    total = sum(s["renewals"] for s in renewals)
+    results.update({
+        "processes": args.processes,
+        "lease_seconds": args.lease,
+        "renew_seconds": args.renew,
+        "renewals": total,
+        "renewal_failures": sum(s["renewal_failures"] for s in renewals),
+        "avg_renewal_ms": round(sum(s["total_renewal_ms"] for s in renewals) / total, 2) if total else None,
+        "max_renewal_ms": max(renewal_ms) if renewal_ms else None,
+        "median_worst_renewal_ms": round(statistics.median(renewal_ms), 2) if renewal_ms else None,
+        "overlapping_leaders": len(overlaps(log)),
+    })
+
+    print()
+    print(f"{args.processes} processes, {args.lease:g} s lease renewed every {args.renew:g} s")
+    print(f"first leader elected after       {results['first_election_seconds']:>8} s")
+    print(f"failover after leader killed     {results['failover_after_kill_seconds']:>8} s"
+          f"   (bound: lease + renew = {args.lease + args.renew:g} s)")
+    print(f"failover after clean shutdown    {results['failover_after_shutdown_seconds']:>8} s"
+          f"   (bound: renew = {args.renew:g} s)")
+    print(f"renewals                         {results['renewals']:>8}   failures {results['renewal_failures']}")
+    print(f"renewal latency                  {results['avg_renewal_ms']:>8} ms avg, {results['max_renewal_ms']} ms max")
+    print(f"overlapping leaders              {results['overlapping_leaders']:>8}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+    return 1 if results["overlapping_leaders"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
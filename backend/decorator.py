@@ -1,7 +1,10 @@
-from flask import jsonify
+import hashlib
+from datetime import datetime, timedelta
+from flask import jsonify, request, current_app, make_response
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
 from functools import wraps
-from models import User
+from sqlalchemy.exc import IntegrityError
+from models import User, IdempotencyKey, db
 
 def admin_required(fn):
     @wraps(fn)
@@ -42,4 +45,94 @@ def receptionist_required(fn):
             return jsonify({"error": "Receptionist access required"}), 403
 
         return fn(*args, **kwargs)
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+
+def idempotent(fn):
+    """
+    Honour an Idempotency-Key header on a write. The first request with a
+    key runs normally and its response is stored. Retries with the same
+    key and body get that response back without running the view. Use
+    it below jwt_required: keys are scoped to the user.
+
+    A retry while the first request is still running gets a 409. If that
+    request has been running for over IDEMPOTENCY_IN_FLIGHT_SECONDS, its
+    worker is taken to have died and the retry takes the key over.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+        if not key:
+            return fn(*args, **kwargs)
+        if len(key) > 128:
+            return jsonify({"error": "Idempotency-Key must be at most 128 characters"}), 400
+
+        user_id = get_jwt_identity()
+        request_hash = hashlib.sha256(
+            request.method.encode() + b" " + request.path.encode() + b"\n" + request.get_data()
+        ).hexdigest()
+        now = datetime.utcnow()
+
+        stored = IdempotencyKey.query.filter_by(user_id=user_id, key=key).first()
+        if stored and stored.expires_at < now:
+            db.session.delete(stored)
+            db.session.commit()
+            stored = None
+
+        if stored is None:
+            stored = IdempotencyKey(
+                user_id=user_id,
+                key=key,
+                request_hash=request_hash,
+                started_at=now,
+                expires_at=now + timedelta(hours=current_app.config["IDEMPOTENCY_KEY_TTL_HOURS"])
+            )
+            db.session.add(stored)
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # A concurrent retry inserted the key first
+                db.session.rollback()
+                return jsonify({"error": "A request with this Idempotency-Key is already in progress"}), 409
+        elif stored.request_hash != request_hash:
+            return jsonify({"error": "Idempotency-Key was already used for a different request"}), 422
+        elif stored.status_code is None:
+            abandoned_before = now - timedelta(seconds=current_app.config["IDEMPOTENCY_IN_FLIGHT_SECONDS"])
+            if stored.started_at >= abandoned_before:
+                return jsonify({"error": "A request with this Idempotency-Key is already in progress"}), 409
+
+            # Only one retry may take over an abandoned request
+            taken = IdempotencyKey.query.filter_by(
+                id=stored.id, status_code=None, started_at=stored.started_at
+            ).update({"started_at": now}, synchronize_session=False)
+            db.session.commit()
+            if not taken:
+                return jsonify({"error": "A request with this Idempotency-Key is already in progress"}), 409
+        else:
+            response = current_app.response_class(
+                stored.response_body, status=stored.status_code, mimetype="application/json"
+            )
+            response.headers["Idempotent-Replayed"] = "true"
+            return response
+
+        # Matching started_at too leaves the key alone if a retry has since taken it over
+        attempt = IdempotencyKey.query.filter_by(id=stored.id, started_at=now)
+        try:
+            response = make_response(fn(*args, **kwargs))
+        except Exception:
+            db.session.rollback()
+            attempt.delete()
+            db.session.commit()
+            raise
+
+        # Server errors aren't stored, so the client can retry them
+        if response.status_code >= 500:
+            attempt.delete()
+        else:
+            attempt.update({
+                "status_code": response.status_code,
+                "response_body": response.get_data(as_text=True)
+            })
+        db.session.commit()
+        return response
+    return wrapper
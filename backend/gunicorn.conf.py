@@ -0,0 +1,24 @@
+"""
+gunicorn settings for the API:
+
+    cd backend
+    gunicorn -c gunicorn.conf.py app:app
+
+Background threads don't survive a fork, so each worker starts its own
+scheduler and email outbox workers once it has loaded the app. All the
+workers compete for the scheduler lease; only the holder runs the jobs.
+"""
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", 4))
+
+
+def post_worker_init(worker):
+    from app import app, start_background_workers
+
+    # A failed worker boot stops gunicorn, rather than serving stale slots
+    if worker.cfg.workers > 1 and app.config["SLOT_CACHE_TYPE"] == "SimpleCache":
+        raise RuntimeError("SLOT_CACHE_TYPE SimpleCache is per process; use FileSystemCache with several workers")
+
+    start_background_workers()
@@ -0,0 +1,94 @@
+"""added booking claims table.
+
+Revision ID: 02e744e309e0
+Revises: f801302e2230
+Create Date: 2026-10-18 14:03:52.781390
+
+"""
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '02e744e309e0'
+down_revision = 'f801302e2230'
+branch_labels = None
+depends_on = None
+
+# Frozen copies of utils.constants / utils.claims for the backfill
+SALON_OPEN_MINUTE = 8 * 60
+CLAIM_UNIT_MINUTES = 5
+
+
+def to_minutes(value):
+    if isinstance(value, str):
+        hour, minute = value.split(":")[:2]
+        return int(hour) * 60 + int(minute) - SALON_OPEN_MINUTE
+    return value.hour * 60 + value.minute - SALON_OPEN_MINUTE
+
+
+def upgrade():
+    op.create_table('booking_claims',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('booking_id', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('booking_date', sa.Date(), nullable=False),
+    sa.Column('unit', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['booking_id'], ['bookings.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('employee_id', 'booking_date', 'unit', name='unique_employee_claim_unit')
+    )
+    with op.batch_alter_table('booking_claims', schema=None) as batch_op:
+        batch_op.create_index('idx_claim_booking', ['booking_id'], unique=False)
+
+    # Claim the time of every upcoming booking that still occupies an employee
+    bookings = sa.table(
+        'bookings',
+        sa.column('id', sa.Integer),
+        sa.column('employee_id', sa.Integer),
+        sa.column('booking_date', sa.Date),
+        sa.column('start_time', sa.Time),
+        sa.column('end_time', sa.Time),
+        sa.column('status', sa.String),
+    )
+    claims = sa.table(
+        'booking_claims',
+        sa.column('booking_id', sa.Integer),
+        sa.column('employee_id', sa.Integer),
+        sa.column('booking_date', sa.Date),
+        sa.column('unit', sa.Integer),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(bookings).where(
+            bookings.c.status.in_(['confirmed', 'in_progress']),
+            bookings.c.booking_date >= date.today()
+        ).order_by(bookings.c.id)
+    ).fetchall()
+
+    claimed = set()
+    values = []
+    for booking_id, employee_id, booking_date, start_time, end_time, _ in rows:
+        first = to_minutes(start_time) // CLAIM_UNIT_MINUTES
+        last = -(-to_minutes(end_time) // CLAIM_UNIT_MINUTES)
+        for unit in range(first, last):
+            # Existing double bookings keep their first claimant
+            if (employee_id, booking_date, unit) not in claimed:
+                claimed.add((employee_id, booking_date, unit))
+                values.append({
+                    'booking_id': booking_id,
+                    'employee_id': employee_id,
+                    'booking_date': booking_date,
+                    'unit': unit,
+                })
+    if values:
+        op.bulk_insert(claims, values)
+
+
+def downgrade():
+    with op.batch_alter_table('booking_claims', schema=None) as batch_op:
+        batch_op.drop_index('idx_claim_booking')
+
+    op.drop_table('booking_claims')
@@ -0,0 +1,26 @@
+"""added user booking history index.
+
+Revision ID: 5c1a9e7d3b42
+Revises: 02e744e309e0
+Create Date: 2026-10-18 15:12:08.417265
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1a9e7d3b42'
+down_revision = '02e744e309e0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.create_index('idx_user_booking_history', ['user_id', 'booking_date', 'start_time', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_index('idx_user_booking_history')
@@ -0,0 +1,30 @@
+"""added booking search indexes.
+
+Revision ID: 9b3e6f0a2d17
+Revises: 5c1a9e7d3b42
+Create Date: 2026-10-18 15:48:31.204719
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b3e6f0a2d17'
+down_revision = '5c1a9e7d3b42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.create_index('idx_service_date_status', ['service_id', 'booking_date', 'status'], unique=False)
+        batch_op.create_index('idx_status_date', ['status', 'booking_date', 'start_time'], unique=False)
+        batch_op.create_index('idx_booking_schedule', ['booking_date', 'start_time', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_index('idx_booking_schedule')
+        batch_op.drop_index('idx_status_date')
+        batch_op.drop_index('idx_service_date_status')
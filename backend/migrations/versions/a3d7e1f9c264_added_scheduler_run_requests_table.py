@@ -0,0 +1,30 @@
+"""added scheduler run requests table.
+
+Revision ID: a3d7e1f9c264
+Revises: f6a1c3e8d925
+Create Date: 2026-10-19 14:02:17.548310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d7e1f9c264'
+down_revision = 'f6a1c3e8d925'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('scheduler_run_requests',
+    sa.Column('job_id', sa.String(length=50), nullable=False),
+    sa.Column('requested_at', sa.DateTime(), nullable=False),
+    sa.Column('requested_by', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['requested_by'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('job_id')
+    )
+
+
+def downgrade():
+    op.drop_table('scheduler_run_requests')
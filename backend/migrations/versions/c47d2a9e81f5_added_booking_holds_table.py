@@ -0,0 +1,46 @@
+"""added booking holds table.
+
+Revision ID: c47d2a9e81f5
+Revises: 9b3e6f0a2d17
+Create Date: 2026-10-18 16:21:44.603918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47d2a9e81f5'
+down_revision = '9b3e6f0a2d17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('booking_holds',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('token', sa.String(length=64), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('service_id', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('booking_date', sa.Date(), nullable=False),
+    sa.Column('start_time', sa.Time(), nullable=False),
+    sa.Column('end_time', sa.Time(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['service_id'], ['services.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('token')
+    )
+    with op.batch_alter_table('booking_holds', schema=None) as batch_op:
+        batch_op.create_index('idx_hold_employee_date', ['employee_id', 'booking_date', 'expires_at'], unique=False)
+        batch_op.create_index('idx_hold_expires', ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('booking_holds', schema=None) as batch_op:
+        batch_op.drop_index('idx_hold_expires')
+        batch_op.drop_index('idx_hold_employee_date')
+
+    op.drop_table('booking_holds')
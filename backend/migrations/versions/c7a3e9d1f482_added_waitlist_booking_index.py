@@ -0,0 +1,26 @@
+"""added waitlist booking index.
+
+Revision ID: c7a3e9d1f482
+Revises: b1e4f7a9c352
+Create Date: 2026-10-18 21:12:40.518377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a3e9d1f482'
+down_revision = 'b1e4f7a9c352'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('waitlist_entries', schema=None) as batch_op:
+        batch_op.create_index('idx_waitlist_booking', ['booking_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('waitlist_entries', schema=None) as batch_op:
+        batch_op.drop_index('idx_waitlist_booking')
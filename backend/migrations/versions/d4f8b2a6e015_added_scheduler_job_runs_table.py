@@ -0,0 +1,44 @@
+"""added scheduler job runs table.
+
+Revision ID: d4f8b2a6e015
+Revises: c7a3e9d1f482
+Create Date: 2026-10-18 22:03:17.640281
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f8b2a6e015'
+down_revision = 'c7a3e9d1f482'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('scheduler_job_runs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.String(length=50), nullable=False),
+    sa.Column('holder', sa.String(length=100), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('scheduled_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=False),
+    sa.Column('duration_ms', sa.Float(), nullable=True),
+    sa.Column('lag_ms', sa.Float(), nullable=True),
+    sa.Column('rows_scanned', sa.Integer(), nullable=False),
+    sa.Column('rows_affected', sa.Integer(), nullable=False),
+    sa.Column('emails_sent', sa.Integer(), nullable=False),
+    sa.Column('emails_failed', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('scheduler_job_runs', schema=None) as batch_op:
+        batch_op.create_index('idx_job_run_started', ['job_id', 'started_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('scheduler_job_runs', schema=None) as batch_op:
+        batch_op.drop_index('idx_job_run_started')
+
+    op.drop_table('scheduler_job_runs')
@@ -0,0 +1,39 @@
+"""added started_at to idempotency keys.
+
+Revision ID: e2c9f4a7b830
+Revises: d4f8b2a6e015
+Create Date: 2026-10-18 23:41:08.215904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2c9f4a7b830'
+down_revision = 'd4f8b2a6e015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('started_at', sa.DateTime(), nullable=True))
+
+    # Existing keys started when they were created
+    keys = sa.table(
+        'idempotency_keys',
+        sa.column('created_at', sa.DateTime),
+        sa.column('started_at', sa.DateTime),
+    )
+    op.get_bind().execute(
+        keys.update().values(started_at=sa.func.coalesce(keys.c.created_at, sa.func.current_timestamp()))
+    )
+
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.alter_column('started_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.drop_column('started_at')
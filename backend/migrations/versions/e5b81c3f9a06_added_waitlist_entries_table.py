@@ -0,0 +1,54 @@
+"""added waitlist entries table.
+
+Revision ID: e5b81c3f9a06
+Revises: c47d2a9e81f5
+Create Date: 2026-10-18 17:05:19.382640
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b81c3f9a06'
+down_revision = 'c47d2a9e81f5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('waitlist_entries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('service_id', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=True),
+    sa.Column('date_from', sa.Date(), nullable=False),
+    sa.Column('date_to', sa.Date(), nullable=False),
+    sa.Column('earliest_start', sa.Time(), nullable=False),
+    sa.Column('latest_start', sa.Time(), nullable=False),
+    sa.Column('auto_book', sa.Boolean(), nullable=False),
+    sa.Column('status', sa.Enum('waiting', 'offered', 'booked', 'cancelled', name='waitlist_status'), nullable=False),
+    sa.Column('offer_token', sa.String(length=64), nullable=True),
+    sa.Column('offer_expires_at', sa.DateTime(), nullable=True),
+    sa.Column('booking_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.CheckConstraint('date_from <= date_to', name='check_waitlist_dates'),
+    sa.ForeignKeyConstraint(['booking_id'], ['bookings.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['service_id'], ['services.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('waitlist_entries', schema=None) as batch_op:
+        batch_op.create_index('idx_waitlist_match', ['service_id', 'status', 'date_from', 'date_to'], unique=False)
+        batch_op.create_index('idx_waitlist_offer', ['offer_token'], unique=False)
+        batch_op.create_index('idx_waitlist_user', ['user_id', 'status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('waitlist_entries', schema=None) as batch_op:
+        batch_op.drop_index('idx_waitlist_user')
+        batch_op.drop_index('idx_waitlist_offer')
+        batch_op.drop_index('idx_waitlist_match')
+
+    op.drop_table('waitlist_entries')
@@ -0,0 +1,100 @@
+"""added claims for rescheduled bookings.
+
+Revision ID: f6a1c3e8d925
+Revises: e2c9f4a7b830
+Create Date: 2026-10-19 09:26:44.103582
+
+"""
+import os
+from datetime import date
+from alembic import op
+from flask import current_app
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6a1c3e8d925'
+down_revision = 'e2c9f4a7b830'
+branch_labels = None
+depends_on = None
+
+# Frozen copies of utils.constants / utils.claims for the backfill
+SALON_OPEN_MINUTE = 8 * 60
+CLAIM_UNIT_MINUTES = 5
+
+
+def to_minutes(value):
+    if isinstance(value, str):
+        hour, minute = value.split(":")[:2]
+        return int(hour) * 60 + int(minute) - SALON_OPEN_MINUTE
+    return value.hour * 60 + value.minute - SALON_OPEN_MINUTE
+
+
+bookings = sa.table(
+    'bookings',
+    sa.column('id', sa.Integer),
+    sa.column('employee_id', sa.Integer),
+    sa.column('booking_date', sa.Date),
+    sa.column('start_time', sa.Time),
+    sa.column('end_time', sa.Time),
+    sa.column('status', sa.String),
+)
+claims = sa.table(
+    'booking_claims',
+    sa.column('booking_id', sa.Integer),
+    sa.column('employee_id', sa.Integer),
+    sa.column('booking_date', sa.Date),
+    sa.column('unit', sa.Integer),
+)
+
+
+def upgrade():
+    # Rescheduled bookings still occupy their employee; claim their time too
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(bookings).where(
+            bookings.c.status == 'rescheduled',
+            bookings.c.booking_date >= date.today()
+        ).order_by(bookings.c.id)
+    ).fetchall()
+    if not rows:
+        return
+
+    # Where one already overlaps another booking, the existing claimant keeps the unit
+    claimed = set(bind.execute(
+        sa.select(claims.c.employee_id, claims.c.booking_date, claims.c.unit)
+        .where(claims.c.booking_date >= date.today())
+    ).fetchall())
+
+    values = []
+    for booking_id, employee_id, booking_date, start_time, end_time, _ in rows:
+        first = to_minutes(start_time) // CLAIM_UNIT_MINUTES
+        last = -(-to_minutes(end_time) // CLAIM_UNIT_MINUTES)
+        for unit in range(first, last):
+            if (employee_id, booking_date, unit) not in claimed:
+                claimed.add((employee_id, booking_date, unit))
+                values.append({
+                    'booking_id': booking_id,
+                    'employee_id': employee_id,
+                    'booking_date': booking_date,
+                    'unit': unit,
+                })
+    if values:
+        op.bulk_insert(claims, values)
+
+    # The occupancy grid left these bookings out; drop those dates so they're rebuilt
+    grid_dir = current_app.config.get("OCCUPANCY_GRID_DIR")
+    if grid_dir:
+        for booking_date in {row.booking_date for row in rows}:
+            try:
+                os.remove(os.path.join(grid_dir, f"{booking_date.isoformat()}.grid"))
+            except FileNotFoundError:
+                pass
+
+
+def downgrade():
+    op.execute(
+        claims.delete().where(claims.c.booking_id.in_(
+            sa.select(bookings.c.id).where(bookings.c.status == 'rescheduled')
+        ))
+    )
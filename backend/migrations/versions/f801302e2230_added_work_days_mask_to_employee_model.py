@@ -0,0 +1,52 @@
+"""added work days mask to employee model.
+
+Revision ID: f801302e2230
+Revises: 19dd6239abdc
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f801302e2230'
+down_revision = '19dd6239abdc'
+branch_labels = None
+depends_on = None
+
+
+def work_days_to_mask(work_days):
+    # Frozen copy of utils.weekdays.work_days_to_mask for the backfill
+    try:
+        days = [int(d) for d in (work_days or "").split(",") if d.strip()]
+    except ValueError:
+        return 0
+    return sum(1 << d for d in set(days) if 0 <= d <= 6)
+
+
+def upgrade():
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('work_days_mask', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.create_index('idx_employee_work_days', ['work_days_mask'], unique=False)
+
+    # Backfill the bitmask from the existing work_days strings
+    employees = sa.table(
+        'employees',
+        sa.column('id', sa.Integer),
+        sa.column('work_days', sa.String),
+        sa.column('work_days_mask', sa.Integer),
+    )
+    bind = op.get_bind()
+    for emp_id, work_days in bind.execute(sa.select(employees.c.id, employees.c.work_days)).fetchall():
+        bind.execute(
+            employees.update()
+            .where(employees.c.id == emp_id)
+            .values(work_days_mask=work_days_to_mask(work_days))
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.drop_index('idx_employee_work_days')
+        batch_op.drop_column('work_days_mask')
@@ -1,9 +1,11 @@
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import MetaData, ForeignKey, CheckConstraint
 from sqlalchemy import Numeric, CheckConstraint, Enum, Index
-from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.ext.hybrid import hybrid_property, hybrid_method
+from sqlalchemy.orm import validates
 from datetime import time, datetime,  date
 from utils.availability import is_employee_available
+from utils.weekdays import work_days_to_mask, masks_with_weekday, mask_to_weekdays, mask_to_day_names
 
 metadata = MetaData()
 db = SQLAlchemy(metadata=metadata)
@@ -105,6 +107,7 @@ class Employee(db.Model):
     work_start = db.Column(db.Time, nullable=False)
     work_end = db.Column(db.Time, nullable=False)
     work_days = db.Column(db.String(20), nullable=False)  # e.g., "0,1,2,3,4"
+    work_days_mask = db.Column(db.Integer, nullable=False, default=0)  # bit 0 = Monday, kept in sync with work_days
     override_active = db.Column(db.Boolean, nullable=True)
     other_skills = db.Column(db.Text, nullable=True)
     employee_profile_picture = db.Column(db.String(256), nullable=True, default='https://media.istockphoto.com/id/1337144146/vector/default-avatar-profile-icon-vector.jpg?s=612x612&w=0&k=20&c=BIbFwuv7FxTWvh5S3vB6bkT0Qv8Vn8N5Ffseq84ClGI=')
@@ -132,10 +135,37 @@ class Employee(db.Model):
     def is_active(self, value):
         """Setter updates persisted state."""
         self._is_active = value
+
+    @validates("work_days")
+    def _sync_work_days_mask(self, key, value):
+        """Keep the weekday bitmask in step with the work_days string."""
+        self.work_days_mask = work_days_to_mask(value)
+        return value
+
+    @hybrid_method
+    def works_on(self, weekday):
+        """True if the employee is scheduled on `weekday` (0=Monday)."""
+        return bool((self.work_days_mask or 0) & (1 << weekday))
+
+    @works_on.expression
+    def works_on(cls, weekday):
+        """SQL predicate that can use idx_employee_work_days."""
+        return cls.work_days_mask.in_(masks_with_weekday(weekday))
+
+    @property
+    def weekdays(self):
+        """Scheduled weekday numbers, e.g. [0, 1, 2, 3, 4]."""
+        return mask_to_weekdays(self.work_days_mask or 0)
+
+    @property
+    def work_day_names(self):
+        """Scheduled weekday names, e.g. ["Monday", "Tuesday"]."""
+        return mask_to_day_names(self.work_days_mask or 0)
     
 
     __table_args__ = (
         Index('idx_employee_active', 'is_active', 'override_active'),
+        Index('idx_employee_work_days', 'work_days_mask'),
     )
 
 
@@ -168,9 +198,216 @@ class Booking(db.Model):
         CheckConstraint('start_time < end_time', name='check_start_before_end'),
         Index('idx_employee_date_status', 'employee_id', 'booking_date', 'status'),
         Index('idx_user_bookings', 'user_id', 'booking_date', 'status'),
+        Index('idx_user_booking_history', 'user_id', 'booking_date', 'start_time', 'id'),
+        Index('idx_service_date_status', 'service_id', 'booking_date', 'status'),
+        Index('idx_status_date', 'status', 'booking_date', 'start_time'),
+        Index('idx_booking_schedule', 'booking_date', 'start_time', 'id'),
+    )
+
+
+
+class BookingClaim(db.Model):
+    """
+    One row per CLAIM_UNIT_MINUTES block of an employee's booked time. The
+    unique constraint makes the database reject a second booking for the
+    same employee and time, even when two requests race past the
+    availability check together.
+    """
+    __tablename__ = "booking_claims"
+
+    id = db.Column(db.Integer, primary_key=True)
+    booking_id = db.Column(db.Integer, db.ForeignKey("bookings.id", ondelete="CASCADE"), nullable=False)
+    employee_id = db.Column(db.Integer, db.ForeignKey("employees.id", ondelete="CASCADE"), nullable=False)
+    booking_date = db.Column(db.Date, nullable=False)
+    unit = db.Column(db.Integer, nullable=False)  # block index counted from SALON_OPEN
+
+    __table_args__ = (
+        db.UniqueConstraint("employee_id", "booking_date", "unit", name="unique_employee_claim_unit"),
+        Index("idx_claim_booking", "booking_id"),
+    )
+
+
+class BookingHold(db.Model):
+    """
+    A short-lived soft reservation made by the booking preview. Other
+    customers are steered to different employees while it is active, and
+    the confirm step books the held employee directly. Claims, not holds,
+    are what stop double bookings.
+    """
+    __tablename__ = "booking_holds"
+
+    id = db.Column(db.Integer, primary_key=True)
+    token = db.Column(db.String(64), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    service_id = db.Column(db.Integer, db.ForeignKey("services.id", ondelete="CASCADE"), nullable=False)
+    employee_id = db.Column(db.Integer, db.ForeignKey("employees.id", ondelete="CASCADE"), nullable=False)
+    booking_date = db.Column(db.Date, nullable=False)
+    start_time = db.Column(db.Time, nullable=False)
+    end_time = db.Column(db.Time, nullable=False)  # includes the buffer
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("idx_hold_employee_date", "employee_id", "booking_date", "expires_at"),
+        Index("idx_hold_expires", "expires_at"),
+    )
+
+
+
+class WaitlistEntry(db.Model):
+    """
+    A customer waiting for an opening for a service between date_from and
+    date_to, starting no earlier than earliest_start and no later than
+    latest_start. When a cancellation or reschedule frees matching time
+    the customer is either booked straight away (auto_book) or offered the
+    slot as a BookingHold whose token is kept in offer_token.
+    """
+    __tablename__ = "waitlist_entries"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    service_id = db.Column(db.Integer, db.ForeignKey("services.id", ondelete="CASCADE"), nullable=False)
+    employee_id = db.Column(db.Integer, db.ForeignKey("employees.id", ondelete="SET NULL"), nullable=True)  # preferred, optional
+    date_from = db.Column(db.Date, nullable=False)
+    date_to = db.Column(db.Date, nullable=False)
+    earliest_start = db.Column(db.Time, nullable=False)
+    latest_start = db.Column(db.Time, nullable=False)
+    auto_book = db.Column(db.Boolean, default=False, nullable=False)
+
+    status = db.Column(db.Enum("waiting", "offered", "booked", "cancelled", name="waitlist_status"),
+    default="waiting", nullable=False)
+    offer_token = db.Column(db.String(64), nullable=True)
+    offer_expires_at = db.Column(db.DateTime, nullable=True)
+    booking_id = db.Column(db.Integer, db.ForeignKey("bookings.id", ondelete="SET NULL"), nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    user = db.relationship("User", backref=db.backref("waitlist_entries", cascade="all, delete-orphan", passive_deletes=True))
+    service = db.relationship("Service")
+    employee = db.relationship("Employee")
+
+    __table_args__ = (
+        CheckConstraint('date_from <= date_to', name='check_waitlist_dates'),
+        Index('idx_waitlist_match', 'service_id', 'status', 'date_from', 'date_to'),
+        Index('idx_waitlist_user', 'user_id', 'status'),
+        Index('idx_waitlist_offer', 'offer_token'),
+        # Deleting a booking nulls booking_id here; without this every delete scans the table
+        Index('idx_waitlist_booking', 'booking_id'),
+    )
+
+
+class IdempotencyKey(db.Model):
+    """
+    The stored response to a write sent with an Idempotency-Key header, so
+    a retried request is answered without running the view again. A row
+    with no status_code is a request still in flight, or one whose worker
+    died if started_at is older than IDEMPOTENCY_IN_FLIGHT_SECONDS.
+    """
+    __tablename__ = "idempotency_keys"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key = db.Column(db.String(128), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)  # sha256 of method, path and body
+    status_code = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # when the current attempt began
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "key", name="unique_user_idempotency_key"),
+        Index("idx_idempotency_expires", "expires_at"),
     )
 
 
+class EmailOutbox(db.Model):
+    """
+    An email waiting to be sent. Views add rows in the same transaction as
+    the change the email is about, and utils.outbox's workers deliver them,
+    so a rolled-back booking sends nothing and a slow SMTP server never
+    holds up a request.
+    """
+    __tablename__ = "email_outbox"
+
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(255), nullable=False)
+    sender = db.Column(db.String(255), nullable=True)
+    recipients = db.Column(db.Text, nullable=False)  # JSON list of addresses
+    body = db.Column(db.Text, nullable=True)
+    html = db.Column(db.Text, nullable=True)
+    attachment_name = db.Column(db.String(255), nullable=True)
+    attachment_type = db.Column(db.String(100), nullable=True)
+    attachment_data = db.Column(db.LargeBinary, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default="pending")  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_by = db.Column(db.String(64), nullable=True)
+    claimed_until = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("idx_outbox_due", "status", "next_attempt_at"),
+    )
+
+
+class SchedulerLease(db.Model):
+    """
+    Which process runs the scheduled jobs. Every process runs a scheduler,
+    but only the holder of an unexpired lease executes the jobs; see
+    utils.leader.
+    """
+    __tablename__ = "scheduler_leases"
+
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(100), nullable=False)  # host:pid:token
+    acquired_at = db.Column(db.DateTime, nullable=False)
+    renewed_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+
+class SchedulerRunRequest(db.Model):
+    """
+    A request to run a scheduled job now, queued by /api/reminders/process.
+    Whichever process holds the scheduler lease picks it up and brings the
+    job forward, so the work never runs inside a request; one row per job,
+    so repeated requests collapse into one run.
+    """
+    __tablename__ = "scheduler_run_requests"
+
+    job_id = db.Column(db.String(50), primary_key=True)
+    requested_at = db.Column(db.DateTime, nullable=False)
+    requested_by = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+
+
+class SchedulerJobRun(db.Model):
+    """
+    One execution of a scheduled job, written by the leader so
+    /api/scheduler/stats shows the same history from every process. Runs
+    older than SCHEDULER_JOB_RUN_RETENTION_DAYS are pruned as new ones are
+    recorded; see utils.job_telemetry.
+    """
+    __tablename__ = "scheduler_job_runs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(50), nullable=False)
+    holder = db.Column(db.String(100), nullable=False)  # lease holder that ran it
+    status = db.Column(db.String(20), nullable=False)  # ok, failed, skipped (previous run still going), missed
+    scheduled_at = db.Column(db.DateTime, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=False)
+    duration_ms = db.Column(db.Float, nullable=True)
+    lag_ms = db.Column(db.Float, nullable=True)  # started_at - scheduled_at
+    rows_scanned = db.Column(db.Integer, nullable=False, default=0)
+    rows_affected = db.Column(db.Integer, nullable=False, default=0)
+    emails_sent = db.Column(db.Integer, nullable=False, default=0)
+    emails_failed = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+
+    __table_args__ = (
+        Index("idx_job_run_started", "job_id", "started_at"),
+    )
+
 
 class Allergy(db.Model):
     __tablename__ = "allergies"
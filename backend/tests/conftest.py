@@ -0,0 +1,166 @@
+import os
+import shutil
+import socketserver
+import sys
+import tempfile
+import threading
+from datetime import time
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = tempfile.mkdtemp(prefix="salon-test-")
+
+# Must be set before app.py reads them at import time
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'test.sqlite')}"
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-test-secret-key-test")
+sys.path.insert(0, BACKEND_DIR)
+
+from app import app as flask_app  # noqa: E402
+from models import db, User, Category, Service, Employee  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+flask_app.config.update(
+    TESTING=True,
+    # /login issues integer identities; newer flask-jwt-extended rejects them by default
+    JWT_VERIFY_SUB=False,
+)
+flask_app.extensions["occupancy_grid"].directory = os.path.join(WORK_DIR, "occupancy")
+flask_app.extensions["skill_index"].stamp_path = os.path.join(WORK_DIR, "skill_index.version")
+flask_app.config["SLOT_CACHE_DIR"] = os.path.join(WORK_DIR, "slot_cache")
+flask_app.extensions["slot_cache"].init_app(flask_app)
+flask_app.extensions["mail"].suppress = True
+
+
+@pytest.fixture(scope="session")
+def schema():
+    with flask_app.app_context():
+        db.create_all()
+
+
+@pytest.fixture
+def app(schema):
+    with flask_app.app_context():
+        # Emptying every table in one transaction is much faster than recreating them
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+
+        # Ids start again from 1, so nothing cached by an earlier test may survive
+        flask_app.extensions["skill_index"].invalidate()
+        flask_app.extensions["slot_cache"].cache.clear()
+        grid = flask_app.extensions["occupancy_grid"]
+        grid._maps.clear()
+        shutil.rmtree(grid.directory, ignore_errors=True)
+
+        yield flask_app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def salon(app):
+    """One category, a 45-minute service and a stylist who does it, working 08:00-20:00 every day."""
+    category = Category(name="Hair")
+    db.session.add(category)
+    db.session.flush()
+    service = Service(title="Cut", price=450, duration_minutes=45, category_id=category.id)
+    staff = User(username="stylist", email="stylist@example.com", password="x", is_beautician=True)
+    db.session.add_all([service, staff])
+    db.session.flush()
+    employee = Employee(user_id=staff.id, full_name="Stylist", work_start=time(8), work_end=time(20),
+                        work_days="0,1,2,3,4,5,6", work_days_mask=0b1111111, _is_active=True)
+    employee.skills.append(service)
+    db.session.add(employee)
+    db.session.commit()
+    flask_app.extensions["skill_index"].invalidate()
+    return {"service": service.id, "employee": employee.id}
+
+
+@pytest.fixture
+def customers(app):
+    """Factory for customers: customers(n) returns n Authorization headers."""
+    def make(count):
+        users = [User(username=f"customer{i}", email=f"customer{i}@example.com", password="x") for i in range(count)]
+        db.session.add_all(users)
+        db.session.commit()
+        return [{"Authorization": f"Bearer {create_access_token(identity=user.id)}"} for user in users]
+    return make
+
+
+class SmtpStandIn(socketserver.ThreadingTCPServer):
+    """
+    Just enough SMTP to accept mail. Keeps every accepted message's raw
+    DATA in `messages`; the next `refuse` messages get a 451 instead.
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SmtpHandler)
+        self.messages = []
+        self.refuse = 0
+        self.lock = threading.Lock()
+
+    def receive(self, data):
+        with self.lock:
+            if self.refuse:
+                self.refuse -= 1
+                return False
+            self.messages.append(data)
+            return True
+
+
+class SmtpHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.reply("220 stand-in ready")
+        data = None
+        for raw in self.rfile:
+            line = raw.rstrip(b"\r\n")
+            if data is not None:
+                if line == b".":
+                    accepted = self.server.receive(b"\r\n".join(data).decode())
+                    self.reply("250 queued" if accepted else "451 try again later")
+                    data = None
+                else:
+                    data.append(line)
+                continue
+
+            command = line[:4].upper()
+            if command == b"EHLO":
+                self.reply("250-stand-in")
+                self.reply("250 8BITMIME")
+            elif command == b"DATA":
+                data = []
+                self.reply("354 end with <CRLF>.<CRLF>")
+            elif command == b"QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+@pytest.fixture
+def smtp(app):
+    """Point Flask-Mail at a local SmtpStandIn for the test."""
+    server = SmtpStandIn()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    state = app.extensions["mail"]
+    saved = vars(state).copy()
+    state.server, state.port = server.server_address
+    state.use_tls = state.use_ssl = False
+    state.username = state.password = None
+    state.suppress = False
+    yield server
+
+    vars(state).update(saved)
+    server.shutdown()
+    server.server_close()
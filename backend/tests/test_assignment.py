@@ -0,0 +1,88 @@
+from datetime import date, time, timedelta
+
+import pytest
+
+from models import db, Booking, Employee, Service, User
+from utils.assignment import rank_employees
+from utils.availability import DayAvailability, interval_mask, to_minutes
+from utils.skill_index import get_skill_index
+
+
+def stylists(count):
+    """Unsaved stylists working 08:00-20:00 every day."""
+    return [Employee(id=i + 1, full_name=f"Stylist {i + 1}", work_start=time(8), work_end=time(20),
+                     work_days="0,1,2,3,4,5,6", _is_active=True) for i in range(count)]
+
+
+def busy(*intervals):
+    """Occupied minutes for bookings given as (start, end) times."""
+    mask = 0
+    for start, end in intervals:
+        mask |= interval_mask(to_minutes(start), to_minutes(end))
+    return mask
+
+
+@pytest.fixture
+def day_with_bookings():
+    """Stylist 1 is booked 09:00-10:00, stylist 2 13:00-14:00, stylist 3 never."""
+    employees = stylists(3)
+    availability = DayAvailability(employees, date.today(), busy={
+        1: busy((time(9), time(10))),
+        2: busy((time(13), time(14))),
+    })
+    return availability, employees
+
+
+def ranked_ids(availability, employees, strategy, start=time(10), end=time(10, 55)):
+    return [emp.id for emp in rank_employees(availability, employees, start, end, strategy)]
+
+
+def test_best_fit_prefers_the_smallest_leftover_gap(app, day_with_bookings):
+    # 10:00-10:55 leaves stylist 2 a 2h gap before and a 2h05 gap after; stylist 1 has 9h05 after
+    assert ranked_ids(*day_with_bookings, "best_fit") == [2, 1, 3]
+
+
+def test_least_loaded_prefers_the_emptiest_day(app, day_with_bookings):
+    ranked = ranked_ids(*day_with_bookings, "least_loaded")
+    assert ranked[0] == 3
+    assert sorted(ranked[1:]) == [1, 2]
+
+
+def test_only_free_employees_are_ranked(app, day_with_bookings):
+    assert ranked_ids(*day_with_bookings, "best_fit", start=time(9, 30), end=time(10, 25)) == [2, 3]
+
+
+def test_strategy_comes_from_config(app, day_with_bookings, monkeypatch):
+    monkeypatch.setitem(app.config, "ASSIGNMENT_STRATEGY", "least_loaded")
+    assert ranked_ids(*day_with_bookings, None)[0] == 3
+
+    monkeypatch.setitem(app.config, "ASSIGNMENT_STRATEGY", "fastest")
+    with pytest.raises(ValueError):
+        ranked_ids(*day_with_bookings, None)
+
+
+def test_booking_goes_to_the_stylist_it_fits_best(client, salon, customers):
+    (customer,) = customers(1)
+    staff = User(username="second", email="second@example.com", password="x", is_beautician=True)
+    db.session.add(staff)
+    db.session.flush()
+    second = Employee(user_id=staff.id, full_name="Second", work_start=time(8), work_end=time(20),
+                      work_days="0,1,2,3,4,5,6", _is_active=True)
+    second.skills.append(db.session.get(Service, salon["service"]))
+    db.session.add(second)
+    db.session.commit()
+    get_skill_index().invalidate()
+
+    day = date.today() + timedelta(days=2)
+    first = client.post("/book", headers=customer, json={
+        "service_id": salon["service"], "date": day.isoformat(), "start_time": "09:00",
+    })
+    assert first.status_code == 201
+    taken = db.session.get(Booking, first.json["booking_id"]).employee_id
+
+    # Straight after the first booking, the same stylist leaves no gap behind
+    second_booking = client.post("/book", headers=customer, json={
+        "service_id": salon["service"], "date": day.isoformat(), "start_time": "09:55",
+    })
+    assert second_booking.status_code == 201
+    assert db.session.get(Booking, second_booking.json["booking_id"]).employee_id == taken
@@ -0,0 +1,184 @@
+from datetime import date, datetime, time, timedelta
+
+from flask_jwt_extended import create_access_token
+
+from models import db, Booking, Employee, Service, User
+from utils.availability import DayAvailability, is_employee_available
+from utils.constants import BUFFER_MINUTES, SALON_CLOSE, SALON_OPEN
+from utils.skill_index import SkillIndex, get_skill_index
+from utils.slots import categorize_slot, slot_grid
+
+
+def add_stylist(salon, name, work_start, work_end, work_days="0,1,2,3,4,5,6"):
+    """Another stylist who does the salon's service."""
+    staff = User(username=name, email=f"{name}@example.com", password="x", is_beautician=True)
+    db.session.add(staff)
+    db.session.flush()
+    employee = Employee(user_id=staff.id, full_name=name.title(), work_start=work_start, work_end=work_end,
+                        work_days=work_days, _is_active=True)
+    employee.skills.append(db.session.get(Service, salon["service"]))
+    db.session.add(employee)
+    db.session.commit()
+    get_skill_index().invalidate()
+    return employee
+
+
+def book(salon, day, start, end, employee_id=None, status="confirmed"):
+    customer = User.query.filter_by(username="regular").first()
+    if customer is None:
+        customer = User(username="regular", email="regular@example.com", password="x")
+        db.session.add(customer)
+        db.session.flush()
+    db.session.add(Booking(user_id=customer.id, service_id=salon["service"],
+                           employee_id=employee_id or salon["employee"], booking_date=day,
+                           start_time=start, end_time=end, price=450, status=status))
+    db.session.commit()
+
+
+def admin_headers():
+    admin = User(username="admin", email="admin@example.com", password="x", is_admin=True)
+    db.session.add(admin)
+    db.session.commit()
+    return {"Authorization": f"Bearer {create_access_token(identity=admin.id)}"}
+
+
+def test_available_slots_agree_with_the_per_employee_check(client, salon):
+    day = date.today() + timedelta(days=1)
+    late = add_stylist(salon, "late", time(14), time(20))
+    book(salon, day, time(10), time(10, 45))
+    book(salon, day, time(15), time(16, 30), employee_id=late.id)
+    book(salon, day, time(12), time(12, 45), status="cancelled")
+
+    response = client.get("/available-slots", query_string={"service_id": salon["service"], "date": day.isoformat()})
+    assert response.status_code == 200
+    offered = {slot["start_time"]: slot["employee_id"]
+               for period in response.json["slots"].values() for slot in period}
+
+    service = db.session.get(Service, salon["service"])
+    employees = Employee.query.all()
+    for start, end in slot_grid(service.duration_minutes).times:
+        end_with_buffer = (datetime.combine(day, end) + timedelta(minutes=BUFFER_MINUTES)).time()
+        free = {emp.id for emp in employees if is_employee_available(emp, day, start, end_with_buffer, service)}
+        label = start.strftime("%H:%M")
+        if free:
+            assert offered.get(label) in free, label
+        else:
+            assert label not in offered, label
+    assert response.json["total_available"] == len(offered)
+    # 09:50-10:45 runs into the 10:00 booking; 08:55 plus buffer ends just before it
+    assert "09:50" not in offered
+    assert offered["08:55"] == salon["employee"]
+
+
+def test_month_calendar_counts_match_the_days_slots(client, salon):
+    first_day = (date.today().replace(day=1) + timedelta(days=32)).replace(day=1)
+    add_stylist(salon, "weekdays", time(9), time(17), work_days="0,1,2,3,4")
+    book(salon, first_day + timedelta(days=3), time(8), time(8, 45))
+    book(salon, first_day + timedelta(days=3), time(12), time(14))
+
+    response = client.get("/available-slots/calendar",
+                          query_string={"service_id": salon["service"], "month": first_day.strftime("%Y-%m")})
+    assert response.status_code == 200
+    days = response.json["days"]
+    assert days[0]["date"] == first_day.isoformat()
+    assert (date.fromisoformat(days[-1]["date"]) + timedelta(days=1)).day == 1
+
+    for day in days:
+        slots = client.get("/available-slots", query_string={"service_id": salon["service"], "date": day["date"]})
+        assert day["total_available"] == slots.json["total_available"], day["date"]
+
+
+def test_month_calendar_has_nothing_free_in_the_past(client, salon):
+    last_month = (date.today().replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
+
+    response = client.get("/available-slots/calendar", query_string={"service_id": salon["service"], "month": last_month})
+
+    assert response.status_code == 200
+    assert {day["total_available"] for day in response.json["days"]} == {0}
+
+
+def test_work_days_mask_follows_the_work_days_string(salon):
+    employee = add_stylist(salon, "parttime", time(9), time(17), work_days="0,2,4")
+    assert employee.work_days_mask == 0b10101
+    assert [employee.works_on(d) for d in range(7)] == [True, False, True, False, True, False, False]
+
+    employee.work_days = "5,6"
+    db.session.commit()
+    assert employee.weekdays == [5, 6]
+
+    # The SQL form of works_on picks the same employees as the Python one
+    for weekday in range(7):
+        in_sql = {e.id for e in Employee.query.filter(Employee.works_on(weekday))}
+        in_python = {e.id for e in Employee.query.all() if e.works_on(weekday)}
+        assert in_sql == in_python, weekday
+    assert employee.id not in {e.id for e in Employee.query.filter(Employee.works_on(0))}
+
+
+def test_no_slots_on_a_day_off(client, salon):
+    stylist = db.session.get(Employee, salon["employee"])
+    day = date.today() + timedelta(days=7)
+    stylist.work_days = ",".join(str(d) for d in range(7) if d != day.weekday())
+    db.session.commit()
+
+    response = client.get("/available-slots", query_string={"service_id": salon["service"], "date": day.isoformat()})
+
+    assert response.json["total_available"] == 0
+
+
+def test_skill_index_is_rebuilt_after_another_worker_invalidates_it(app, salon):
+    index = get_skill_index()
+    assert index.employees_for(salon["service"]) == {salon["employee"]}
+
+    # Changed behind the index's back, e.g. by another worker: this one keeps its copy...
+    stylist = db.session.get(Employee, salon["employee"])
+    stylist.skills = []
+    db.session.commit()
+    assert index.has_skill(salon["employee"], salon["service"])
+
+    # ...until that worker bumps the shared stamp
+    other_worker = SkillIndex()
+    other_worker.stamp_path = index.stamp_path
+    other_worker.invalidate()
+    assert index.employees_for(salon["service"]) == frozenset()
+    assert index.services_for(salon["employee"]) == frozenset()
+
+
+def test_slots_follow_skill_changes_made_by_an_admin(client, salon):
+    day = (date.today() + timedelta(days=1)).isoformat()
+    query = {"service_id": salon["service"], "date": day}
+    assert client.get("/available-slots", query_string=query).json["total_available"] > 0
+
+    response = client.put(f"/employees/{salon['employee']}", headers=admin_headers(), json={"skills": []})
+    assert response.status_code == 200
+
+    assert client.get("/available-slots", query_string=query).status_code == 404
+
+
+def test_slot_grids_are_memoized_and_match_a_plain_walk_of_the_day():
+    assert slot_grid(45) is slot_grid(45)
+    assert slot_grid(45, 0) is not slot_grid(45)
+
+    grid = slot_grid(45)
+    expected, start = [], datetime.combine(date.today(), SALON_OPEN)
+    while start + timedelta(minutes=45) <= datetime.combine(date.today(), SALON_CLOSE):
+        expected.append((start.time(), (start + timedelta(minutes=45)).time()))
+        start += timedelta(minutes=45 + BUFFER_MINUTES)
+    assert list(grid.times) == expected
+    assert list(grid.periods) == [categorize_slot(s) for s, _ in expected]
+    assert grid.labels[1] == ("08:55", "09:40")
+
+
+def test_bulk_slot_assignment_matches_checking_each_slot(salon):
+    day = date.today() + timedelta(days=2)
+    add_stylist(salon, "late", time(14), time(20))
+    book(salon, day, time(9), time(11))
+    book(salon, day, time(17), time(17, 30))
+
+    employees = Employee.query.order_by(Employee.id).all()
+    availability = DayAvailability(employees, day)
+    grid = slot_grid(45)
+    assigned = availability.assign_slots(grid)
+
+    for (start, end), employee in zip(grid.times, assigned):
+        end_with_buffer = (datetime.combine(day, end) + timedelta(minutes=BUFFER_MINUTES)).time()
+        assert employee == availability.first_available(start, end_with_buffer), start
@@ -0,0 +1,85 @@
+from datetime import date, time, timedelta
+
+from flask_jwt_extended import create_access_token
+
+from models import db, Booking, BookingClaim, Employee, Service, User
+from utils.skill_index import get_skill_index
+
+NEXT_WEEK = (date.today() + timedelta(days=7)).isoformat()
+
+
+def headers_for(user):
+    return {"Authorization": f"Bearer {create_access_token(identity=user.id)}"}
+
+
+def staff(username, **roles):
+    user = User(username=username, email=f"{username}@example.com", password="x", **roles)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def book(client, salon, customer, start_time):
+    response = client.post("/book", headers=customer, json={
+        "service_id": salon["service"], "date": NEXT_WEEK, "start_time": start_time,
+    })
+    assert response.status_code == 201
+    return response.json["booking_id"]
+
+
+def batch(client, headers, action, booking_ids):
+    return client.patch("/bookings/batch-status", headers=headers, json={"action": action, "booking_ids": booking_ids})
+
+
+def test_receptionist_cancels_a_batch_and_frees_the_time(client, salon, customers):
+    first, second = customers(2)
+    morning, noon = book(client, salon, first, "09:00"), book(client, salon, first, "12:00")
+    done = db.session.get(Booking, book(client, salon, first, "15:00"))
+    done.status = "completed"
+    db.session.commit()
+
+    response = batch(client, headers_for(staff("desk", is_receptionist=True)), "cancel",
+                     [morning, noon, morning, done.id, 9999])
+
+    assert response.status_code == 200
+    assert response.json["updated"] == [morning, noon]
+    assert response.json["failed"] == [
+        {"booking_id": done.id, "error": "Booking is completed"},
+        {"booking_id": 9999, "error": "Booking not found"},
+    ]
+    assert {b.status for b in Booking.query.filter(Booking.id.in_([morning, noon]))} == {"cancelled"}
+    assert BookingClaim.query.filter(BookingClaim.booking_id.in_([morning, noon])).count() == 0
+
+    # The stylist's time is free again
+    book(client, salon, second, "09:00")
+
+
+def test_beauticians_only_change_their_own_bookings(client, salon, customers):
+    (customer,) = customers(1)
+    booking_id = book(client, salon, customer, "10:00")
+
+    other = staff("other", is_beautician=True)
+    employee = Employee(user_id=other.id, full_name="Other", work_start=time(8), work_end=time(20),
+                        work_days="0,1,2,3,4,5,6", _is_active=True)
+    employee.skills.append(db.session.get(Service, salon["service"]))
+    db.session.add(employee)
+    db.session.commit()
+    get_skill_index().invalidate()
+
+    response = batch(client, headers_for(other), "cancel", [booking_id])
+    assert response.status_code == 400
+    assert response.json["failed"] == [{"booking_id": booking_id, "error": "Not your booking"}]
+
+    # Their own, but a week early
+    stylist = db.session.get(Employee, salon["employee"]).user
+    response = batch(client, headers_for(stylist), "start", [booking_id])
+    assert response.json["failed"] == [{"booking_id": booking_id, "error": "Cannot start service too early"}]
+    assert db.session.get(Booking, booking_id).status == "confirmed"
+
+
+def test_only_staff_and_known_actions_are_accepted(client, salon, customers):
+    (customer,) = customers(1)
+    booking_id = book(client, salon, customer, "10:00")
+
+    assert batch(client, customer, "cancel", [booking_id]).status_code == 403
+    assert batch(client, headers_for(staff("desk", is_receptionist=True)), "finish", [booking_id]).status_code == 400
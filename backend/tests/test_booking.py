@@ -0,0 +1,179 @@
+import threading
+from datetime import date, time, timedelta
+
+from flask_jwt_extended import create_access_token
+
+from models import db, Booking, BookingClaim, BookingHold, Employee, Service, User
+from utils.claims import claim_units
+from utils.skill_index import get_skill_index
+
+NEXT_WEEK = (date.today() + timedelta(days=7)).isoformat()
+
+
+def preview(client, salon, headers=None, start_time="10:00"):
+    return client.get("/bookings/preview", headers=headers or {}, query_string={
+        "service_id": salon["service"], "date": NEXT_WEEK, "start_time": start_time,
+    })
+
+
+def test_anonymous_preview_holds_nothing(client, salon):
+    for _ in range(5):
+        response = preview(client, salon)
+        assert response.status_code == 200
+        assert response.json["available"] is True
+        assert response.json["hold"] is None
+
+    assert BookingHold.query.count() == 0
+
+
+def test_signed_in_preview_keeps_one_hold_per_customer(client, salon, customers):
+    (headers,) = customers(1)
+
+    first = preview(client, salon, headers).json["hold"]
+    second = preview(client, salon, headers, start_time="11:00").json["hold"]
+
+    assert first and second and first["token"] != second["token"]
+    holds = BookingHold.query.all()
+    assert [hold.token for hold in holds] == [second["token"]]
+
+
+def test_parallel_checkouts_for_one_slot_book_it_once(app, salon, customers):
+    threads = 8
+    headers = customers(threads)
+    barrier = threading.Barrier(threads)
+    statuses = []
+
+    def checkout(auth):
+        client = app.test_client()
+        barrier.wait()
+        response = client.post("/book", headers=auth, json={
+            "service_id": salon["service"], "employee_id": salon["employee"],
+            "date": NEXT_WEEK, "start_time": "10:00",
+        })
+        statuses.append(response.status_code)
+
+    workers = [threading.Thread(target=checkout, args=(auth,)) for auth in headers]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert sorted(statuses) == [201] + [409] * (threads - 1)
+    db.session.expire_all()
+    (booking,) = Booking.query.all()
+    claims = BookingClaim.query.all()
+    assert claims and {claim.booking_id for claim in claims} == {booking.id}
+    assert len(claims) == len(claim_units(booking.start_time, booking.end_time))
+
+
+def test_booking_list_pages_through_with_next_cursor(client, salon, customers):
+    (headers,) = customers(1)
+    for hour in range(8, 13):
+        response = client.post("/book", headers=headers, json={
+            "service_id": salon["service"], "date": NEXT_WEEK, "start_time": f"{hour:02d}:00",
+        })
+        assert response.status_code == 201
+
+    seen, cursor = [], None
+    while True:
+        response = client.get("/bookings", headers=headers, query_string={"limit": 2, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        assert response.headers.get("X-Next-Cursor") == response.json["next_cursor"]
+        seen += [b["start_time"] for b in response.json["bookings"]]
+        cursor = response.json["next_cursor"]
+        if not cursor:
+            break
+
+    assert seen == ["12:00", "11:00", "10:00", "09:00", "08:00"]
+
+
+def test_next_slots_accepts_a_from_with_a_utc_offset(client, salon):
+    response = client.get("/available-slots/next", query_string={
+        "service_id": salon["service"], "from": f"{NEXT_WEEK}T09:00:00+00:00", "count": 1,
+    })
+
+    assert response.status_code == 200
+    assert len(response.json["slots"]) == 1
+
+
+def test_admin_search_counts_only_on_the_first_page(client, salon, customers):
+    (headers,) = customers(1)
+    for hour in range(8, 11):
+        client.post("/book", headers=headers, json={
+            "service_id": salon["service"], "date": NEXT_WEEK, "start_time": f"{hour:02d}:00",
+        })
+    staff = User(username="desk", email="desk@example.com", password="x", is_receptionist=True)
+    db.session.add(staff)
+    db.session.commit()
+    desk = {"Authorization": f"Bearer {create_access_token(identity=staff.id)}"}
+
+    first = client.get("/admin/bookings", headers=desk, query_string={"limit": 2, "status": "confirmed"}).json
+    assert first["counts"]["total"] == 3
+    assert first["counts"]["by_status"]["confirmed"] == 3
+
+    second = client.get("/admin/bookings", headers=desk, query_string={
+        "limit": 2, "status": "confirmed", "cursor": first["next_cursor"],
+    }).json
+    assert len(second["bookings"]) == 1
+    assert second["counts"] is None
+
+
+def test_bundle_honours_an_employee_id_sent_as_a_string(client, salon, customers):
+    (headers,) = customers(1)
+    # A second stylist, whom the planner only picks when asked for
+    staff = User(username="stylist2", email="stylist2@example.com", password="x", is_beautician=True)
+    db.session.add(staff)
+    db.session.flush()
+    requested = Employee(user_id=staff.id, full_name="Requested", work_start=time(8), work_end=time(20),
+                         work_days="0,1,2,3,4,5,6", work_days_mask=0b1111111, _is_active=True)
+    requested.skills.append(db.session.get(Service, salon["service"]))
+    db.session.add(requested)
+    db.session.commit()
+    get_skill_index().invalidate()
+
+    response = client.post("/book/bundle", headers=headers, json={
+        "service_ids": [salon["service"], salon["service"]], "date": NEXT_WEEK, "start_time": "10:00",
+        "employee_id": str(requested.id),
+    })
+
+    assert response.status_code == 201
+    assert [b["employee_id"] for b in response.json["bookings"]] == [requested.id, requested.id]
+
+
+def test_confirming_a_hold_rechecks_the_buffer(client, salon, customers):
+    holder, other = customers(2)
+    hold = preview(client, salon, holder).json["hold"]
+
+    # Clear of the held service time (10:00-10:45) but inside its buffer
+    booked = client.post("/book", headers=other, json={
+        "service_id": salon["service"], "date": NEXT_WEEK, "start_time": "10:50",
+    })
+    assert booked.status_code == 201
+
+    confirmed = client.post("/book", headers=holder, json={
+        "service_id": salon["service"], "date": NEXT_WEEK, "start_time": "10:00", "hold_token": hold["token"],
+    })
+    assert confirmed.status_code == 409
+    assert Booking.query.count() == 1
+
+
+def test_rescheduled_booking_keeps_its_new_slot(client, salon, customers):
+    first, second = customers(2)
+    booked = client.post("/book", headers=first, json={
+        "service_id": salon["service"], "date": NEXT_WEEK, "start_time": "10:00",
+    })
+    moved = client.patch(f"/bookings/reschedule/{booked.json['booking_id']}", headers=first, json={
+        "date": NEXT_WEEK, "start_time": "12:00",
+    })
+    assert moved.status_code == 200
+
+    rescheduled = db.session.get(Booking, booked.json["booking_id"])
+    assert rescheduled.status == "rescheduled"
+    assert BookingClaim.query.filter_by(booking_id=rescheduled.id).count() == len(
+        claim_units(rescheduled.start_time, rescheduled.end_time))
+
+    clash = client.post("/book", headers=second, json={
+        "service_id": salon["service"], "date": NEXT_WEEK, "start_time": "12:00",
+    })
+    assert clash.status_code == 409
+    assert Booking.query.count() == 1
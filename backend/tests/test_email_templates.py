@@ -0,0 +1,53 @@
+import email
+from datetime import date, time, timedelta
+from types import SimpleNamespace
+
+from flask_mail import Message
+
+from app import mail
+from utils.email_templates import get_email_templates
+from views.reminder import send_reminder_email_batch
+
+
+def reminders(count):
+    tomorrow = date.today() + timedelta(days=1)
+    return [{
+        "user": SimpleNamespace(username=f"Zoë <{i}> & co", email=f"user{i}@example.com"),
+        "booking": SimpleNamespace(id=i, booking_date=tomorrow, start_time=time(9 + i), end_time=time(9 + i, 45),
+                                   price=450, status="confirmed"),
+        "service": SimpleNamespace(title="Cut"),
+        "employee": SimpleNamespace(full_name="Stylist"),
+    } for i in range(count)]
+
+
+def parts(raw):
+    parsed = email.message_from_bytes(raw)
+    headers = {name: parsed[name] for name in ("Subject", "From", "To", "Date", "Message-ID")}
+    return headers, [(part.get_content_type(), part.get_payload(decode=True)) for part in parsed.walk()]
+
+
+def test_batch_messages_match_flask_mail(app):
+    batch = reminders(3)
+    messages = get_email_templates().message_batch(
+        "reminder", batch, recipients=[[data["user"].email] for data in batch], sender="salon@example.com"
+    )
+
+    for msg in messages:
+        msg.date = 1_700_000_000
+        plain = Message(subject=msg.subject, sender=msg.sender, recipients=msg.recipients,
+                        body=msg.body, html=msg.html, date=msg.date)
+        plain.msgId = msg.msgId
+        assert parts(msg.as_bytes()) == parts(plain.as_bytes())
+
+
+def test_reminder_batch_delivers_its_own_message_to_each_customer(app, smtp):
+    stats = send_reminder_email_batch(mail, reminders(3))
+
+    assert sorted(stats.sent) == [0, 1, 2]
+    received = {}
+    for raw in smtp.messages:
+        parsed = email.message_from_string(raw)
+        (plain,) = [part for part in parsed.walk() if part.get_content_type() == "text/plain"]
+        received[parsed["To"]] = plain.get_payload(decode=True).decode()
+    assert sorted(received) == [f"user{i}@example.com" for i in range(3)]
+    assert "Hello Zoë <1> & co" in received["user1@example.com"]
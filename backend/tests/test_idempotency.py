@@ -0,0 +1,47 @@
+import hashlib
+import json
+from datetime import date, datetime, timedelta
+
+from models import db, Booking, IdempotencyKey, User
+
+NEXT_WEEK = (date.today() + timedelta(days=7)).isoformat()
+
+
+def in_flight(salon, started_seconds_ago):
+    """Post /book's body and store its key as a request that started a while ago and never finished."""
+    body = json.dumps({"service_id": salon["service"], "date": NEXT_WEEK, "start_time": "10:00"})
+    now = datetime.utcnow()
+    db.session.add(IdempotencyKey(
+        user_id=User.query.filter_by(username="customer0").one().id, key="retry-me",
+        request_hash=hashlib.sha256(b"POST /book\n" + body.encode()).hexdigest(),
+        started_at=now - timedelta(seconds=started_seconds_ago), expires_at=now + timedelta(hours=24),
+    ))
+    db.session.commit()
+    return body
+
+
+def post(client, headers, body):
+    return client.post("/book", data=body, content_type="application/json",
+                       headers={**headers, "Idempotency-Key": "retry-me"})
+
+
+def test_retry_while_request_is_in_flight_conflicts(client, salon, customers):
+    (headers,) = customers(1)
+    body = in_flight(salon, started_seconds_ago=5)
+
+    assert post(client, headers, body).status_code == 409
+    assert Booking.query.count() == 0
+
+
+def test_retry_takes_over_an_abandoned_request(client, salon, customers):
+    (headers,) = customers(1)
+    body = in_flight(salon, started_seconds_ago=120)
+
+    first = post(client, headers, body)
+    assert first.status_code == 201
+
+    replay = post(client, headers, body)
+    assert replay.status_code == 201
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.json == first.json
+    assert Booking.query.count() == 1
@@ -0,0 +1,23 @@
+from datetime import date, timedelta
+
+from utils.availability import interval_mask
+from utils.occupancy import OccupancyGrid
+
+
+def test_reader_remaps_after_another_process_grows_the_file(app):
+    day = date.today() + timedelta(days=7)
+    directory = app.extensions["occupancy_grid"].directory
+    reader, writer = OccupancyGrid(), OccupancyGrid()
+    reader.directory = writer.directory = directory
+
+    # The reader maps the file while it only has rows for employees 1 and 2
+    with writer._locked(day) as fd:
+        writer._write_rows(fd, {1: 0, 2: 0}, 3)
+    assert reader.read_masks(day, [1]) == {1: 0}
+
+    # Another process books employee 50, growing the file past the reader's mapping
+    booked = interval_mask(10 * 60, 11 * 60)
+    with writer._locked(day) as fd:
+        writer._write_rows(fd, {50: booked}, 0)
+
+    assert reader.read_masks(day, [1, 50]) == {1: 0, 50: booked}
@@ -0,0 +1,91 @@
+import time
+from datetime import datetime
+
+from flask_mail import Message
+
+from models import db, EmailOutbox
+from utils.outbox import enqueue_email, get_email_outbox
+
+
+def queue(subject="Booking Confirmation", to="customer@example.com"):
+    row = enqueue_email(Message(subject=subject, recipients=[to], body="See you soon", sender="salon@example.com"))
+    db.session.commit()
+    return row.id
+
+
+def test_drain_delivers_queued_email(smtp):
+    row_id = queue()
+
+    assert get_email_outbox().drain() == 1
+
+    row = db.session.get(EmailOutbox, row_id)
+    assert row.status == "sent" and row.attempts == 1 and row.sent_at is not None
+    assert len(smtp.messages) == 1
+    assert "Subject: Booking Confirmation" in smtp.messages[0]
+    assert "To: customer@example.com" in smtp.messages[0]
+
+
+def test_workers_deliver_after_commit(app, smtp):
+    outbox = get_email_outbox()
+    app.config["EMAIL_OUTBOX_POLL_SECONDS"] = 30  # only a commit wakes them in time
+    outbox.start()
+    try:
+        row_id = queue()
+        deadline = time.time() + 5
+        while time.time() < deadline and not smtp.messages:
+            time.sleep(0.02)
+    finally:
+        outbox.stop()
+        app.config["EMAIL_OUTBOX_POLL_SECONDS"] = 5
+
+    db.session.expire_all()
+    assert len(smtp.messages) == 1
+    assert db.session.get(EmailOutbox, row_id).status == "sent"
+
+
+def test_rolled_back_email_is_never_sent(smtp):
+    enqueue_email(Message(subject="Nope", recipients=["customer@example.com"], body="x", sender="salon@example.com"))
+    db.session.rollback()
+
+    assert get_email_outbox().drain() == 0
+    assert smtp.messages == []
+
+
+def test_refused_email_is_retried_with_backoff(app, smtp):
+    smtp.refuse = 1
+    row_id = queue()
+
+    get_email_outbox().drain()
+    row = db.session.get(EmailOutbox, row_id)
+    assert row.status == "pending" and row.attempts == 1
+    assert "451" in row.last_error
+    assert row.next_attempt_at > datetime.utcnow()
+    assert smtp.messages == []
+
+    # Not due yet, so a second pass leaves it alone
+    assert get_email_outbox().drain() == 0
+
+    row.next_attempt_at = datetime.utcnow()
+    db.session.commit()
+    get_email_outbox().drain()
+    row = db.session.get(EmailOutbox, row_id)
+    assert row.status == "sent" and row.attempts == 2 and row.last_error is None
+    assert len(smtp.messages) == 1
+
+
+def test_email_fails_after_max_attempts(app, smtp):
+    app.config["EMAIL_OUTBOX_MAX_ATTEMPTS"] = 2
+    smtp.refuse = 2
+    row_id = queue()
+    try:
+        for _ in range(2):
+            row = db.session.get(EmailOutbox, row_id)
+            row.next_attempt_at = datetime.utcnow()
+            db.session.commit()
+            get_email_outbox().drain()
+    finally:
+        app.config["EMAIL_OUTBOX_MAX_ATTEMPTS"] = 8
+
+    row = db.session.get(EmailOutbox, row_id)
+    assert row.status == "failed" and row.attempts == 2
+    assert smtp.messages == []
@@ -0,0 +1,92 @@
+from datetime import date, datetime, time, timedelta
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from flask_jwt_extended import create_access_token
+
+import views.reminder as reminder
+from models import db, Booking, SchedulerRunRequest, User
+
+
+def admin_headers():
+    admin = User(username="admin", email="admin@example.com", password="x", is_admin=True)
+    db.session.add(admin)
+    db.session.commit()
+    return {"Authorization": f"Bearer {create_access_token(identity=admin.id)}"}
+
+
+def add_bookings(salon, days_ago, count):
+    """`count` confirmed bookings for the salon's stylist, `days_ago` days back."""
+    customer = User(username="regular", email="regular@example.com", password="x")
+    db.session.add(customer)
+    db.session.flush()
+    db.session.add_all(
+        Booking(user_id=customer.id, service_id=salon["service"], employee_id=salon["employee"],
+                booking_date=date.today() - timedelta(days=days_ago), start_time=time(9 + i), end_time=time(9 + i, 45),
+                price=450, status="confirmed")
+        for i in range(count)
+    )
+    db.session.commit()
+
+
+def test_public_reminder_status_does_not_expose_the_scheduler(client):
+    response = client.get("/api/reminders/status")
+
+    assert response.status_code == 200
+    assert "scheduler" not in response.json
+    assert "pending_reminders" in response.json
+
+
+def test_processing_reminders_is_for_admins_only(client, customers):
+    (customer,) = customers(1)
+
+    assert client.post("/api/reminders/process").status_code == 401
+    assert client.post("/api/reminders/process", headers=customer).status_code == 403
+    assert SchedulerRunRequest.query.count() == 0
+
+
+def test_processing_reminders_queues_the_jobs_instead_of_running_them(client, salon):
+    add_bookings(salon, days_ago=3, count=2)
+    headers = admin_headers()
+
+    response = client.post("/api/reminders/process", headers=headers)
+    assert response.status_code == 202
+    assert client.post("/api/reminders/process", headers=headers).status_code == 202
+
+    # Queued once per job however often it's asked for, and nothing deleted yet
+    assert sorted(r.job_id for r in SchedulerRunRequest.query) == sorted(reminder.MANUAL_JOBS)
+    assert Booking.query.count() == 2
+
+
+def test_the_leader_brings_queued_jobs_forward(app, client, monkeypatch):
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(lambda: None, "interval", hours=6, id="booking_cleanup",
+                      next_run_time=datetime.now() + timedelta(hours=6))
+    scheduler.start(paused=True)
+    monkeypatch.setattr(reminder, "scheduler", scheduler)
+    try:
+        client.post("/api/reminders/process", headers=admin_headers())
+        reminder.run_requested_jobs(app)
+
+        next_run = scheduler.get_job("booking_cleanup").next_run_time.replace(tzinfo=None)
+        assert next_run <= datetime.now()
+        assert SchedulerRunRequest.query.count() == 0
+    finally:
+        scheduler.shutdown(wait=False)
+
+
+def test_cleanup_out_of_time_resumes_on_the_next_run(app, salon, monkeypatch):
+    add_bookings(salon, days_ago=3, count=5)
+    monkeypatch.setitem(app.config, "CLEANUP_CHUNK_SIZE", 2)
+    monkeypatch.setitem(app.config, "CLEANUP_PAUSE_SECONDS", 0.2)
+    monkeypatch.setitem(app.config, "CLEANUP_MAX_SECONDS", 0.1)
+
+    # The pause after the first chunk uses up the time allowed
+    assert reminder.delete_expired_bookings(app) == 2
+    assert reminder.last_cleanup["finished"] is False
+    assert reminder.last_cleanup["next_id"] is not None
+    assert Booking.query.count() == 3
+
+    monkeypatch.setitem(app.config, "CLEANUP_MAX_SECONDS", 60)
+    assert reminder.delete_expired_bookings(app) == 3
+    assert reminder.last_cleanup["finished"] is True
+    assert Booking.query.count() == 0
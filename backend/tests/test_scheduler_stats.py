@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+from flask_jwt_extended import create_access_token
+
+from models import db, SchedulerJobRun, User
+from utils.job_telemetry import get_job_telemetry
+
+
+def record(*runs):
+    """Store (status, duration_ms) runs of the reminder job, an hour apart and ending now."""
+    start = datetime.utcnow() - timedelta(hours=len(runs))
+    db.session.add_all(
+        SchedulerJobRun(job_id="reminder_check", holder="test", status=status, started_at=start + timedelta(hours=i),
+                        duration_ms=duration)
+        for i, (status, duration) in enumerate(runs)
+    )
+    db.session.commit()
+
+
+def overrunning():
+    since = datetime.utcnow() - timedelta(days=1)
+    return get_job_telemetry().summary(since, {"reminder_check": 3600})["reminder_check"]["overrunning"]
+
+
+def test_stats_are_for_admins_only(client, customers):
+    (customer,) = customers(1)
+    admin = User(username="admin", email="admin@example.com", password="x", is_admin=True)
+    db.session.add(admin)
+    db.session.commit()
+
+    assert client.get("/api/scheduler/stats").status_code == 401
+    assert client.get("/api/scheduler/stats", headers=customer).status_code == 403
+    response = client.get("/api/scheduler/stats", headers={
+        "Authorization": f"Bearer {create_access_token(identity=admin.id)}"
+    })
+    assert response.status_code == 200
+
+
+def test_one_skipped_run_is_not_overrunning(app):
+    record(("ok", 1200), ("skipped", None), ("ok", 1300), ("skipped", None), ("ok", 1100))
+    assert overrunning() is False
+
+
+def test_skips_in_a_row_are_overrunning(app):
+    record(("ok", 1200), ("skipped", None), ("skipped", None))
+    assert overrunning() is True
+
+
+def test_skips_it_has_recovered_from_are_not_overrunning(app):
+    record(("ok", 1200), ("skipped", None), ("skipped", None), ("skipped", None), ("ok", 1300))
+    assert overrunning() is False
+
+
+def test_a_run_as_long_as_the_interval_is_overrunning(app):
+    record(("ok", 1200), ("ok", 3600 * 1000))
+    assert overrunning() is True
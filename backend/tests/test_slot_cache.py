@@ -0,0 +1,24 @@
+from datetime import date, timedelta
+
+from flask import Flask
+
+from utils.slot_cache import SlotCache
+
+
+def test_invalidation_reaches_other_workers(app):
+    # Two SlotCaches on one directory, as in two gunicorn workers
+    day = date.today() + timedelta(days=7)
+    workers = []
+    for _ in range(2):
+        worker = Flask(__name__)
+        worker.config["SLOT_CACHE_DIR"] = app.config["SLOT_CACHE_DIR"]
+        workers.append((worker, SlotCache(worker)))
+    (first_app, first), (second_app, second) = workers
+
+    with first_app.app_context():
+        first.set(first.key_for(1, day), {"slots": ["10:00"]})
+    with second_app.app_context():
+        assert second.get(second.key_for(1, day)) == {"slots": ["10:00"]}
+        second.invalidate_date(day)
+    with first_app.app_context():
+        assert first.get(first.key_for(1, day)) is None
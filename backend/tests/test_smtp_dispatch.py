@@ -0,0 +1,39 @@
+import email
+
+from flask_mail import Message
+
+from app import mail
+from utils.smtp_dispatch import SmtpDispatcher
+
+
+def messages(count):
+    return [(i, Message(f"Reminder {i}", sender="salon@example.com", recipients=[f"user{i}@example.com"],
+                        body="See you tomorrow")) for i in range(count)]
+
+
+def test_a_451_is_retried_until_the_message_goes_through(app, smtp):
+    smtp.refuse = 2
+    dispatcher = SmtpDispatcher(mail, connections=2, retries=2, retry_delay=0.01)
+
+    stats = dispatcher.dispatch(messages(6))
+
+    assert sorted(stats.sent) == list(range(6))
+    assert stats.failed == {}
+    assert stats.retries == 2
+    assert stats.connections <= 2
+    # Each customer gets exactly one copy
+    assert sorted(email.message_from_string(raw)["To"] for raw in smtp.messages) == \
+        sorted(f"user{i}@example.com" for i in range(6))
+
+
+def test_messages_give_up_after_their_retries(app, smtp):
+    smtp.refuse = 100
+    dispatcher = SmtpDispatcher(mail, connections=1, retries=1, retry_delay=0.01)
+
+    stats = dispatcher.dispatch(messages(2))
+
+    assert stats.sent == []
+    assert sorted(stats.failed) == [0, 1]
+    assert "451" in stats.failed[0]
+    assert stats.retries == 2
+    assert smtp.messages == []
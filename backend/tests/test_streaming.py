@@ -0,0 +1,110 @@
+import json
+import sqlite3
+from datetime import date, time, timedelta
+
+from flask_jwt_extended import create_access_token
+
+from models import db, Booking, Category, Employee, Service, User
+from utils.pagination import keyset_batches
+from utils.streaming import stream_json
+
+SORT_KEY = (Booking.booking_date, Booking.start_time, Booking.id)
+NEWEST_DAY_FIRST = (True, False, False)
+
+
+def add_bookings(salon, times):
+    """One booking per (days_ahead, hour), for the salon's stylist."""
+    customer = User(username="regular", email="regular@example.com", password="x")
+    db.session.add(customer)
+    db.session.flush()
+    db.session.add_all(
+        Booking(user_id=customer.id, service_id=salon["service"], employee_id=salon["employee"],
+                booking_date=date.today() + timedelta(days=days), start_time=time(hour), end_time=time(hour, 45),
+                price=450, status="confirmed")
+        for days, hour in times
+    )
+    db.session.commit()
+
+
+def expected_order():
+    return [b.id for b in Booking.query.order_by(
+        Booking.booking_date.desc(), Booking.start_time, Booking.id
+    )]
+
+
+def test_keyset_batches_cover_every_row_once_in_order(app, salon):
+    # Ties on date, and one day's bookings straddling a batch boundary
+    add_bookings(salon, [(3, 9), (1, 14), (3, 11), (2, 10), (1, 9), (3, 8), (2, 16)])
+
+    batches = list(keyset_batches(Booking.query, SORT_KEY, NEWEST_DAY_FIRST, batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 2, 2, 1]
+    assert [b.id for batch in batches for b in batch] == expected_order()
+
+
+def test_keyset_batches_end_cleanly_on_a_full_batch(app, salon):
+    add_bookings(salon, [(1, 9), (1, 10), (2, 9), (2, 10)])
+
+    batches = list(keyset_batches(Booking.query, SORT_KEY, NEWEST_DAY_FIRST, batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 2]
+
+
+def test_streamed_body_matches_jsonify(app, salon):
+    add_bookings(salon, [(1, 9), (2, 10), (1, 12)])
+    rows = Booking.query.order_by(Booking.booking_date.desc(), Booking.start_time, Booking.id).all()
+
+    def serialize(b):
+        return {"id": b.id, "date": b.booking_date.isoformat(), "start_time": b.start_time.strftime("%H:%M")}
+
+    with app.test_request_context():
+        streamed = stream_json(Booking.query, serialize, sort_key=SORT_KEY, descending=NEWEST_DAY_FIRST,
+                               key="bookings", envelope={"page": 1}, count_key="total", batch_size=2)
+        body = streamed.get_data(as_text=True)
+        expected = app.json.dumps({"page": 1, "bookings": [serialize(b) for b in rows], "total": 3})
+
+    assert json.loads(body) == json.loads(expected)
+
+
+def test_services_stream_matches_to_dict(client, salon):
+    category = Category.query.first()
+    db.session.add_all(Service(title=f"Extra {i}", price=100 + i, duration_minutes=30, category_id=category.id)
+                       for i in range(3))
+    db.session.commit()
+    expected = [service.to_dict() for service in Service.query.order_by(Service.id)]
+
+    response = client.get("/services")
+
+    assert response.is_streamed
+    assert response.json == json.loads(json.dumps(expected))
+
+
+def test_beautician_bookings_stream_newest_day_first(client, salon):
+    add_bookings(salon, [(1, 14), (2, 9), (1, 9), (2, 13)])
+    stylist = db.session.get(Employee, salon["employee"]).user_id
+    headers = {"Authorization": f"Bearer {create_access_token(identity=stylist)}"}
+
+    response = client.get("/beautician/bookings", headers=headers)
+
+    assert response.status_code == 200
+    assert [row["booking"]["id"] for row in response.json] == expected_order()
+
+
+def test_a_paused_stream_does_not_block_writers(app, salon):
+    add_bookings(salon, [(1, 9), (1, 10), (1, 11), (2, 9), (2, 10)])
+
+    with app.test_request_context():
+        streamed = stream_json(Booking.query, lambda b: b.id, sort_key=SORT_KEY, batch_size=2)
+        chunks = iter(streamed.response)
+        next(chunks)
+
+        # The client stops reading mid-body; another connection must still be able to commit
+        writer = sqlite3.connect(db.engine.url.database, timeout=0.2)
+        try:
+            writer.execute("UPDATE bookings SET price = 500")
+            writer.commit()
+        finally:
+            writer.close()
+        rest = "".join(chunks)
+
+    assert rest.endswith("]")
@@ -0,0 +1,50 @@
+from datetime import date, timedelta
+
+from models import Booking, WaitlistEntry
+
+NEXT_WEEK = (date.today() + timedelta(days=7)).isoformat()
+
+
+def test_cancellation_books_the_waiting_customer(client, salon, customers):
+    booker, waiting = customers(2)
+    booked = client.post("/book", headers=booker, json={
+        "service_id": salon["service"], "date": NEXT_WEEK, "start_time": "10:00",
+    })
+    assert booked.status_code == 201
+    joined = client.post("/waitlist", headers=waiting, json={
+        "service_id": salon["service"], "date_from": NEXT_WEEK, "date_to": NEXT_WEEK,
+        "earliest_start": "10:00", "latest_start": "10:00", "auto_book": True,
+    })
+    assert joined.status_code == 201
+
+    cancelled = client.patch(f"/bookings/cancel/{booked.json['booking_id']}", headers=booker)
+    assert cancelled.status_code == 200
+
+    entry = WaitlistEntry.query.one()
+    assert entry.status == "booked"
+    rebooked = Booking.query.get(entry.booking_id)
+    assert rebooked.start_time.strftime("%H:%M") == "10:00"
+    assert rebooked.employee_id == salon["employee"]
+
+
+def test_previewing_another_slot_keeps_an_open_offer(client, salon, customers):
+    booker, waiting = customers(2)
+    booked = client.post("/book", headers=booker, json={
+        "service_id": salon["service"], "date": NEXT_WEEK, "start_time": "10:00",
+    })
+    client.post("/waitlist", headers=waiting, json={
+        "service_id": salon["service"], "date_from": NEXT_WEEK, "date_to": NEXT_WEEK,
+        "earliest_start": "10:00", "latest_start": "10:00",
+    })
+    client.patch(f"/bookings/cancel/{booked.json['booking_id']}", headers=booker)
+    (entry,) = client.get("/waitlist", headers=waiting).json
+    assert entry["status"] == "offered" and entry["offer"]
+
+    preview = client.get("/bookings/preview", headers=waiting, query_string={
+        "service_id": salon["service"], "date": NEXT_WEEK, "start_time": "14:00",
+    })
+    assert preview.json["hold"]
+
+    (entry,) = client.get("/waitlist", headers=waiting).json
+    assert entry["status"] == "offered"
+    assert entry["offer"] and entry["offer"]["start_time"] == "10:00"
@@ -0,0 +1,79 @@
+import random
+from flask import current_app
+from .availability import to_minutes
+
+# name -> function(availability, candidates, start_minute, end_minute) -> ranked employees
+STRATEGIES = {}
+
+
+def register_strategy(name):
+    """Register an assignment strategy under a name usable in ASSIGNMENT_STRATEGY."""
+    def decorator(fn):
+        STRATEGIES[name] = fn
+        return fn
+    return decorator
+
+
+def busy_minutes(availability, employee):
+    return bin(availability.busy.get(employee.id, 0)).count("1")
+
+
+def leftover_gap(availability, employee, start_minute, end_minute):
+    """
+    Free minutes left either side of [start_minute, end_minute) inside the
+    employee's working window, up to the nearest booking on each side.
+    """
+    window_start, window_end = availability.windows[employee.id]
+    busy = availability.busy.get(employee.id, 0)
+
+    # Last occupied minute before the slot, first occupied minute after it
+    before = busy & ((1 << max(start_minute, 0)) - 1)
+    free_from = max(window_start, before.bit_length()) if before else window_start
+
+    after = busy >> end_minute
+    free_until = min(window_end, end_minute + (after & -after).bit_length() - 1) if after else window_end
+
+    return (start_minute - free_from) + (free_until - end_minute)
+
+
+@register_strategy("best_fit")
+def best_fit(availability, candidates, start_minute, end_minute):
+    """Smallest leftover gap first, keeping long free stretches for long services."""
+    return sorted(
+        candidates,
+        key=lambda emp: (
+            leftover_gap(availability, emp, start_minute, end_minute),
+            busy_minutes(availability, emp),
+        )
+    )
+
+
+@register_strategy("least_loaded")
+def least_loaded(availability, candidates, start_minute, end_minute):
+    """Fewest booked minutes that day first, spreading work evenly."""
+    shuffled = random.sample(candidates, len(candidates))  # random among equals
+    return sorted(shuffled, key=lambda emp: busy_minutes(availability, emp))
+
+
+@register_strategy("random")
+def random_order(availability, candidates, start_minute, end_minute):
+    """Uniformly random, the original behaviour."""
+    return random.sample(candidates, len(candidates))
+
+
+def rank_employees(availability, employees, start_time, end_time, strategy=None):
+    """
+    Employees free for [start_time, end_time), best candidate first, using
+    the named strategy or the app's ASSIGNMENT_STRATEGY. end_time should
+    already include the buffer.
+    """
+    name = strategy or current_app.config.get("ASSIGNMENT_STRATEGY", "best_fit")
+    try:
+        rank = STRATEGIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown assignment strategy: {name}")
+
+    candidates = [emp for emp in employees if availability.is_available(emp, start_time, end_time)]
+    if len(candidates) < 2:
+        return candidates
+    return rank(availability, candidates, to_minutes(start_time), to_minutes(end_time))
@@ -1,5 +1,9 @@
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta
-from sqlalchemy import and_, or_
+from .constants import SALON_OPEN
+
+# Booking statuses that occupy an employee's time
+BLOCKING_STATUSES = ("confirmed", "in_progress", "rescheduled")
 
 def is_employee_available(employee, booking_date, start_time, end_time, service=None):
 
@@ -8,13 +12,7 @@ def is_employee_available(employee, booking_date, start_time, end_time, service=
         return False
 
     # 2. Check if employee works on this day
-    weekday = booking_date.weekday()  # 0=Monday, 6=Sunday
-    try:
-        work_days = [int(d) for d in employee.work_days.split(",") if d.strip()]
-    except (ValueError, AttributeError):
-        return False
-    
-    if weekday not in work_days:
+    if not employee.works_on(booking_date.weekday()):  # 0=Monday, 6=Sunday
         return False
 
     # 3. Check if booking fits within employee's working hours
@@ -23,34 +21,183 @@ def is_employee_available(employee, booking_date, start_time, end_time, service=
 
     # 4. Check skill match (if service provided)
     if service is not None:
-        # Check if employee has this service in their skills
-        has_skill = any(skill.id == service.id for skill in employee.skills)
-        if not has_skill:
+        # Import here to avoid circular imports
+        from .skill_index import get_skill_index
+
+        if not get_skill_index().has_skill(employee.id, service.id):
             return False
 
-    # 5. Check for overlapping bookings
-    # Import here to avoid circular imports
-    from models import Booking
-    
-    overlapping_booking = Booking.query.filter(
-        Booking.employee_id == employee.id,
+    # 5. Check for overlapping bookings (a bitmask test against the occupancy grid)
+    busy = get_busy_masks([employee.id], booking_date)[employee.id]
+    if busy & interval_mask(to_minutes(start_time), to_minutes(end_time)):
+        return False
+
+    return True
+
+
+
+
+def to_minutes(t):
+    """Minutes elapsed between SALON_OPEN and a time of day."""
+    return (t.hour - SALON_OPEN.hour) * 60 + (t.minute - SALON_OPEN.minute)
+
+
+def interval_mask(start_minute, end_minute):
+    """
+    Bitmask with one bit per minute in [start_minute, end_minute).
+    Minutes before SALON_OPEN are clipped off.
+    """
+    start_minute = max(start_minute, 0)
+    if end_minute <= start_minute:
+        return 0
+    return ((1 << (end_minute - start_minute)) - 1) << start_minute
+
+
+def load_busy_masks(employee_ids, booking_date):
+    """
+    Load the occupied minutes of several employees for one day in a single query.
+    Returns {employee_id: bitmask}; employees without bookings map to 0.
+    """
+    from models import Booking, db
+
+    busy = {emp_id: 0 for emp_id in employee_ids}
+    if not busy:
+        return busy
+
+    rows = db.session.query(
+        Booking.employee_id, Booking.start_time, Booking.end_time
+    ).filter(
+        Booking.employee_id.in_(list(busy)),
         Booking.booking_date == booking_date,
-        Booking.status.in_(["confirmed", "in_progress"]),
-        or_(
-            # New booking starts during an existing booking
-            and_(Booking.start_time <= start_time, Booking.end_time > start_time),
-            # New booking ends during an existing booking
-            and_(Booking.start_time < end_time, Booking.end_time >= end_time),
-            # New booking completely contains an existing booking
-            and_(Booking.start_time >= start_time, Booking.end_time <= end_time),
+        Booking.status.in_(BLOCKING_STATUSES)
+    ).all()
+
+    for emp_id, start_time, end_time in rows:
+        busy[emp_id] |= interval_mask(to_minutes(start_time), to_minutes(end_time))
+
+    return busy
+
+
+def load_busy_masks_range(employee_ids, start_date, end_date):
+    """
+    Like load_busy_masks, but for every day in [start_date, end_date] at once.
+    Returns {date: {employee_id: bitmask}}; days without bookings are omitted.
+    """
+    from models import Booking, db
+
+    busy = {}
+    if not employee_ids:
+        return busy
+
+    rows = db.session.query(
+        Booking.booking_date, Booking.employee_id, Booking.start_time, Booking.end_time
+    ).filter(
+        Booking.employee_id.in_(list(employee_ids)),
+        Booking.booking_date.between(start_date, end_date),
+        Booking.status.in_(BLOCKING_STATUSES)
+    ).all()
+
+    for booking_date, emp_id, start_time, end_time in rows:
+        day = busy.setdefault(booking_date, dict.fromkeys(employee_ids, 0))
+        day[emp_id] |= interval_mask(to_minutes(start_time), to_minutes(end_time))
+
+    return busy
+
+
+def get_busy_masks(employee_ids, booking_date):
+    """
+    Occupied minutes per employee for one day, read from the shared occupancy
+    grid when it is enabled and from the database otherwise.
+    """
+    # Import here to avoid circular imports
+    from .occupancy import get_occupancy_grid
+
+    grid = get_occupancy_grid()
+    if grid is not None:
+        return grid.read_masks(booking_date, employee_ids)
+    return load_busy_masks(employee_ids, booking_date)
+
+
+class DayAvailability:
+    """
+    Availability of a group of employees for a single day.
+
+    Bookings are loaded once up front, so every slot check afterwards is
+    answered from memory with the same rules as is_employee_available.
+    Skill matching is left to the caller when selecting `employees`.
+    """
+
+    def __init__(self, employees, booking_date, busy=None):
+        self.employees = list(employees)
+        self.booking_date = booking_date
+        self.busy = busy if busy is not None else get_busy_masks(
+            [emp.id for emp in self.employees], booking_date
         )
-    ).first()
 
-    if overlapping_booking:
-        return False
+        # Pre-compute each employee's working window for this weekday
+        weekday = booking_date.weekday()
+        self.windows = {}
+        for emp in self.employees:
+            if emp.is_active and emp.works_on(weekday):
+                self.windows[emp.id] = (to_minutes(emp.work_start), to_minutes(emp.work_end))
 
-    return True
+    def is_available(self, employee, start_time, end_time):
+        window = self.windows.get(employee.id)
+        if window is None:
+            return False
+
+        start_minute, end_minute = to_minutes(start_time), to_minutes(end_time)
+        if start_minute < window[0] or end_minute > window[1]:
+            return False
 
+        return not self.busy.get(employee.id, 0) & interval_mask(start_minute, end_minute)
+
+    def first_available(self, start_time, end_time):
+        """First employee, in the given order, who is free for the interval."""
+        for emp in self.employees:
+            if self.is_available(emp, start_time, end_time):
+                return emp
+        return None
+
+    def assign_slots(self, grid):
+        """
+        For every slot of a utils.slots.SlotGrid, the first employee (in the
+        given order) free for the slot plus buffer, or None.
+
+        Works on whole-grid bitsets: an employee's working window is a
+        contiguous slot range found by bisecting the start offsets, and
+        only employees with bookings need per-slot mask tests.
+        """
+        starts, masks = grid.starts, grid.masks
+        assigned = [None] * len(starts)
+        unassigned = (1 << len(starts)) - 1
+
+        for emp in self.employees:
+            if not unassigned:
+                break
+            window = self.windows.get(emp.id)
+            if window is None:
+                continue
+
+            lo = bisect_left(starts, window[0])
+            hi = bisect_right(starts, window[1] - grid.block)
+            if lo >= hi:
+                continue
+            free = (((1 << (hi - lo)) - 1) << lo) & unassigned
+
+            busy = self.busy.get(emp.id, 0)
+            if busy:
+                for i in range(lo, hi):
+                    if free >> i & 1 and busy & masks[i]:
+                        free &= ~(1 << i)
+
+            unassigned &= ~free
+            while free:
+                low_bit = free & -free
+                assigned[low_bit.bit_length() - 1] = emp
+                free ^= low_bit
+
+        return assigned
 
 
 # def auto_assign_employee(service, booking_date, start_time, end_time):
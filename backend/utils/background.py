@@ -0,0 +1,50 @@
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+
+
+class BackgroundTasks:
+    """
+    A small thread pool for work that shouldn't hold up a response, like
+    rendering receipts and sending mail. Tasks run inside an app context,
+    so they get their own database session. Pass them ids, not ORM objects
+    from the request's session.
+
+    BACKGROUND_WORKERS sets the pool size. With BACKGROUND_TASKS_EAGER set,
+    tasks run inline instead, which is handy for tests and scripts.
+    """
+
+    def __init__(self, app=None):
+        self.executor = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("BACKGROUND_WORKERS", 4)
+        app.config.setdefault("BACKGROUND_TASKS_EAGER", False)
+
+        self.executor = ThreadPoolExecutor(
+            max_workers=app.config["BACKGROUND_WORKERS"],
+            thread_name_prefix="background"
+        )
+        atexit.register(self.executor.shutdown, wait=True)
+        app.extensions["background_tasks"] = self
+
+    def submit(self, fn, *args, **kwargs):
+        app = current_app._get_current_object()
+
+        def run():
+            with app.app_context():
+                try:
+                    fn(*args, **kwargs)
+                except Exception:
+                    app.logger.exception("Background task %s failed", fn.__name__)
+
+        if app.config["BACKGROUND_TASKS_EAGER"]:
+            run()
+            return None
+        return self.executor.submit(run)
+
+
+def run_in_background(fn, *args, **kwargs):
+    return current_app.extensions["background_tasks"].submit(fn, *args, **kwargs)
@@ -0,0 +1,51 @@
+from .availability import BLOCKING_STATUSES, to_minutes
+from .constants import CLAIM_UNIT_MINUTES
+
+
+def claim_units(start_time, end_time):
+    """
+    Claim units covering [start_time, end_time), rounded outwards so that
+    any two overlapping bookings share at least one unit.
+    """
+    first = to_minutes(start_time) // CLAIM_UNIT_MINUTES
+    last = -(-to_minutes(end_time) // CLAIM_UNIT_MINUTES)  # ceiling division
+    return range(first, last)
+
+
+def sync_claims(booking):
+    """
+    Make the booking's claims match its current employee, time and status.
+    Call inside the transaction that changes the booking and before commit;
+    the flush raises IntegrityError if another booking holds any of the units.
+    """
+    # Import here to avoid circular imports
+    from models import BookingClaim, db
+
+    if booking.id is None:
+        db.session.flush()
+
+    BookingClaim.query.filter_by(booking_id=booking.id).delete(synchronize_session=False)
+
+    if booking.status in BLOCKING_STATUSES:
+        db.session.add_all([
+            BookingClaim(
+                booking_id=booking.id,
+                employee_id=booking.employee_id,
+                booking_date=booking.booking_date,
+                unit=unit
+            )
+            for unit in claim_units(booking.start_time, booking.end_time)
+        ])
+
+    db.session.flush()
+
+
+def release_claims(booking_ids):
+    """
+    Drop the claims of several bookings in one statement, for batch
+    transitions to a non-blocking status. Call before commit.
+    """
+    from models import BookingClaim
+
+    if booking_ids:
+        BookingClaim.query.filter(BookingClaim.booking_id.in_(list(booking_ids))).delete(synchronize_session=False)
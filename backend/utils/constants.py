@@ -5,6 +5,12 @@ SALON_CLOSE = time(22, 0)
 GRACE_PERIOD_END = time(8, 30)
 BUFFER_MINUTES = 10 
 RESCHEDULE_HOURS_BEFORE = 24 
+CLAIM_UNIT_MINUTES = 5  # granularity of booking_claims rows
+MAX_BUNDLE_SERVICES = 5  # services in one /book/bundle request
+BUNDLE_ATTEMPTS = 3  # re-plans when a concurrent booking wins a claim
+NEXT_SLOTS_MAX_DAYS = 60  # how far /available-slots/next looks ahead
+NEXT_SLOTS_MAX_COUNT = 20
+ALTERNATIVE_SLOTS = 3  # suggested with a 409 when a time is taken
 
 TIME_BLOCKS = {
     "morning": (time(8, 0), time(12, 0)),
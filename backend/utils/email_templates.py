@@ -0,0 +1,209 @@
+import base64
+import os
+import re
+import time
+import uuid
+from collections import namedtuple
+from email.utils import formatdate
+from functools import lru_cache
+from flask import current_app
+from flask_mail import Message, sanitize_addresses
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, select_autoescape
+
+# Every notification by name, with its subject. The bodies are
+# templates/emails/<name>.txt and/or <name>.html.
+EMAILS = {
+    "booking_confirmation": "Booking Confirmation - Your Appointment",
+    "bundle_confirmation": "Booking Confirmation - Your Appointments",
+    "cancellation_customer": "Your Booking Has Been Cancelled",
+    "cancellation_employee": "Appointment Cancelled",
+    "reschedule_customer": "Your Booking Has Been Rescheduled",
+    "reschedule_employee": "Appointment Rescheduled",
+    "receipt": "Your Service Receipt – Poplar Beauty Place",
+    "reminder": "Booking Reminder - Your Appointment is Tomorrow!",
+    "waitlist_booked": "A Slot Opened Up - You're Booked!",
+    "waitlist_offer": "A Slot Opened Up For You",
+    "password_reset": "Password Reset Request",
+}
+
+RenderedEmail = namedtuple("RenderedEmail", "subject body html")
+
+
+def date_filter(fmt):
+    # A reminder batch formats the same few dates and times hundreds of times
+    @lru_cache(maxsize=1024)
+    def apply(value):
+        return value.strftime(fmt)
+    return apply
+
+
+FILTERS = {
+    "long_date": date_filter("%A, %B %d, %Y"),
+    "month_date": date_filter("%B %d, %Y"),
+    "short_date": date_filter("%d %b %Y"),
+    "iso_date": date_filter("%Y-%m-%d"),
+    "clock": date_filter("%I:%M %p"),
+    "hhmm": date_filter("%H:%M"),
+}
+
+
+class EmailTemplates:
+    """
+    The notification templates, compiled once when the app starts instead
+    of being rebuilt as f-strings for every message. Plain-text bodies
+    aren't escaped; HTML bodies are. A missing variable raises rather than
+    sending an email with a blank in it.
+    """
+
+    def __init__(self, app=None):
+        self.templates = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        env = Environment(
+            loader=FileSystemLoader(os.path.join(app.root_path, "templates", "emails")),
+            autoescape=select_autoescape(["html"]),
+            undefined=StrictUndefined,
+            trim_blocks=True,
+            lstrip_blocks=True,
+            auto_reload=False,
+        )
+        env.filters.update(FILTERS)
+
+        available = set(env.list_templates())
+        for name in EMAILS:
+            text, html = f"{name}.txt", f"{name}.html"
+            if text not in available and html not in available:
+                raise RuntimeError(f"No template for the {name} email")
+            self.templates[name] = (
+                env.get_template(text) if text in available else None,
+                env.get_template(html) if html in available else None,
+            )
+
+        app.extensions["email_templates"] = self
+
+    def render(self, name, **context):
+        return self.render_batch(name, [context])[0]
+
+    def render_batch(self, name, contexts, **shared):
+        """
+        Render one email for each context in `contexts`, with `shared`
+        variables common to all of them. Returns RenderedEmails in order.
+        """
+        subject = EMAILS[name]
+        text, html = self.templates[name]
+        render_text = text.render if text else None
+        render_html = html.render if html else None
+
+        rendered = []
+        for context in contexts:
+            values = {**shared, **context} if shared else context
+            rendered.append(RenderedEmail(
+                subject,
+                render_text(values) if render_text else None,
+                render_html(values) if render_html else None,
+            ))
+        return rendered
+
+    def message(self, name, recipients, sender=None, **context):
+        """A flask_mail Message for one notification."""
+        email = self.render(name, **context)
+        return Message(subject=email.subject, recipients=recipients, body=email.body, html=email.html, sender=sender)
+
+    def message_batch(self, name, contexts, recipients, sender=None, **shared):
+        """
+        Messages for a batch of one notification: render_batch, with each
+        context's email going to the matching entry of `recipients`. They
+        all share one MimePrototype, so sending them skips rebuilding the
+        MIME tree per message.
+        """
+        rendered = self.render_batch(name, contexts, **shared)
+        if not rendered:
+            return []
+        first = rendered[0]
+        prototype = MimePrototype(first.subject, sender, html=first.html is not None)
+        return [prototype.message(to, email.body, email.html) for to, email in zip(recipients, rendered)]
+
+
+def encode_body(text):
+    """A text part's base64 payload: CRLF line endings inside, as MIME wants, and split into CRLF lines."""
+    canonical = re.sub(r"\r?\n", "\r\n", text or "")
+    return base64.encodebytes(canonical.encode()).replace(b"\n", b"\r\n")
+
+
+class PrototypeMessage(Message):
+    """A Message serialized from its batch's MimePrototype."""
+
+    def __init__(self, prototype, **kwargs):
+        super().__init__(**kwargs)
+        self.prototype = prototype
+
+    def as_bytes(self):
+        return self.prototype.serialize(self)
+
+    def as_string(self):
+        return self.as_bytes().decode("ascii")
+
+
+class MimePrototype:
+    """
+    The MIME for one batch of emails that differ only in recipient and
+    bodies. Flask-Mail builds a Message's MIME tree and runs it through the
+    email package's generator every time it's sent, which costs far more
+    than rendering the templates. Here that's done once, for a prototype
+    with placeholders where the To, Date and Message-ID headers and the
+    bodies go; each message is then the prototype's bytes with its own
+    values spliced in. Bodies are base64 encoded, like Flask-Mail's utf-8
+    parts, so any text fits.
+    """
+
+    def __init__(self, subject, sender=None, html=True):
+        self.subject = subject
+        self.sender = sender or current_app.extensions["mail"].default_sender
+        self.html = html
+
+        token = uuid.uuid4().hex
+        placeholder = {name: f"{name}{token}" for name in ("to", "message_id", "body", "html")}
+
+        mime = Message(
+            subject=subject, sender=self.sender, recipients=["prototype@example.com"],
+            body="", html="" if html else None, date=0
+        )._message()
+        mime.replace_header("To", placeholder["to"])
+        mime.replace_header("Message-ID", placeholder["message_id"])
+        # The Date header only takes a valid date, and nothing else in the headers looks like 1970
+        placeholder["date"] = str(mime["Date"])
+        for part in mime.walk():
+            if not part.is_multipart():
+                part.set_payload(placeholder["html" if part.get_content_subtype() == "html" else "body"])
+                part.replace_header("Content-Transfer-Encoding", "base64")
+        slots = {key: name for name, key in placeholder.items()}
+
+        # Alternating static chunks and slot names, in the order they appear
+        pieces = re.split(f"({'|'.join(map(re.escape, slots))})".encode(), mime.as_bytes())
+        self.chunks = pieces[::2]
+        self.slots = [slots[piece.decode()] for piece in pieces[1::2]]
+
+    def message(self, recipients, body, html=None):
+        return PrototypeMessage(self, subject=self.subject, sender=self.sender, recipients=recipients, body=body, html=html)
+
+    def serialize(self, msg):
+        values = {
+            "to": ", ".join(sanitize_addresses(msg.recipients)).encode(),
+            "date": formatdate(msg.date if msg.date is not None else time.time(), localtime=True).encode(),
+            "message_id": msg.msgId.encode(),
+            "body": encode_body(msg.body),
+        }
+        if self.html:
+            values["html"] = encode_body(msg.html)
+
+        out = [self.chunks[0]]
+        for slot, chunk in zip(self.slots, self.chunks[1:]):
+            out.append(values[slot])
+            out.append(chunk)
+        return b"".join(out)
+
+
+def get_email_templates():
+    return current_app.extensions["email_templates"]
@@ -0,0 +1,94 @@
+import secrets
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import or_
+from .availability import interval_mask, to_minutes
+
+
+def create_hold(service, employee, booking_date, start_time, end_with_buffer, user_id=None, seconds=None):
+    """
+    Hold the employee for [start_time, end_with_buffer) for `seconds`
+    (default BOOKING_HOLD_SECONDS) and return the hold. Expired holds are
+    swept on the way. The caller commits.
+    """
+    from models import BookingHold, db
+
+    now = datetime.utcnow()
+    BookingHold.query.filter(BookingHold.expires_at < now).delete(synchronize_session=False)
+
+    hold = BookingHold(
+        token=secrets.token_urlsafe(24),
+        user_id=user_id,
+        service_id=service.id,
+        employee_id=employee.id,
+        booking_date=booking_date,
+        start_time=start_time,
+        end_time=end_with_buffer,
+        expires_at=now + timedelta(seconds=seconds or current_app.config["BOOKING_HOLD_SECONDS"]),
+    )
+    db.session.add(hold)
+    return hold
+
+
+def release_holds(user_id):
+    """
+    Drop a user's preview holds, e.g. before they preview another slot.
+    Holds backing a waitlist offer stay until the offer is taken or expires.
+    """
+    from models import BookingHold, WaitlistEntry, db
+
+    offers = db.session.query(WaitlistEntry.offer_token).filter(WaitlistEntry.offer_token.isnot(None))
+    BookingHold.query.filter(
+        BookingHold.user_id == user_id,
+        BookingHold.token.not_in(offers)
+    ).delete(synchronize_session=False)
+
+
+def find_hold(token, user_id, service_id, booking_date, start_time):
+    """
+    The active hold for this token if it was made for exactly this booking
+    and this user (or anonymously), otherwise None.
+    """
+    from models import BookingHold
+
+    hold = BookingHold.query.filter(
+        BookingHold.token == token,
+        BookingHold.expires_at >= datetime.utcnow()
+    ).first()
+
+    if (hold is None
+            or hold.user_id not in (None, user_id)
+            or hold.service_id != service_id
+            or hold.booking_date != booking_date
+            or hold.start_time != start_time):
+        return None
+    return hold
+
+
+def load_hold_masks(employee_ids, booking_date, user_id=None, token=None):
+    """
+    Minutes held by other customers' active holds, {employee_id: bitmask},
+    leaving out holds made by user_id or with the given token. Employees
+    without holds are omitted.
+    """
+    from models import BookingHold, db
+
+    if not employee_ids:
+        return {}
+
+    query = db.session.query(
+        BookingHold.employee_id, BookingHold.start_time, BookingHold.end_time
+    ).filter(
+        BookingHold.employee_id.in_(list(employee_ids)),
+        BookingHold.booking_date == booking_date,
+        BookingHold.expires_at >= datetime.utcnow()
+    )
+    if user_id is not None:
+        query = query.filter(or_(BookingHold.user_id.is_(None), BookingHold.user_id != user_id))
+    if token:
+        query = query.filter(BookingHold.token != token)
+
+    held = {}
+    for emp_id, start_time, end_time in query:
+        held[emp_id] = held.get(emp_id, 0) | interval_mask(to_minutes(start_time), to_minutes(end_time))
+    return held
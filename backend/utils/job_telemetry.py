@@ -0,0 +1,269 @@
+import os
+import socket
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED
+from flask import current_app
+
+# The run in progress on this thread, for record_job
+_current = threading.local()
+
+COUNTS = ("rows_scanned", "rows_affected", "emails_sent", "emails_failed")
+
+# Skipped runs in a row that mark a job overrunning; one alone can be a run that just crossed its next start
+OVERRUN_SKIPS = 2
+
+
+class JobRun:
+    """What one execution of a scheduled job did."""
+
+    def __init__(self, job_id, holder, status="ok"):
+        self.job_id = job_id
+        self.holder = holder
+        self.status = status  # ok, failed, skipped, missed
+        self.scheduled_at = None
+        self.started_at = datetime.utcnow()
+        self.duration_ms = None
+        self.lag_ms = None
+        self.rows_scanned = 0
+        self.rows_affected = 0
+        self.emails_sent = 0
+        self.emails_failed = 0
+        self.error = None
+
+    def scheduled(self, run_time):
+        """Note when APScheduler meant to start this run (an aware datetime)."""
+        self.scheduled_at = run_time.astimezone(timezone.utc).replace(tzinfo=None)
+        self.lag_ms = round((self.started_at - self.scheduled_at).total_seconds() * 1000, 2)
+
+
+def run_dict(run):
+    """A JobRun or SchedulerJobRun row as JSON; they share their field names."""
+    return {
+        "job_id": run.job_id,
+        "holder": run.holder,
+        "status": run.status,
+        "scheduled_at": run.scheduled_at.isoformat() if run.scheduled_at else None,
+        "started_at": run.started_at.isoformat(),
+        "duration_ms": run.duration_ms,
+        "lag_ms": run.lag_ms,
+        **{name: getattr(run, name) for name in COUNTS},
+        "error": run.error,
+    }
+
+
+def record_job(error=None, **counts):
+    """
+    Report what the running job did: rows_scanned, rows_affected,
+    emails_sent, emails_failed (added to what's been reported so far), or an
+    error, which marks the run failed. Does nothing outside a scheduled run,
+    e.g. when a job function is called directly.
+    """
+    run = getattr(_current, "run", None)
+    if run is None:
+        return
+    for name, value in counts.items():
+        if name not in COUNTS:
+            raise ValueError(f"Unknown job count: {name}")
+        setattr(run, name, getattr(run, name) + value)
+    if error:
+        run.status = "failed"
+        run.error = f"{type(error).__name__}: {error}" if isinstance(error, Exception) else str(error)
+
+
+def trailing_streak(statuses, status):
+    """How many of the most recent `statuses` (oldest first) are `status`."""
+    streak = 0
+    for s in reversed(statuses):
+        if s != status:
+            break
+        streak += 1
+    return streak
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))], 2)
+
+
+class JobTelemetry:
+    """
+    Records every scheduled job run: when it was due, when it actually
+    started (the lag), how long it took, and the counts the job reports
+    through record_job. The last SCHEDULER_JOB_HISTORY runs are kept in
+    memory; every run is also written to scheduler_job_runs, so any process
+    can answer /api/scheduler/stats and not just the one holding the
+    scheduler lease. Runs older than SCHEDULER_JOB_RUN_RETENTION_DAYS are
+    pruned as new ones come in.
+
+    Jobs are wrapped with run(), and attach() must be called on the
+    scheduler: the scheduled time only arrives with APScheduler's executed
+    event. Runs APScheduler skips because the previous one is still going,
+    or misses altogether, are recorded too, since they're what a job
+    overrunning its interval looks like.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.runs = deque()
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("SCHEDULER_JOB_HISTORY", 200)
+        app.config.setdefault("SCHEDULER_JOB_RUN_RETENTION_DAYS", 7)
+        self.app = app
+        self.runs = deque(maxlen=app.config["SCHEDULER_JOB_HISTORY"])
+        app.extensions["job_telemetry"] = self
+
+    @property
+    def holder(self):
+        leader = self.app.extensions.get("scheduler_leader")
+        return leader.holder if leader else f"{socket.gethostname()}:{os.getpid()}"
+
+    def is_leader(self):
+        leader = self.app.extensions.get("scheduler_leader")
+        return leader.is_leader() if leader else True
+
+    def attach(self, scheduler):
+        scheduler.add_listener(self._on_event, EVENT_JOB_EXECUTED | EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
+
+    def run(self, job_id, fn, *args, **kwargs):
+        """Run a job and return its JobRun; the executed event adds the lag and saves it."""
+        run = JobRun(job_id, self.holder)
+        started = time.perf_counter()
+        _current.run = run
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            self.app.logger.exception("Scheduled job %s failed", job_id)
+            record_job(error=e)
+        finally:
+            _current.run = None
+            run.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        return run
+
+    def _on_event(self, event):
+        if event.code == EVENT_JOB_EXECUTED:
+            # Followers' wrapped jobs return None without running
+            if isinstance(event.retval, JobRun):
+                event.retval.scheduled(event.scheduled_run_time)
+                self.save(event.retval)
+            return
+
+        if not self.is_leader():
+            return
+        if event.code == EVENT_JOB_MAX_INSTANCES:
+            run = JobRun(event.job_id, self.holder, status="skipped")
+            run.scheduled(event.scheduled_run_times[-1])
+            run.error = "Previous run still in progress"
+        else:
+            run = JobRun(event.job_id, self.holder, status="missed")
+            run.scheduled(event.scheduled_run_time)
+            run.error = "Missed its misfire grace time"
+        self.save(run)
+
+    def save(self, run):
+        from models import SchedulerJobRun, db
+
+        with self.lock:
+            self.runs.append(run)
+
+        with self.app.app_context():
+            try:
+                db.session.add(SchedulerJobRun(**{
+                    name: getattr(run, name) for name in (
+                        "job_id", "holder", "status", "scheduled_at", "started_at", "duration_ms", "lag_ms",
+                        *COUNTS, "error"
+                    )
+                }))
+                cutoff = datetime.utcnow() - timedelta(days=self.app.config["SCHEDULER_JOB_RUN_RETENTION_DAYS"])
+                SchedulerJobRun.query.filter(
+                    SchedulerJobRun.job_id == run.job_id,
+                    SchedulerJobRun.started_at < cutoff
+                ).delete(synchronize_session=False)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.warning("Could not record run of %s: %s", run.job_id, e)
+
+    def recent(self, limit=50):
+        """
+        The latest runs, newest first: from memory in the process that ran
+        them, otherwise from scheduler_job_runs.
+        """
+        from models import SchedulerJobRun
+
+        with self.lock:
+            runs = list(self.runs)
+        if runs and self.is_leader():
+            # Runs are saved as they finish, so a long one can land after later skipped ones
+            runs.sort(key=lambda run: run.started_at, reverse=True)
+            return [run_dict(run) for run in runs[:limit]]
+
+        rows = SchedulerJobRun.query.order_by(SchedulerJobRun.started_at.desc()).limit(limit).all()
+        return [run_dict(row) for row in rows]
+
+    def summary(self, since, intervals=None):
+        """
+        Per-job figures for runs started after `since`. With `intervals`
+        ({job_id: seconds}), also how much of its interval the job uses and
+        whether it's overrunning: a run that took the whole interval, or
+        its latest OVERRUN_SKIPS or more runs all skipped because the previous
+        one was still going. Skips the job has since recovered from don't
+        count.
+        """
+        from models import SchedulerJobRun
+
+        intervals = intervals or {}
+        rows = SchedulerJobRun.query.filter(
+            SchedulerJobRun.started_at >= since
+        ).order_by(SchedulerJobRun.started_at).all()
+
+        by_job = {job_id: [] for job_id in intervals}
+        for row in rows:
+            by_job.setdefault(row.job_id, []).append(row)
+
+        jobs = {}
+        for job_id, runs in by_job.items():
+            executed = [r for r in runs if r.status in ("ok", "failed")]
+            durations = [r.duration_ms for r in executed]
+            lags = [r.lag_ms for r in runs if r.lag_ms is not None]
+            statuses = [r.status for r in runs]
+            job = {
+                "runs": len(executed),
+                "failed": statuses.count("failed"),
+                "skipped": statuses.count("skipped"),
+                "missed": statuses.count("missed"),
+                "duration_ms": {
+                    "avg": round(sum(durations) / len(durations), 2) if durations else None,
+                    "p95": percentile(durations, 95),
+                    "max": max(durations) if durations else None,
+                },
+                "lag_ms": {
+                    "avg": round(sum(lags) / len(lags), 2) if lags else None,
+                    "p95": percentile(lags, 95),
+                    "max": max(lags) if lags else None,
+                },
+                **{name: sum(getattr(r, name) for r in executed) for name in COUNTS},
+                "last_run": run_dict(runs[-1]) if runs else None,
+            }
+
+            interval = intervals.get(job_id)
+            if interval:
+                worst = max(durations) if durations else 0
+                job["interval_seconds"] = interval
+                job["max_duration_pct_of_interval"] = round(worst / (interval * 1000) * 100, 1)
+                job["consecutive_skips"] = trailing_streak(statuses, "skipped")
+                job["overrunning"] = job["consecutive_skips"] >= OVERRUN_SKIPS or worst >= interval * 1000
+            jobs[job_id] = job
+        return jobs
+
+
+def get_job_telemetry():
+    return current_app.extensions["job_telemetry"]
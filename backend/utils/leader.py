@@ -0,0 +1,177 @@
+import atexit
+import os
+import secrets
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import case, or_
+from sqlalchemy.exc import IntegrityError
+
+
+class SchedulerLeader:
+    """
+    Picks one process to run the scheduled jobs, using a lease row in
+    scheduler_leases instead of Redis or a file lock, so it works across
+    hosts that share the database.
+
+    Every process runs the scheduler, but jobs are wrapped with
+    run_if_leader and only execute in the process holding the lease. A
+    thread renews it every SCHEDULER_LEASE_RENEW_SECONDS, pushing
+    expires_at SCHEDULER_LEASE_SECONDS ahead. If the leader dies, another
+    process takes the lease at its next renewal after it expires, so
+    failover takes at most lease + renew seconds. A clean shutdown releases
+    the lease straight away.
+
+    A process only treats itself as leader until the expiry of its last
+    successful renewal, so a leader that can't reach the database steps
+    down before anyone else can take over. Expiry uses each process's own
+    clock, so keep the lease much longer than any clock skew between hosts.
+    """
+
+    def __init__(self, app=None, name="scheduler"):
+        self.name = name
+        self.app = None
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+        self.expires_at = None
+        self.thread = None
+        self._stopping = threading.Event()
+        self.stats = {
+            "renewals": 0,
+            "renewal_failures": 0,
+            "acquisitions": 0,
+            "last_renewal_ms": None,
+            "max_renewal_ms": 0.0,
+            "total_renewal_ms": 0.0,
+            "leader_since": None,
+            "last_error": None,
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("SCHEDULER_LEASE_SECONDS", 60)
+        app.config.setdefault("SCHEDULER_LEASE_RENEW_SECONDS", 15)
+        self.app = app
+        app.extensions["scheduler_leader"] = self
+
+    def start(self):
+        """Take or renew the lease now, then keep renewing it in the background."""
+        if self.thread:
+            return
+        # A fork inherits the parent's holder id; a new process needs its own
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+        self.renew()
+        self.thread = threading.Thread(target=self._run, name=f"{self.name}-lease", daemon=True)
+        self.thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop renewing and give the lease up, so another process takes over at once."""
+        self._stopping.set()
+        if self.thread:
+            self.thread.join(timeout=10)
+            self.thread = None
+        if self.is_leader():
+            self.release()
+
+    def is_leader(self):
+        return self.expires_at is not None and datetime.utcnow() < self.expires_at
+
+    def renew(self):
+        """Take the lease if it's free or expired, or extend it if it's ours. Returns is_leader()."""
+        from models import SchedulerLease, db
+
+        started = time.perf_counter()
+        was_leader = self.is_leader()
+        with self.app.app_context():
+            now = datetime.utcnow()
+            expires_at = now + timedelta(seconds=self.app.config["SCHEDULER_LEASE_SECONDS"])
+            try:
+                taken = SchedulerLease.query.filter(
+                    SchedulerLease.name == self.name,
+                    or_(SchedulerLease.holder == self.holder, SchedulerLease.expires_at < now)
+                ).update({
+                    "acquired_at": case((SchedulerLease.holder == self.holder, SchedulerLease.acquired_at), else_=now),
+                    "holder": self.holder,
+                    "renewed_at": now,
+                    "expires_at": expires_at
+                }, synchronize_session=False)
+                if not taken:
+                    db.session.add(SchedulerLease(
+                        name=self.name, holder=self.holder, acquired_at=now, renewed_at=now, expires_at=expires_at
+                    ))
+                db.session.commit()
+            except IntegrityError:
+                # Someone else holds it
+                db.session.rollback()
+                self.expires_at = None
+            except Exception as e:
+                # Keep the last lease until it runs out; the next renewal may succeed
+                db.session.rollback()
+                self.stats["renewal_failures"] += 1
+                self.stats["last_error"] = f"{type(e).__name__}: {e}"
+                current_app.logger.warning("Scheduler lease renewal failed: %s", e)
+            else:
+                self.expires_at = expires_at
+
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stats["renewals"] += 1
+        self.stats["last_renewal_ms"] = round(elapsed, 2)
+        self.stats["max_renewal_ms"] = round(max(self.stats["max_renewal_ms"], elapsed), 2)
+        self.stats["total_renewal_ms"] += elapsed
+
+        leader = self.is_leader()
+        if leader and not was_leader:
+            self.stats["acquisitions"] += 1
+            self.stats["leader_since"] = datetime.utcnow().isoformat()
+        elif not leader:
+            self.stats["leader_since"] = None
+        return leader
+
+    def release(self):
+        from models import SchedulerLease, db
+
+        with self.app.app_context():
+            SchedulerLease.query.filter_by(name=self.name, holder=self.holder).update(
+                {"expires_at": datetime.utcnow()}, synchronize_session=False
+            )
+            db.session.commit()
+        self.expires_at = None
+        self.stats["leader_since"] = None
+
+    def run_if_leader(self, fn, *args, **kwargs):
+        """Run a scheduled job here only if this process holds the lease."""
+        if not self.is_leader():
+            return None
+        return fn(*args, **kwargs)
+
+    def status(self):
+        """This process's view of the lease, plus renewal timings."""
+        from models import SchedulerLease
+
+        stats = dict(self.stats)
+        total = stats.pop("total_renewal_ms")
+        stats["avg_renewal_ms"] = round(total / stats["renewals"], 2) if stats["renewals"] else None
+
+        lease = SchedulerLease.query.get(self.name)
+        return {
+            "holder": self.holder,
+            "is_leader": self.is_leader(),
+            "lease": {
+                "holder": lease.holder,
+                "acquired_at": lease.acquired_at.isoformat(),
+                "renewed_at": lease.renewed_at.isoformat(),
+                "expires_at": lease.expires_at.isoformat()
+            } if lease else None,
+            **stats
+        }
+
+    def _run(self):
+        while not self._stopping.wait(self.app.config["SCHEDULER_LEASE_RENEW_SECONDS"]):
+            self.renew()
+
+
+def get_scheduler_leader():
+    return current_app.extensions["scheduler_leader"]
@@ -0,0 +1,211 @@
+import mmap
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date
+from flask import current_app
+from .constants import SALON_CLOSE
+from .availability import BLOCKING_STATUSES, to_minutes, interval_mask
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows development machines
+    fcntl = None
+
+
+# One bit per minute between SALON_OPEN and SALON_CLOSE
+GRID_MINUTES = to_minutes(SALON_CLOSE)
+ROW_BYTES = (GRID_MINUTES + 7) // 8
+
+# Row 0 is never a valid employee id, so it doubles as the file header
+BUILT_FLAG = 0
+
+
+class OccupancyGrid:
+    """
+    Minute-resolution occupancy bitmap per (employee, date), shared by every
+    worker process on the box through a memory-mapped file per date.
+
+    Row `employee_id` of a date file holds that employee's occupied minutes
+    as a little-endian bitmap, matching utils.availability.interval_mask.
+    Readers test bits straight from the mapping; writers rebuild rows from
+    the database while holding an exclusive flock on the file. Files only
+    ever grow while mapped, so a lock-free reader never faults past EOF.
+    """
+
+    def __init__(self, app=None):
+        self.directory = None
+        self._maps = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("OCCUPANCY_GRID_ENABLED", fcntl is not None)
+        app.config.setdefault("OCCUPANCY_GRID_DIR", os.path.join(app.instance_path, "occupancy"))
+        self.directory = app.config["OCCUPANCY_GRID_DIR"]
+        app.extensions["occupancy_grid"] = self
+
+    def _path(self, booking_date):
+        return os.path.join(self.directory, f"{booking_date.isoformat()}.grid")
+
+    @contextmanager
+    def _locked(self, booking_date):
+        """Exclusive lock on a date file, held across processes and threads."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd = os.open(self._path(booking_date), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield fd
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _mapping(self, booking_date):
+        """Return this process's mapping of a date file, remapping if it grew."""
+        path = self._path(booking_date)
+        with self._lock:
+            cached = self._maps.get(booking_date)
+            try:
+                stat = os.stat(path)
+                size, inode = stat.st_size, stat.st_ino
+            except FileNotFoundError:
+                size, inode = 0, None
+
+            # len() is the length mapped; mmap.size() is the file's current size
+            if cached is not None and len(cached[0]) == size and cached[1] == inode:
+                return cached[0]
+
+            # Stale mappings are dropped rather than closed: another thread
+            # may still be reading from them, and they close once released.
+            self._maps.pop(booking_date, None)
+            if size == 0:
+                return None
+
+            with open(path, "rb") as fh:
+                mapping = mmap.mmap(fh.fileno(), size, access=mmap.ACCESS_READ)
+            self._maps[booking_date] = (mapping, inode)
+            return mapping
+
+    def _write_rows(self, fd, rows, min_rows):
+        """Write {employee_id: mask} rows into the locked file, growing it if needed."""
+        size = os.fstat(fd).st_size
+        needed = max(min_rows, max(rows, default=0) + 1) * ROW_BYTES
+        if size < needed:
+            os.ftruncate(fd, needed)
+            size = needed
+
+        mapping = mmap.mmap(fd, size)
+        try:
+            for emp_id, mask in rows.items():
+                offset = emp_id * ROW_BYTES
+                mapping[offset:offset + ROW_BYTES] = mask.to_bytes(ROW_BYTES, "little")
+            mapping[BUILT_FLAG] = 1
+        finally:
+            mapping.close()
+
+    def _load_rows(self, booking_date, employee_ids=None):
+        """Read occupied minutes from the database; None means every employee."""
+        from models import Booking, db
+
+        query = db.session.query(
+            Booking.employee_id, Booking.start_time, Booking.end_time
+        ).filter(
+            Booking.booking_date == booking_date,
+            Booking.status.in_(BLOCKING_STATUSES)
+        )
+        if employee_ids is not None:
+            query = query.filter(Booking.employee_id.in_(list(employee_ids)))
+
+        rows = {emp_id: 0 for emp_id in employee_ids or ()}
+        for emp_id, start_time, end_time in query:
+            rows[emp_id] = rows.get(emp_id, 0) | interval_mask(
+                to_minutes(start_time), min(to_minutes(end_time), GRID_MINUTES)
+            )
+        return rows
+
+    def _max_employee_id(self):
+        from models import Employee, db
+        return db.session.query(db.func.max(Employee.id)).scalar() or 0
+
+    def _rebuild_locked(self, fd, booking_date):
+        max_id = self._max_employee_id()
+        rows = dict.fromkeys(range(1, max_id + 1), 0)
+        rows.update(self._load_rows(booking_date))
+        self._write_rows(fd, rows, max_id + 1)
+
+    def rebuild(self, booking_date):
+        """Recompute every row of a date from the database."""
+        with self._locked(booking_date) as fd:
+            self._rebuild_locked(fd, booking_date)
+
+    def refresh(self, booking_date, employee_ids):
+        """Recompute the rows of the given employees after a booking write."""
+        with self._locked(booking_date) as fd:
+            if os.fstat(fd).st_size == 0:
+                self._rebuild_locked(fd, booking_date)
+            else:
+                self._write_rows(fd, self._load_rows(booking_date, employee_ids), 0)
+
+    def read_masks(self, booking_date, employee_ids):
+        """Return {employee_id: bitmask} without touching the database."""
+        employee_ids = list(employee_ids)
+        mapping = self._mapping(booking_date)
+        max_id = max(employee_ids, default=0)
+
+        if mapping is None or not mapping[BUILT_FLAG] or len(mapping) < (max_id + 1) * ROW_BYTES:
+            self.rebuild(booking_date)
+            mapping = self._mapping(booking_date)
+
+        masks = {}
+        for emp_id in employee_ids:
+            offset = emp_id * ROW_BYTES
+            masks[emp_id] = int.from_bytes(mapping[offset:offset + ROW_BYTES], "little")
+        return masks
+
+    def discard(self, booking_date):
+        """Drop a date file so the next read rebuilds it from the database."""
+        with self._lock:
+            self._maps.pop(booking_date, None)
+        try:
+            os.remove(self._path(booking_date))
+        except FileNotFoundError:
+            pass
+
+    def prune(self, before_date):
+        """Remove the files of dates that can no longer be booked."""
+        if not os.path.isdir(self.directory):
+            return 0
+
+        removed = 0
+        for name in os.listdir(self.directory):
+            stem, ext = os.path.splitext(name)
+            if ext == ".grid" and stem < before_date.isoformat():
+                self.discard(date.fromisoformat(stem))
+                removed += 1
+        return removed
+
+
+def get_occupancy_grid():
+    """The app's grid, or None when it is disabled or unsupported."""
+    grid = current_app.extensions.get("occupancy_grid")
+    if grid is None or fcntl is None or not current_app.config.get("OCCUPANCY_GRID_ENABLED"):
+        return None
+    return grid
+
+
+def refresh_occupancy(booking_date, *employee_ids):
+    """
+    Bring the grid up to date after a booking for `employee_ids` on
+    `booking_date` was committed. Never fails the request: if the file
+    can't be updated it is discarded and rebuilt on the next read.
+    """
+    grid = get_occupancy_grid()
+    if grid is None:
+        return
+
+    try:
+        grid.refresh(booking_date, set(employee_ids))
+    except Exception as e:
+        print(f"Failed to update occupancy grid for {booking_date}: {str(e)}")
+        grid.discard(booking_date)
@@ -0,0 +1,228 @@
+import atexit
+import json
+import random
+import secrets
+import threading
+from datetime import datetime, timedelta
+from email.utils import formataddr
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import and_, event, or_
+from sqlalchemy.orm import Session
+
+
+def enqueue_email(msg):
+    """
+    Queue a flask_mail Message for delivery instead of sending it. The row
+    joins the current transaction, so call this before the commit that
+    makes the change the email is about; if that rolls back, nothing is
+    sent. Supports one attachment and no cc/bcc, which is all the views use.
+    """
+    from models import EmailOutbox, db
+
+    if msg.cc or msg.bcc or len(msg.attachments) > 1:
+        raise ValueError("The email outbox supports one attachment and no cc/bcc")
+
+    attachment = msg.attachments[0] if msg.attachments else None
+    sender = formataddr(msg.sender) if isinstance(msg.sender, tuple) else msg.sender
+
+    row = EmailOutbox(
+        subject=msg.subject,
+        sender=sender,
+        recipients=json.dumps(list(msg.recipients)),
+        body=msg.body,
+        html=msg.html,
+        attachment_name=attachment.filename if attachment else None,
+        attachment_type=attachment.content_type if attachment else None,
+        attachment_data=attachment.data if attachment else None,
+    )
+    db.session.add(row)
+    return row
+
+
+def to_message(row):
+    msg = Message(
+        subject=row.subject,
+        recipients=json.loads(row.recipients),
+        body=row.body,
+        html=row.html,
+        sender=row.sender
+    )
+    if row.attachment_data is not None:
+        msg.attach(filename=row.attachment_name, content_type=row.attachment_type, data=row.attachment_data)
+    return msg
+
+
+class EmailOutboxWorkers:
+    """
+    Threads that deliver queued email_outbox rows over SMTP.
+
+    Each pass claims up to EMAIL_OUTBOX_BATCH_SIZE due rows, marking them
+    `sending` for EMAIL_OUTBOX_LEASE_SECONDS so other workers (or other
+    processes) skip them, and sends the batch over one SMTP connection. A
+    failed row goes back to `pending` with exponential backoff from
+    EMAIL_OUTBOX_BACKOFF_SECONDS, capped at EMAIL_OUTBOX_MAX_BACKOFF_SECONDS,
+    until EMAIL_OUTBOX_MAX_ATTEMPTS marks it `failed`. Rows whose lease ran
+    out, because a worker died mid-send, are claimed again.
+
+    Idle workers poll every EMAIL_OUTBOX_POLL_SECONDS, and are woken as soon
+    as a transaction that queued email commits. Nothing runs until start()
+    is called, which app.start_background_workers does in each server
+    process; drain() delivers everything due inline, for tests and scripts.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.threads = []
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("EMAIL_OUTBOX_WORKERS", 2)
+        app.config.setdefault("EMAIL_OUTBOX_BATCH_SIZE", 20)
+        app.config.setdefault("EMAIL_OUTBOX_POLL_SECONDS", 5)
+        app.config.setdefault("EMAIL_OUTBOX_LEASE_SECONDS", 300)
+        app.config.setdefault("EMAIL_OUTBOX_MAX_ATTEMPTS", 8)
+        app.config.setdefault("EMAIL_OUTBOX_BACKOFF_SECONDS", 30)
+        app.config.setdefault("EMAIL_OUTBOX_MAX_BACKOFF_SECONDS", 3600)
+
+        self.app = app
+        event.listen(Session, "after_flush", self._after_flush)
+        event.listen(Session, "after_commit", self._after_commit)
+        event.listen(Session, "after_rollback", self._after_rollback)
+        app.extensions["email_outbox"] = self
+
+    def start(self):
+        if self.threads:
+            return
+        self._stopping.clear()
+        for n in range(self.app.config["EMAIL_OUTBOX_WORKERS"]):
+            thread = threading.Thread(target=self._run, args=(f"outbox-{n}",), name=f"outbox-{n}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+        for thread in self.threads:
+            thread.join(timeout=10)
+        self.threads = []
+
+    def wake(self):
+        self._wake.set()
+
+    def drain(self):
+        """Deliver every row that is due, in the caller's app context. Returns the number handled."""
+        handled = 0
+        while True:
+            count = self.process_batch("inline")
+            if not count:
+                return handled
+            handled += count
+
+    def process_batch(self, worker_id):
+        """Claim and send one batch of due rows. Returns how many were claimed."""
+        from models import EmailOutbox, db
+
+        config = current_app.config
+        now = datetime.utcnow()
+        claim = f"{worker_id}:{secrets.token_hex(4)}"
+        due = or_(
+            and_(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now),
+            and_(EmailOutbox.status == "sending", EmailOutbox.claimed_until < now),
+        )
+
+        ids = [
+            row_id for (row_id,) in db.session.query(EmailOutbox.id)
+            .filter(due)
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+            .limit(config["EMAIL_OUTBOX_BATCH_SIZE"])
+        ]
+        if not ids:
+            db.session.rollback()
+            return 0
+
+        # Only rows still due when the UPDATE runs are ours
+        EmailOutbox.query.filter(EmailOutbox.id.in_(ids), due).update({
+            "status": "sending",
+            "claimed_by": claim,
+            "claimed_until": now + timedelta(seconds=config["EMAIL_OUTBOX_LEASE_SECONDS"]),
+            "attempts": EmailOutbox.attempts + 1
+        }, synchronize_session=False)
+        db.session.commit()
+
+        rows = EmailOutbox.query.filter_by(claimed_by=claim, status="sending").order_by(EmailOutbox.id).all()
+        if not rows:
+            return len(ids)
+
+        try:
+            with current_app.extensions["mail"].connect() as conn:
+                for row in rows:
+                    try:
+                        conn.send(to_message(row))
+                    except Exception as e:
+                        self._retry_later(row, e)
+                    else:
+                        row.status = "sent"
+                        row.sent_at = datetime.utcnow()
+                        row.claimed_by = row.claimed_until = None
+                        row.last_error = None
+        except Exception as e:
+            # Couldn't connect, or the connection dropped: retry what's left
+            for row in rows:
+                if row.status == "sending":
+                    self._retry_later(row, e)
+
+        db.session.commit()
+        return len(ids)
+
+    def _retry_later(self, row, error):
+        config = current_app.config
+        row.last_error = f"{type(error).__name__}: {error}"
+        row.claimed_by = row.claimed_until = None
+
+        if row.attempts >= config["EMAIL_OUTBOX_MAX_ATTEMPTS"]:
+            row.status = "failed"
+            current_app.logger.error("Giving up on email %s after %s attempts: %s", row.id, row.attempts, row.last_error)
+            return
+
+        delay = min(
+            config["EMAIL_OUTBOX_BACKOFF_SECONDS"] * 2 ** (row.attempts - 1),
+            config["EMAIL_OUTBOX_MAX_BACKOFF_SECONDS"]
+        )
+        # A little jitter so a batch that failed together doesn't retry together
+        row.status = "pending"
+        row.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay * random.uniform(1, 1.1))
+
+    def _run(self, worker_id):
+        while not self._stopping.is_set():
+            try:
+                with self.app.app_context():
+                    handled = self.process_batch(worker_id)
+            except Exception:
+                self.app.logger.exception("Email outbox worker %s failed", worker_id)
+                handled = 0
+            if not handled:
+                self._wake.wait(self.app.config["EMAIL_OUTBOX_POLL_SECONDS"])
+                self._wake.clear()
+
+    # Wake the workers when a transaction that queued email commits
+    def _after_flush(self, session, flush_context):
+        from models import EmailOutbox
+
+        if any(isinstance(obj, EmailOutbox) for obj in session.new):
+            session.info["email_outbox_pending"] = True
+
+    def _after_commit(self, session):
+        if session.info.pop("email_outbox_pending", False):
+            self.wake()
+
+    def _after_rollback(self, session):
+        session.info.pop("email_outbox_pending", None)
+
+
+def get_email_outbox():
+    return current_app.extensions["email_outbox"]
@@ -0,0 +1,81 @@
+import base64
+import json
+from datetime import date, time
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE):
+    """Page size from a query string value, clamped to 1..MAX_PAGE_SIZE."""
+    try:
+        limit = int(value) if value is not None else default
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def encode_cursor(values):
+    """Opaque cursor for the sort key of the last row on a page."""
+    raw = json.dumps([v.isoformat() if isinstance(v, (date, time)) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, types):
+    """
+    Inverse of encode_cursor. `types` gives the type of each key (date, time
+    or int). Raises ValueError on anything malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if len(values) != len(types):
+            raise ValueError
+        return [
+            kind.fromisoformat(v) if kind in (date, time) else kind(v)
+            for kind, v in zip(types, values)
+        ]
+    except (TypeError, ValueError, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+def keyset_after(columns, values, descending=True):
+    """
+    Predicate selecting rows that sort after (columns) == (values) in a
+    query ordered by `columns`: all descending, all ascending, or with
+    `descending` a sequence giving each column's direction.
+    """
+    if isinstance(descending, bool):
+        descending = [descending] * len(columns)
+    column, value = columns[0], values[0]
+    beyond = column < value if descending[0] else column > value
+    if len(columns) == 1:
+        return beyond
+    return or_(beyond, and_(column == value, keyset_after(columns[1:], values[1:], descending[1:])))
+
+
+def keyset_batches(query, sort_key, descending=False, batch_size=DEFAULT_PAGE_SIZE):
+    """
+    Yield a query's rows in lists of up to batch_size, ordered by
+    `sort_key` (which must end in a unique column), each batch read by its
+    own short, fully fetched query after the previous batch's last row. No
+    cursor stays open between batches, so a slow reader never holds the
+    database's read lock. Rows must be ORM entities with the sort columns
+    as attributes.
+    """
+    if isinstance(descending, bool):
+        descending = [descending] * len(sort_key)
+    ordered = query.order_by(None).order_by(
+        *(column.desc() if desc else column.asc() for column, desc in zip(sort_key, descending))
+    )
+
+    after = None
+    while True:
+        page = ordered.filter(keyset_after(sort_key, after, descending)) if after else ordered
+        rows = page.limit(batch_size).all()
+        if rows:
+            yield rows
+        if len(rows) < batch_size:
+            return
+        after = [getattr(rows[-1], column.key) for column in sort_key]
@@ -0,0 +1,79 @@
+import os
+import threading
+from flask import current_app
+
+
+class SkillIndex:
+    """
+    Process-level index of service_id -> frozenset of employee ids, and
+    the reverse, built from the employee_skills table in one query.
+
+    The index is versioned by the size of a stamp file in the instance
+    folder. Any worker that changes skills calls invalidate(), which appends
+    a byte to the stamp, and every worker rebuilds on its next lookup.
+    """
+
+    def __init__(self, app=None):
+        self.stamp_path = None
+        self._index = None
+        self._version = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("SKILL_INDEX_STAMP", os.path.join(app.instance_path, "skill_index.version"))
+        self.stamp_path = app.config["SKILL_INDEX_STAMP"]
+        app.extensions["skill_index"] = self
+
+    def _current_version(self):
+        try:
+            return os.stat(self.stamp_path).st_size
+        except FileNotFoundError:
+            return 0
+
+    def _build(self):
+        # Import here to avoid circular imports
+        from models import db, employee_skills
+
+        by_service, by_employee = {}, {}
+        rows = db.session.query(employee_skills.c.service_id, employee_skills.c.employee_id)
+        for service_id, employee_id in rows:
+            by_service.setdefault(service_id, set()).add(employee_id)
+            by_employee.setdefault(employee_id, set()).add(service_id)
+        return (
+            {service_id: frozenset(ids) for service_id, ids in by_service.items()},
+            {employee_id: frozenset(ids) for employee_id, ids in by_employee.items()},
+        )
+
+    def _get_index(self):
+        version = self._current_version()
+        if self._index is None or version != self._version:
+            with self._lock:
+                if self._index is None or version != self._version:
+                    self._index = self._build()
+                    self._version = version
+        return self._index
+
+    def employees_for(self, service_id):
+        """Ids of every employee with the service as a skill."""
+        return self._get_index()[0].get(int(service_id), frozenset())
+
+    def services_for(self, employee_id):
+        """Ids of every service the employee has as a skill."""
+        return self._get_index()[1].get(int(employee_id), frozenset())
+
+    def has_skill(self, employee_id, service_id):
+        return employee_id in self.employees_for(service_id)
+
+    def invalidate(self):
+        """Force every worker to rebuild the index; call after committing skill changes."""
+        os.makedirs(os.path.dirname(self.stamp_path), exist_ok=True)
+        with open(self.stamp_path, "ab") as stamp:
+            stamp.write(b"\n")
+        with self._lock:
+            self._index = None
+
+
+def get_skill_index():
+    return current_app.extensions["skill_index"]
@@ -0,0 +1,106 @@
+import os
+import threading
+import uuid
+from flask import current_app
+from flask_caching import Cache
+
+
+class SlotCache:
+    """
+    Cache of computed /available-slots payloads keyed by (service_id, date).
+
+    Entries expire after SLOT_CACHE_TIMEOUT seconds and the backend holds at
+    most SLOT_CACHE_THRESHOLD of them. Invalidation is by generation number:
+    every date has its own generation, plus one global generation for
+    employee schedule changes, and both are part of each entry's key. Bumping
+    a generation to a fresh token orphans the old entries, which then age
+    out; fresh tokens keep two concurrent bumps from landing on one value.
+
+    The default FileSystemCache, under instance/slot_cache, shares entries
+    and invalidations between the workers on one box. SimpleCache is
+    faster but per process: one worker's invalidations never reach the
+    others, so only use it with a single worker (gunicorn.conf.py refuses
+    it with more).
+    """
+
+    def __init__(self, app=None):
+        self.cache = Cache()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("SLOT_CACHE_TYPE", "FileSystemCache")
+        app.config.setdefault("SLOT_CACHE_TIMEOUT", 300)
+        app.config.setdefault("SLOT_CACHE_THRESHOLD", 2048)
+        app.config.setdefault("SLOT_CACHE_DIR", os.path.join(app.instance_path, "slot_cache"))
+
+        self.cache.init_app(app, config={
+            "CACHE_TYPE": app.config["SLOT_CACHE_TYPE"],
+            "CACHE_DEFAULT_TIMEOUT": app.config["SLOT_CACHE_TIMEOUT"],
+            "CACHE_THRESHOLD": app.config["SLOT_CACHE_THRESHOLD"],
+            "CACHE_DIR": app.config["SLOT_CACHE_DIR"],
+            "CACHE_KEY_PREFIX": "slots:",
+        })
+        app.extensions["slot_cache"] = self
+
+    def _generation(self, key):
+        generation = self.cache.get(key)
+        if generation is None:
+            # Missing (never bumped, or pruned by the backend): start a fresh
+            # one so entries cached under an older generation are never reused
+            self.cache.add(key, uuid.uuid4().hex, timeout=0)
+            generation = self.cache.get(key)
+        return generation
+
+    def key_for(self, service_id, booking_date):
+        """
+        Cache key for a lookup. Resolve it once, before computing, and store
+        under the same key so a concurrent invalidation orphans the result.
+        """
+        day = booking_date.isoformat()
+        return f"{day}:{self._generation('gen:all')}:{self._generation(f'gen:{day}')}:{service_id}"
+
+    def get(self, key):
+        payload = self.cache.get(key)
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return payload
+
+    def set(self, key, payload):
+        self.cache.set(key, payload)
+
+    def _bump(self, key):
+        # Generations must outlive the entries they guard
+        self.cache.set(key, uuid.uuid4().hex, timeout=0)
+        with self._lock:
+            self.invalidations += 1
+
+    def invalidate_date(self, booking_date):
+        """Drop every service's slots for one date."""
+        self._bump(f"gen:{booking_date.isoformat()}")
+
+    def invalidate_all(self):
+        """Drop everything, e.g. after an employee's schedule or skills change."""
+        self._bump("gen:all")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": current_app.config["SLOT_CACHE_TYPE"],
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "invalidations": self.invalidations,
+            }
+
+
+def get_slot_cache():
+    return current_app.extensions["slot_cache"]
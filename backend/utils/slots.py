@@ -1,37 +1,78 @@
-from datetime import datetime, date, timedelta
+from array import array
+from collections import namedtuple
+from datetime import time
+from functools import lru_cache
 from .constants import SALON_CLOSE, SALON_OPEN, TIME_BLOCKS, BUFFER_MINUTES
 
+# A day's bookable slots for one (duration, buffer) pair, as parallel sequences.
+# starts/ends are minute offsets from SALON_OPEN; block is duration + buffer and
+# masks cover start..start+block.
+SlotGrid = namedtuple("SlotGrid", "block starts ends masks periods times labels")
+
+
+def _minute_of_day(t):
+    return t.hour * 60 + t.minute
+
+
+def _time_at(minute_of_day):
+    return time(minute_of_day // 60, minute_of_day % 60)
+
+
+# Period label for every minute of the day, so categorizing is a lookup
+_PERIOD_BY_MINUTE = tuple(
+    next(
+        (period for period, (start, end) in TIME_BLOCKS.items()
+         if _minute_of_day(start) <= minute < _minute_of_day(end)),
+        "evening"
+    )
+    for minute in range(24 * 60)
+)
+
+
 def overlaps(start1, end1, start2, end2):
     return start1 < end2 and start2 < end1
 
+
+@lru_cache(maxsize=256)
+def slot_grid(service_duration, buffer_minutes=BUFFER_MINUTES):
+    """
+    Precompute the slot grid for a service duration and buffer. Grids are
+    memoized, so each (duration, buffer) pair is only built once per process.
+    """
+    opening = _minute_of_day(SALON_OPEN)
+    closing = _minute_of_day(SALON_CLOSE) - opening
+
+    # Next slot starts after service + buffer
+    total_block_time = service_duration + buffer_minutes
+    starts = array("H", range(0, closing - service_duration + 1, total_block_time))
+    ends = array("H", (start + service_duration for start in starts))
+
+    times = tuple(
+        (_time_at(opening + start), _time_at(opening + end))
+        for start, end in zip(starts, ends)
+    )
+
+    return SlotGrid(
+        block=total_block_time,
+        starts=starts,
+        ends=ends,
+        masks=tuple(((1 << total_block_time) - 1) << start for start in starts),
+        periods=tuple(_PERIOD_BY_MINUTE[opening + start] for start in starts),
+        times=times,
+        labels=tuple((s.strftime("%H:%M"), e.strftime("%H:%M")) for s, e in times),
+    )
+
+
 def generate_service_slots(service_duration, buffer_minutes=BUFFER_MINUTES):
     """
     Generate time slots with buffer between appointments.
+    Customers see the service end time only (no buffer shown).
     """
-    slots = []
-    current = datetime.combine(date.today(), SALON_OPEN)
-    closing = datetime.combine(date.today(), SALON_CLOSE)
-    
-    # Total time blocked includes service + buffer
-    total_block_time = service_duration + buffer_minutes
-    
-    while current + timedelta(minutes=service_duration) <= closing:
-        start_time = current.time()
-        # Customer sees service end time only (no buffer shown)
-        end_time = (current + timedelta(minutes=service_duration)).time()
-        slots.append((start_time, end_time))
-        
-        # Next slot starts after service + buffer
-        current += timedelta(minutes=total_block_time)
-    
-    return slots
+    return list(slot_grid(service_duration, buffer_minutes).times)
 
 
 def categorize_slot(start_time):
     """
     Categorize a time slot into morning, afternoon, or evening.
     """
-    for period, (start, end) in TIME_BLOCKS.items():
-        if start <= start_time < end:
-            return period
-    return "evening"
\ No newline at end of file
+    return _PERIOD_BY_MINUTE[_minute_of_day(start_time)]
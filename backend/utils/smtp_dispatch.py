@@ -0,0 +1,146 @@
+import queue
+import smtplib
+import threading
+import time
+from flask import current_app
+
+
+class DispatchStats:
+    """What a dispatch run did: counts, per-message failures and throughput."""
+
+    def __init__(self):
+        self.sent = []       # keys of delivered messages
+        self.failed = {}     # key -> last error
+        self.retries = 0
+        self.connections = 0
+        self.elapsed = 0.0
+
+    @property
+    def throughput(self):
+        """Delivered messages per second."""
+        return len(self.sent) / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            "sent": len(self.sent),
+            "failed": len(self.failed),
+            "retries": self.retries,
+            "connections": self.connections,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "messages_per_second": round(self.throughput, 1),
+        }
+
+
+def is_permanent(error):
+    """5xx replies and refused recipients won't succeed on a retry."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+class SmtpDispatcher:
+    """
+    Sends a batch of flask_mail Messages over a bounded pool of SMTP
+    connections, one thread per connection, instead of one after another.
+
+    `connections` caps how many SMTP sessions are open at once. `rate`
+    limits each connection to that many messages per second (0 for no
+    limit), to stay under the provider's sending limits. A message that
+    fails with a transient error (a dropped connection, a 4xx reply) is
+    retried up to `retries` times, reconnecting if the connection dropped,
+    with backoff from `retry_delay` seconds. 5xx replies fail straight away.
+    """
+
+    def __init__(self, mail, connections=4, rate=0, retries=2, retry_delay=0.5):
+        self.mail = mail
+        self.connections = max(1, connections)
+        self.rate = rate
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+    def dispatch(self, messages):
+        """
+        Send `messages`, an iterable of (key, Message) pairs, and return
+        DispatchStats naming the keys that were sent and those that failed.
+        Blocks until every message is sent or has given up.
+        """
+        app = current_app._get_current_object()
+        items = queue.Queue()
+        for item in messages:
+            items.put(item)
+
+        stats = DispatchStats()
+        lock = threading.Lock()
+        workers = [
+            threading.Thread(target=self._work, args=(app, items, stats, lock), name=f"smtp-{n}", daemon=True)
+            for n in range(min(self.connections, items.qsize()))
+        ]
+
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        stats.elapsed = time.perf_counter() - started
+        return stats
+
+    def _work(self, app, items, stats, lock):
+        # Connection.send signals email_dispatched with current_app
+        with app.app_context():
+            conn = None
+            interval = 1.0 / self.rate if self.rate else 0.0
+            next_send = 0.0
+            try:
+                while True:
+                    try:
+                        key, msg = items.get_nowait()
+                    except queue.Empty:
+                        return
+
+                    for attempt in range(self.retries + 1):
+                        wait = next_send - time.monotonic()
+                        if wait > 0:
+                            time.sleep(wait)
+                        next_send = time.monotonic() + interval
+
+                        try:
+                            if conn is None:
+                                conn = self.mail.connect().__enter__()
+                                with lock:
+                                    stats.connections += 1
+                            conn.send(msg)
+                        except Exception as e:
+                            error = e
+                            # smtplib resets the session after an error reply; anything
+                            # else (a dropped or refused connection) needs a new one
+                            if not isinstance(e, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)):
+                                conn = self._close(conn)
+                            if is_permanent(e) or attempt == self.retries:
+                                break
+                            with lock:
+                                stats.retries += 1
+                            time.sleep(self.retry_delay * 2 ** attempt)
+                        else:
+                            error = None
+                            break
+
+                    with lock:
+                        if error is None:
+                            stats.sent.append(key)
+                        else:
+                            stats.failed[key] = f"{type(error).__name__}: {error}"
+            finally:
+                if conn is not None:
+                    try:
+                        conn.__exit__(None, None, None)
+                    except Exception:
+                        pass
+
+    @staticmethod
+    def _close(conn):
+        if conn is not None and conn.host is not None:
+            try:
+                conn.host.close()
+            except Exception:
+                pass
+        return None
@@ -0,0 +1,54 @@
+from flask import Response, current_app, stream_with_context
+from .pagination import keyset_batches
+
+# Rows read from the database per query while streaming
+DEFAULT_BATCH_SIZE = 500
+
+
+def stream_json(rows, serialize, sort_key=None, descending=False, key=None, envelope=None, count_key=None,
+                batch_size=DEFAULT_BATCH_SIZE, status=200):
+    """
+    Stream a list endpoint's response, serializing rows one at a time
+    instead of building the whole list and calling jsonify on it.
+
+    `rows` is a list or a query. A query is read batch_size rows at a time
+    with keyset_batches, ordered by `sort_key` (ending in a unique column)
+    and `descending`; any order_by on it is replaced. Each batch is a short
+    query that's fully fetched, so no cursor (and on SQLite, no read lock)
+    stays open while a slow client downloads. Without `key`, the body is a
+    bare JSON array. With `key`, the array goes under that key in an object
+    that starts with the `envelope` fields. `count_key` then adds the
+    number of rows after the array.
+
+    Once the first chunk is sent the status can't change, so an error
+    mid-stream cuts the body short instead of returning a 500.
+    """
+    if hasattr(rows, "limit"):
+        if sort_key is None:
+            raise ValueError("Streaming a query needs a sort_key")
+        batches = keyset_batches(rows, sort_key, descending, batch_size)
+    else:
+        batches = [rows]
+    dumps = current_app.json.dumps
+
+    def generate():
+        if key is not None:
+            head = "".join(f"{dumps(k)}:{dumps(v)}," for k, v in (envelope or {}).items())
+            yield "{" + head + dumps(key) + ":"
+
+        count = 0
+        chunk = ["["]
+        for batch in batches:
+            for row in batch:
+                chunk.append(("," if count else "") + dumps(serialize(row)))
+                count += 1
+                if len(chunk) >= batch_size:
+                    yield "".join(chunk)
+                    chunk = []
+        chunk.append("]")
+        yield "".join(chunk)
+
+        if key is not None:
+            yield (f",{dumps(count_key)}:{count}" if count_key else "") + "}"
+
+    return Response(stream_with_context(generate()), status=status, mimetype="application/json")
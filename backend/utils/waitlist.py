@@ -0,0 +1,135 @@
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from .availability import DayAvailability, load_busy_masks, interval_mask, to_minutes
+from .claims import sync_claims
+from .constants import BUFFER_MINUTES
+from .holds import create_hold, load_hold_masks
+from .skill_index import get_skill_index
+from .slots import slot_grid
+
+# Most waiting customers considered for one freed interval
+MATCH_LIMIT = 50
+
+# booking is set for auto-booked entries, hold for offered ones
+WaitlistMatch = namedtuple("WaitlistMatch", "entry booking hold")
+
+
+def find_opening(availability, employee, service, freed, earliest, latest, not_before=None, first_try=None):
+    """
+    First start time that overlaps the freed minutes, lies between earliest
+    and latest, and leaves the employee free for the service plus buffer.
+    `first_try` (usually the freed booking's own start) is tried before the
+    service's slot grid. Returns (start, end, end_with_buffer) or None.
+    """
+    grid = slot_grid(service.duration_minutes)
+    starts = [first_try] + [start for start, _ in grid.times] if first_try else [start for start, _ in grid.times]
+
+    for start in starts:
+        offset = to_minutes(start)
+        if not interval_mask(offset, offset + grid.block) & freed or not earliest <= start <= latest:
+            continue
+        if not_before and start < not_before:
+            continue
+        start_datetime = datetime.combine(date.min, start)
+        end_with_buffer = (start_datetime + timedelta(minutes=grid.block)).time()
+        if availability.is_available(employee, start, end_with_buffer):
+            return start, (start_datetime + timedelta(minutes=service.duration_minutes)).time(), end_with_buffer
+    return None
+
+
+def match_freed_time(employee, booking_date, start_time, end_time, freed_by=None):
+    """
+    Hand time an employee just freed to waitlisted customers, first come
+    first served. Call inside the transaction that freed it, after its
+    claims are synced and before commit, so bookings made here commit or
+    roll back with it. Returns the matches so the caller can notify the
+    customers once committed.
+    """
+    from models import Booking, WaitlistEntry, db
+
+    today = date.today()
+    if booking_date < today:
+        return []
+
+    # From the session, not the occupancy grid: the grid hasn't seen this transaction
+    busy = load_busy_masks([employee.id], booking_date)
+    for emp_id, mask in load_hold_masks([employee.id], booking_date).items():
+        busy[emp_id] |= mask
+    availability = DayAvailability([employee], booking_date, busy)
+    if employee.id not in availability.windows:
+        return []
+
+    now = datetime.utcnow()
+    freed = interval_mask(to_minutes(start_time), to_minutes(end_time) + BUFFER_MINUTES)
+    not_before = datetime.now().time() if booking_date == today else None
+
+    entries = (
+        WaitlistEntry.query
+        .options(joinedload(WaitlistEntry.service))
+        .filter(
+            WaitlistEntry.service_id.in_(get_skill_index().services_for(employee.id)),
+            or_(
+                WaitlistEntry.status == "waiting",
+                and_(WaitlistEntry.status == "offered", WaitlistEntry.offer_expires_at < now)
+            ),
+            WaitlistEntry.date_from <= booking_date,
+            WaitlistEntry.date_to >= booking_date,
+            or_(WaitlistEntry.employee_id.is_(None), WaitlistEntry.employee_id == employee.id),
+        )
+        .order_by(WaitlistEntry.created_at, WaitlistEntry.id)
+        .limit(MATCH_LIMIT)
+        .all()
+    )
+
+    matches = []
+    for entry in entries:
+        if entry.user_id == freed_by or not entry.service.is_active:
+            continue
+
+        opening = find_opening(
+            availability, employee, entry.service, freed,
+            entry.earliest_start, entry.latest_start, not_before, start_time
+        )
+        if opening is None:
+            continue
+        start, end, end_with_buffer = opening
+
+        booking = hold = None
+        if entry.auto_book:
+            booking = Booking(
+                user_id=entry.user_id,
+                service_id=entry.service_id,
+                employee_id=employee.id,
+                booking_date=booking_date,
+                start_time=start,
+                end_time=end,
+                price=entry.service.price,
+                status="confirmed"
+            )
+            # A savepoint, so losing a claim race only drops this match
+            try:
+                with db.session.begin_nested():
+                    db.session.add(booking)
+                    sync_claims(booking)
+            except IntegrityError:
+                continue
+            entry.status = "booked"
+            entry.booking_id = booking.id
+        else:
+            hold = create_hold(
+                entry.service, employee, booking_date, start, end_with_buffer,
+                entry.user_id, current_app.config["WAITLIST_OFFER_SECONDS"]
+            )
+            entry.status = "offered"
+            entry.offer_token = hold.token
+            entry.offer_expires_at = hold.expires_at
+
+        availability.busy[employee.id] |= interval_mask(to_minutes(start), to_minutes(end_with_buffer))
+        matches.append(WaitlistMatch(entry, booking, hold))
+
+    db.session.flush()
+    return matches
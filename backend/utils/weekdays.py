@@ -0,0 +1,33 @@
+from .constants import DAY_MAP
+
+# Every possible weekly schedule fits in 7 bits (bit 0 = Monday)
+ALL_MASKS = range(1 << 7)
+
+
+def work_days_to_mask(work_days):
+    """
+    Convert a stored work_days string ("0,1,2,3,4") into a weekday bitmask.
+    Malformed strings give 0, i.e. an employee who never works.
+    """
+    try:
+        days = [int(d) for d in (work_days or "").split(",") if d.strip()]
+    except ValueError:
+        return 0
+    return sum(1 << d for d in set(days) if 0 <= d <= 6)
+
+
+def mask_to_weekdays(mask):
+    """Weekday numbers (0=Monday) set in a bitmask, in order."""
+    return [d for d in range(7) if mask & (1 << d)]
+
+
+def masks_with_weekday(weekday):
+    """
+    All schedule masks that include `weekday`. Used as an IN (...) list so
+    "works on weekday N" stays an index lookup rather than a bitwise scan.
+    """
+    return [m for m in ALL_MASKS if m & (1 << weekday)]
+
+
+def mask_to_day_names(mask):
+    return [DAY_MAP[str(d)] for d in mask_to_weekdays(mask)]
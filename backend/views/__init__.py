@@ -9,4 +9,5 @@ from .employee import *
 from .receipt import *
 from .reminder import *
 from .allergy  import *
-from .attendance import *
\ No newline at end of file
+from .attendance import *
+from .waitlist import *
\ No newline at end of file
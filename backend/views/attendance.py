@@ -8,6 +8,8 @@ from decorator import receptionist_required, admin_required
 from datetime import timedelta
 import calendar
 from sqlalchemy import func, case
+from sqlalchemy.orm import contains_eager
+from utils.streaming import stream_json
 from backports.zoneinfo import ZoneInfo
 
 attendance_bp = Blueprint("attendance_bp", __name__)
@@ -15,7 +17,7 @@ attendance_bp = Blueprint("attendance_bp", __name__)
 
 def is_employee_working_today(employee, target_date=None):
     target_date = target_date or date.today()
-    return str(target_date.weekday()) in employee.work_days.split(",")
+    return employee.works_on(target_date.weekday())
 
 
 def calculate_worked_hours(check_in, check_out):
@@ -363,18 +365,15 @@ def get_attendance_records():
         return jsonify({"error": "Invalid date format, use YYYY-MM-DD"}), 400
 
     # Base query
-    query = Attendance.query.join(Employee)
+    query = Attendance.query.join(Employee).options(contains_eager(Attendance.employee))
 
     if employee_id:
         query = query.filter(Attendance.employee_id == employee_id)
 
-    query = query.filter(Attendance.date.between(from_date, to_date)).order_by(Attendance.date.asc())
+    query = query.filter(Attendance.date.between(from_date, to_date))
 
-    records = query.all()
-
-    data = []
-    for rec in records:
-        data.append({
+    def serialize(rec):
+        return {
             "employee_id": rec.employee_id,
             "employee_name": rec.employee.full_name,
             "date": rec.date.isoformat(),
@@ -388,14 +387,15 @@ def get_attendance_records():
             ),
             "status": rec.status,
             "worked_hours": rec.worked_hours or 0
-        })
+        }
 
-    return jsonify({
-        "from_date": from_date.isoformat(),
-        "to_date": to_date.isoformat(),
-        "total_records": len(data),
-        "attendance": data
-    }), 200
+    return stream_json(
+        query, serialize,
+        sort_key=(Attendance.date, Attendance.id),
+        key="attendance",
+        envelope={"from_date": from_date.isoformat(), "to_date": to_date.isoformat()},
+        count_key="total_records",
+    )
 
 
 
@@ -411,11 +411,8 @@ def attendance_today_summary():
     today = datetime.now(NAIROBI_TZ).date()
     now = datetime.now(NAIROBI_TZ).time()
 
-    # 1. Get all employees (active + inactive)
-    employees = Employee.query.all()
-
-    # 2. Employees scheduled today
-    scheduled_today = [e for e in employees if is_employee_working_today(e, today)]
+    # 1-2. Employees (active + inactive) scheduled today
+    scheduled_today = Employee.query.filter(Employee.works_on(today.weekday())).all()
     scheduled_ids = {e.id for e in scheduled_today}
 
     # 3. Fetch today's attendance records
@@ -457,18 +454,8 @@ def get_scheduled_employees_today():
     today = date.today()
     weekday = today.weekday()  # 0 = Monday
 
-    # 1. Get ALL employees (active + inactive)
-    employees = Employee.query.all()
-
-    # 2. Filter employees scheduled today
-    scheduled_today = []
-    for employee in employees:
-        if not employee.work_days:
-            continue
-
-        work_days = [int(d) for d in employee.work_days.split(",")]
-        if weekday in work_days:
-            scheduled_today.append(employee)
+    # 1. Employees (active + inactive) scheduled today, filtered in SQL
+    scheduled_today = Employee.query.filter(Employee.works_on(weekday)).all()
 
     # 3. Serialize response
     data = []
@@ -5,8 +5,8 @@ from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identi
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
-from flask_mail import  Message
-from app import mail
+from utils.outbox import enqueue_email
+from utils.email_templates import get_email_templates
 from itsdangerous import URLSafeTimedSerializer
 from werkzeug.security import generate_password_hash
 from sqlalchemy_serializer import SerializerMixin
@@ -158,10 +158,12 @@ def forgot_password():
     # Create the reset link pointing to the frontend
     reset_link = f"{FRONTEND_URL}/reset-password/{token}"
 
-    # Send the email with the reset link
-    msg = Message("Password Reset Request", sender="ashley.testingmoringa@gmail.com", recipients=[email])
-    msg.html = f"Click <a href='{reset_link}'>here</a> to reset your password."
-    mail.send(msg)
+    # Queue the email with the reset link for the outbox workers
+    msg = get_email_templates().message(
+        "password_reset", [email], sender="ashley.testingmoringa@gmail.com", reset_link=reset_link
+    )
+    enqueue_email(msg)
+    db.session.commit()
 
     return jsonify({"message": "Password reset email sent"}), 200
 
@@ -1,26 +1,49 @@
-from models import Booking,db, Employee, Service, User
+from models import Booking, BookingHold, WaitlistEntry, db, Employee, Service, User
 from flask import jsonify,request, Blueprint
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from utils.availability import is_employee_available
-from utils.constants import SALON_CLOSE, SALON_OPEN, TIME_BLOCKS, BUFFER_MINUTES, RESCHEDULE_HOURS_BEFORE
-from datetime import datetime, date, timedelta
-from utils.slots import generate_service_slots, categorize_slot
-from flask_mail import  Message
-from app import mail
+from utils.availability import is_employee_available, DayAvailability, load_busy_masks_range, interval_mask, to_minutes, BLOCKING_STATUSES
+from utils.constants import SALON_CLOSE, SALON_OPEN, TIME_BLOCKS, BUFFER_MINUTES, RESCHEDULE_HOURS_BEFORE, MAX_BUNDLE_SERVICES, BUNDLE_ATTEMPTS, NEXT_SLOTS_MAX_DAYS, NEXT_SLOTS_MAX_COUNT, ALTERNATIVE_SLOTS
+from datetime import datetime, date, time, timedelta
+from utils.slots import slot_grid
+from utils.occupancy import refresh_occupancy
+from utils.skill_index import get_skill_index
+from utils.slot_cache import get_slot_cache
+from utils.assignment import rank_employees
+from utils.claims import sync_claims, release_claims
+from utils.background import run_in_background
+from utils.outbox import enqueue_email
+from utils.email_templates import get_email_templates
+from utils.holds import create_hold, release_holds, find_hold, load_hold_masks
+from utils.waitlist import match_freed_time
+from utils.streaming import stream_json
+from utils.pagination import parse_limit, encode_cursor, decode_cursor, keyset_after
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
+from decorator import admin_required, idempotent
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 import io
 from .receipt import generate_receipt_pdf
-from sqlalchemy.orm import joinedload
+from .waitlist import notify_waitlist_matches
+from sqlalchemy.orm import joinedload, selectinload
 from decorator import beautician_required
-# from decorator import admin_required
 
 
 booking_bp = Blueprint("booking_bp", __name__)
 
 
+def schedule_changed(booking_date, *employee_ids):
+    """
+    Call after committing a booking change: refreshes the occupancy grid
+    for the employees involved and drops that date's cached slots.
+    """
+    refresh_occupancy(booking_date, *employee_ids)
+    get_slot_cache().invalidate_date(booking_date)
+
+
 @booking_bp.route("/book", methods=["POST"])
 @jwt_required()
+@idempotent
 def create_booking():
     user_id = get_jwt_identity()
     data = request.get_json()
@@ -34,6 +57,7 @@ def create_booking():
     date_str = data["date"]
     start_str = data["start_time"]
     preferred_employee_id = data.get("employee_id")  # Optional
+    hold_token = data.get("hold_token")  # Optional, from /bookings/preview
 
     # Parse and validate date/time
     try:
@@ -68,70 +92,69 @@ def create_booking():
     if end_time > SALON_CLOSE:
         return jsonify({"error": f"Salon closes at {SALON_CLOSE.strftime('%H:%M')}. This appointment would exceed closing time."}), 400
 
-    # Helper to check employee availability
-    def check_employee_availability(emp):
-        """
-        Check if employee is available for the requested slot + buffer time
-        CRITICAL: Pass the service object, not service_id
-        """
-        # Call is_available with the correct parameters
-        # The method signature is: is_available(self, booking_date, start_time, end_time, service=None)
-        return emp.is_available(
-            booking_date=booking_date,
-            start_time=start_time,
-            end_time=end_with_buffer,  # Use buffer time for checking
-            service=service  # Pass the service object
-        )
-
-    assigned_employee = None
-
-    # Try to book with preferred employee first
-    if preferred_employee_id:
-        preferred_emp = Employee.query.get(preferred_employee_id)
-        if preferred_emp and check_employee_availability(preferred_emp):
-            assigned_employee = preferred_emp
-
-    # If no preferred employee or they're unavailable, find any available employee
-    if not assigned_employee:
-        # Get all employees who have this service as a skill
-        employees = Employee.query.filter(
-            Employee.skills.any(id=service.id),
-            Employee._is_active == True  # Pre-filter for active employees
-        ).order_by(db.func.random()).all()  # Random distribution for fairness
-
-        for emp in employees:
-            if check_employee_availability(emp):
-                assigned_employee = emp
-                break
-
-    # If no employee is available, return error
-    if not assigned_employee:
-        return jsonify({
-            "error": "No employee available for this time slot",
-            "suggestion": "Please try a different time"
-        }), 409
-
-    # Create the booking
+    # The employee held by the preview if its hold is still valid, skipping the
+    # search. Otherwise the preferred employee first if free, then the
+    # assignment strategy's pick (availability is checked against slot + buffer time)
+    hold = find_hold(hold_token, user_id, service.id, booking_date, start_time) if hold_token else None
+    held_employee = Employee.query.get(hold.employee_id) if hold else None
+
+    def booking_candidates():
+        # A hold only keeps other previews off the slot; a booking made without
+        # one may have landed in its buffer since, so check again
+        if (held_employee and get_skill_index().has_skill(held_employee.id, service.id)
+                and DayAvailability([held_employee], booking_date).is_available(held_employee, start_time, end_with_buffer)):
+            yield held_employee
+        for emp in rank_candidates(service, booking_date, start_time, end_with_buffer, preferred_employee_id, user_id, hold_token):
+            if emp is not held_employee:
+                yield emp
+
+    candidates = booking_candidates()
+
+    # Create the booking, claiming the employee's time in the same transaction.
+    # If a concurrent request claimed it first, try the next candidate.
     try:
-        booking = Booking(
-            user_id=user_id,
-            service_id=service.id,
-            employee_id=assigned_employee.id,
-            booking_date=booking_date,
-            start_time=start_time,
-            end_time=end_time,  # Store actual service end time, not with buffer
-            price=service.price,  # CRITICAL: Set the price from service
-            status="confirmed"
-        )
-        db.session.add(booking)
-        db.session.commit()
-
-        # Send email confirmation AFTER successful commit
-        try:
-            send_booking_confirmation_email(user_id, booking, service, assigned_employee)
-        except Exception as e:
-            # Log the error but don't fail the booking
-            print(f"Failed to send confirmation email: {str(e)}")
+        assigned_employee = None
+        for candidate in candidates:
+            booking = Booking(
+                user_id=user_id,
+                service_id=service.id,
+                employee_id=candidate.id,
+                booking_date=booking_date,
+                start_time=start_time,
+                end_time=end_time,  # Store actual service end time, not with buffer
+                price=service.price,  # CRITICAL: Set the price from service
+                status="confirmed"
+            )
+            db.session.add(booking)
+            if hold:
+                BookingHold.query.filter_by(token=hold_token).delete(synchronize_session=False)
+            try:
+                sync_claims(booking)
+                if hold:
+                    # A waitlist offer being taken up
+                    WaitlistEntry.query.filter_by(offer_token=hold_token, status="offered").update(
+                        {"status": "booked", "booking_id": booking.id}, synchronize_session=False
+                    )
+                # Queued in this transaction, so it only goes out if the booking commits
+                send_booking_confirmation_email(user_id, booking, service, candidate)
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                continue
+
+            assigned_employee = candidate
+            break
+
+        # If no employee is available, return error
+        if not assigned_employee:
+            alternatives, _ = find_next_slots(service, start_datetime, ALTERNATIVE_SLOTS)
+            return jsonify({
+                "error": "No employee available for this time slot",
+                "suggestion": "Please try a different time",
+                "alternatives": alternatives
+            }), 409
+
+        schedule_changed(booking_date, assigned_employee.id)
 
         return jsonify({
             "success": "Booking confirmed",
@@ -160,37 +183,154 @@ def send_booking_confirmation_email(user_id, booking, service, employee):
             print(f"No email found for user {user_id}")
             return
 
-        msg = Message(
-            subject="Booking Confirmation - Your Appointment",
-            recipients=[user.email],
-            body=f"""
-Hello {user.username or 'there'},
+        msg = get_email_templates().message(
+            "booking_confirmation", [user.email],
+            user=user, booking=booking, service=service, employee=employee
+        )
+        enqueue_email(msg)
+        print(f"Confirmation email queued for {user.email}")
+        
+    except Exception as e:
+        # Log but don't raise - a bad email shouldn't fail the booking
+        print(f"Error sending confirmation email: {str(e)}")
+
+
+
+# Several services back to back
+@booking_bp.route("/book/bundle", methods=["POST"])
+@jwt_required()
+@idempotent
+def create_bundle_booking():
+    user_id = get_jwt_identity()
+    data = request.get_json()
+
+    # Validate required fields
+    required_fields = ["service_ids", "date", "start_time"]
+    if not data or not all(field in data for field in required_fields):
+        return jsonify({"error": "Missing required fields"}), 400
+
+    service_ids = data["service_ids"]
+    if not isinstance(service_ids, list) or not service_ids or not all(isinstance(sid, int) for sid in service_ids):
+        return jsonify({"error": "service_ids must be a non-empty list of ids"}), 400
+    if len(service_ids) > MAX_BUNDLE_SERVICES:
+        return jsonify({"error": f"A bundle can have at most {MAX_BUNDLE_SERVICES} services"}), 400
+
+    # Optional; plan_bundle compares it with Employee.id, so "3" must become 3
+    try:
+        preferred_employee_id = int(data["employee_id"]) if data.get("employee_id") else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "employee_id must be an employee id"}), 400
+
+    # Parse and validate date/time
+    try:
+        booking_date = datetime.strptime(data["date"], "%Y-%m-%d").date()
+        start_time = datetime.strptime(data["start_time"], "%H:%M").time()
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid date or time format. Use YYYY-MM-DD and HH:MM"}), 400
+
+    # Validate booking is not in the past
+    if datetime.combine(booking_date, start_time) < datetime.now():
+        return jsonify({"error": "Cannot book appointments in the past"}), 400
+
+    # Services in the order given; the same one may appear twice
+    found = {service.id: service for service in Service.query.filter(Service.id.in_(service_ids))}
+    missing = [sid for sid in service_ids if sid not in found]
+    if missing:
+        return jsonify({"error": f"Service not found: {', '.join(map(str, missing))}"}), 404
+    services = [found[sid] for sid in service_ids]
+
+    # Validate the whole chain is within salon operating hours
+    total_minutes = sum(service.duration_minutes for service in services) + BUFFER_MINUTES * (len(services) - 1)
+    end_time = (datetime.combine(booking_date, start_time) + timedelta(minutes=total_minutes)).time()
+    if start_time < SALON_OPEN:
+        return jsonify({"error": f"Salon opens at {SALON_OPEN.strftime('%H:%M')}"}), 400
+    if total_minutes >= 24 * 60 or end_time > SALON_CLOSE or end_time < start_time:
+        return jsonify({"error": f"Salon closes at {SALON_CLOSE.strftime('%H:%M')}. These appointments would exceed closing time."}), 400
+
+    # Plan every service from one load of the day, then claim all of it in a
+    # single commit. If a concurrent booking wins a claim, plan again.
+    try:
+        bookings = None
+        for _ in range(BUNDLE_ATTEMPTS):
+            plan = plan_bundle(services, booking_date, start_time, preferred_employee_id, user_id)
+            if plan is None:
+                break
+
+            bookings = [
+                Booking(
+                    user_id=user_id,
+                    service_id=service.id,
+                    employee_id=employee.id,
+                    booking_date=booking_date,
+                    start_time=start,
+                    end_time=end,
+                    price=service.price,
+                    status="confirmed"
+                )
+                for service, employee, start, end in plan
+            ]
+            db.session.add_all(bookings)
+            try:
+                for booking in bookings:
+                    sync_claims(booking)
+                # One email for the whole appointment, queued with the bookings
+                send_bundle_confirmation_email(user_id, booking_date, plan)
+                db.session.commit()
+                break
+            except IntegrityError:
+                db.session.rollback()
+                bookings = None
+
+        if not bookings:
+            return jsonify({
+                "error": "No employees available for these services at this time",
+                "suggestion": "Please try a different time"
+            }), 409
 
-Your booking has been confirmed!
+        schedule_changed(booking_date, *{employee.id for _, employee, _, _ in plan})
 
-Service: {service.title}
-Date: {booking.booking_date.strftime('%A, %B %d, %Y')}
-Time: {booking.start_time.strftime('%I:%M %p')} - {booking.end_time.strftime('%I:%M %p')}
-Duration: {service.duration_minutes} minutes
-Employee: {employee.full_name}
-Price: ${booking.price}
+        return jsonify({
+            "success": "Bookings confirmed",
+            "date": booking_date.strftime("%Y-%m-%d"),
+            "start_time": start_time.strftime("%H:%M"),
+            "end_time": plan[-1][3].strftime("%H:%M"),
+            "total_price": float(sum(service.price for service in services)),
+            "bookings": [{
+                "booking_id": booking.id,
+                "service_id": service.id,
+                "service_name": service.title,
+                "employee_id": employee.id,
+                "employee_name": employee.full_name,
+                "start_time": start.strftime("%H:%M"),
+                "end_time": end.strftime("%H:%M"),
+                "duration_minutes": service.duration_minutes,
+                "price": float(service.price)
+            } for booking, (service, employee, start, end) in zip(bookings, plan)]
+        }), 201
 
-Please arrive 5-10 minutes before your appointment time.
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Failed to create bookings: {str(e)}"}), 500
 
-If you need to cancel or reschedule, please contact us at least 24 hours in advance.
 
-Thank you for booking with us!
-We look forward to seeing you.
+def send_bundle_confirmation_email(user_id, booking_date, plan):
+    """Send one confirmation email covering every booking in a bundle"""
+    try:
+        user = User.query.get(user_id)
+        if not user or not user.email:
+            print(f"No email found for user {user_id}")
+            return
 
-Best regards,
-Your Salon Team
-            """.strip()
+        msg = get_email_templates().message(
+            "bundle_confirmation", [user.email],
+            user=user, booking_date=booking_date, plan=plan,
+            total=sum(service.price for service, _, _, _ in plan)
         )
-        mail.send(msg)
-        print(f"Confirmation email sent to {user.email}")
-        
+        enqueue_email(msg)
+        print(f"Confirmation email queued for {user.email}")
+
     except Exception as e:
-        # Log but don't raise - email failure shouldn't fail the booking
+        # Log but don't raise - a bad email shouldn't fail the booking
         print(f"Error sending confirmation email: {str(e)}")
 
 
@@ -215,25 +355,34 @@ def booking_preview():
 
     service = Service.query.get_or_404(service_id)
 
-    # Calculate end time (with buffer)
-    BUFFER_MINUTES = 10
+    # Customers see the service end time; availability is checked with the buffer
     start_datetime = datetime.combine(booking_date, start_time)
-    end_datetime = start_datetime + timedelta(minutes=service.duration_minutes + BUFFER_MINUTES)
-    end_time = end_datetime.time()
+    end_time = (start_datetime + timedelta(minutes=service.duration_minutes)).time()
+    end_with_buffer = (start_datetime + timedelta(minutes=service.duration_minutes + BUFFER_MINUTES)).time()
 
-    # Determine employee
-    selected_employee = None
     if employee_id:
-        selected_employee = Employee.query.get(employee_id)
-        if not selected_employee or service not in selected_employee.skills:
+        requested = Employee.query.get(employee_id)
+        if not requested or not get_skill_index().has_skill(requested.id, service.id):
             return jsonify({"error": "Selected employee cannot perform this service"}), 400
-    else:
-        # Optional: auto-pick one available employee for display
-        available = Employee.query.filter(
-            Employee.skills.any(id=service.id)
-        ).all()
-        if available:
-            selected_employee = available[0]  # or pick randomly
+
+    # The stylist create_booking would assign, held briefly for the confirm step.
+    # Only signed-in customers get a hold, so anonymous refreshes and crawlers
+    # can't tie stylists up or take the write lock. A customer previewing again
+    # gives up their previous hold first, so each has at most one.
+    user_id = get_jwt_identity()
+    if user_id is not None:
+        release_holds(user_id)
+
+    selected_employee = None
+    hold = None
+    if start_datetime >= datetime.now() and SALON_OPEN <= start_time and end_time <= SALON_CLOSE:
+        candidates = rank_candidates(service, booking_date, start_time, end_with_buffer, employee_id, user_id)
+        if candidates:
+            selected_employee = candidates[0]
+            if user_id is not None:
+                hold = create_hold(service, selected_employee, booking_date, start_time, end_with_buffer, user_id)
+    if user_id is not None:
+        db.session.commit()
 
     # # You might have a Location model — adjust accordingly
     # # For now, assuming salon has one main location
@@ -258,6 +407,11 @@ def booking_preview():
             "name": selected_employee.full_name if selected_employee else "Any available stylist",
             "id": selected_employee.id if selected_employee else None
         },
+        "available": selected_employee is not None,
+        "hold": {
+            "token": hold.token,
+            "expires_at": hold.expires_at.isoformat() + "Z"
+        } if hold else None,
         "total_price": f"R{service.price:.2f}" if hasattr(service, 'price') else "R280.00"
     }
 
@@ -270,32 +424,71 @@ def booking_preview():
 @booking_bp.route("/bookings", methods=["GET"])
 @jwt_required()
 def get_user_bookings():
-    """Get all bookings for the current user"""
+    """
+    Get the current user's bookings, newest first, one page at a time.
+    Pass ?limit= (default 50) and the previous page's next_cursor as
+    ?cursor=; next_cursor is null on the last page. It's also sent as the
+    X-Next-Cursor header.
+    """
     user_id = get_jwt_identity()
 
-    status_filter = request.args.get("status")  
+    status_filter = request.args.get("status")
+
+    try:
+        limit = parse_limit(request.args.get("limit"))
+        cursor = request.args.get("cursor")
+        after = decode_cursor(cursor, (date, time, int)) if cursor else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    sort_key = (Booking.booking_date, Booking.start_time, Booking.id)
+
+    # Only the columns the list shows, joined in one query
+    query = (
+        db.session.query(
+            *sort_key,
+            Booking.end_time,
+            Booking.status,
+            Booking.price,
+            Service.id.label("service_id"),
+            Service.title.label("service_name"),
+            Service.duration_minutes,
+            Employee.full_name.label("employee_name"),
+        )
+        .join(Service, Booking.service_id == Service.id)
+        .join(Employee, Booking.employee_id == Employee.id)
+        .filter(Booking.user_id == user_id)
+    )
 
-    
-    query = Booking.query.filter_by(user_id=user_id)
-  
     if status_filter:
-        query = query.filter_by(status=status_filter)
-    
-    bookings = query.order_by(Booking.booking_date.desc(), Booking.start_time.desc()).all()
-    
-    
-    return jsonify([{
+        query = query.filter(Booking.status == status_filter)
+    if after:
+        query = query.filter(keyset_after(sort_key, after))
+
+    rows = query.order_by(*(column.desc() for column in sort_key)).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor((last.booking_date, last.start_time, last.id))
+
+    response = jsonify({"bookings": [{
         "id": b.id,
-        "service_name": b.service.title,
-        "service_id":b.service.id,
-        "duration":b.service.duration_minutes, 
-        "employee_name": b.employee.full_name,
+        "service_name": b.service_name,
+        "service_id": b.service_id,
+        "duration": b.duration_minutes,
+        "employee_name": b.employee_name,
         "date": b.booking_date.strftime("%Y-%m-%d"),
         "start_time": b.start_time.strftime("%H:%M"),
         "end_time": b.end_time.strftime("%H:%M"),
         "status": b.status,
         "price": float(b.price)
-    } for b in bookings]), 200
+    } for b in rows[:limit]], "next_cursor": next_cursor})
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    return response, 200
 
 
 
@@ -327,7 +520,13 @@ def cancel_booking(booking_id):
         }), 403
 
     booking.status = "cancelled"
-    db.session.commit()
+    sync_claims(booking)
+
+    # Hand the freed time to the waitlist in the same transaction
+    matches = match_freed_time(booking.employee, booking.booking_date, booking.start_time, booking.end_time, freed_by=user_id)
+
+    # Emails are queued in the same transaction and sent by the outbox workers
+    notify_waitlist_matches(matches)
 
     customer = User.query.get(user_id)
     employee = booking.employee
@@ -343,6 +542,9 @@ def cancel_booking(booking_id):
             employee.user, booking, service, customer
         )
 
+    db.session.commit()
+    schedule_changed(booking.booking_date, booking.employee_id)
+
     return jsonify({
         "success": "Booking cancelled successfully",
         "booking_id": booking.id,
@@ -353,50 +555,155 @@ def cancel_booking(booking_id):
 
 
 def send_cancellation_email_to_customer(customer, booking, service, employee):
-    msg = Message(
-        subject="Your Booking Has Been Cancelled",
-        recipients=[customer.email],
-        body=f"""
-        Hello {customer.username or 'there'},
+    msg = get_email_templates().message(
+        "cancellation_customer", [customer.email],
+        customer=customer, booking=booking, service=service, employee=employee
+    )
+    enqueue_email(msg)
+
+def send_cancellation_email_to_employee(employee_user, booking, service, customer):
+    msg = get_email_templates().message(
+        "cancellation_employee", [employee_user.email],
+        employee_user=employee_user, booking=booking, service=service, customer=customer
+    )
+    enqueue_email(msg)
 
-        Your appointment has been cancelled as requested.
 
-        Service: {service.title}
-        Date: {booking.booking_date.strftime('%Y-%m-%d')}
-        Time: {booking.start_time.strftime('%H:%M')} - {booking.end_time.strftime('%H:%M')}
-        Employee: {employee.full_name}
 
-        We're sorry to miss you this time. Feel free to book a new appointment whenever you're ready!
+def get_skilled_employees(service):
+    """Active employees who have `service` as a skill"""
+    return Employee.query.filter(
+        Employee.id.in_(get_skill_index().employees_for(service.id)),
+        Employee._is_active == True  # Pre-filter for active employees
+    ).all()
+
 
-        Best regards,
-        Your Salon/Team
-        Contact: support@yourdomain.com | +1 (555) 123-4567
-        """
-    )
-    mail.send(msg)
+def rank_candidates(service, booking_date, start_time, end_with_buffer, preferred_employee_id=None, user_id=None, hold_token=None):
+    """
+    Employees who can take the booking, best first: the preferred employee if
+    they are free, then the rest in ASSIGNMENT_STRATEGY order, with those
+    held by another customer's preview at the back. The whole day's
+    schedule is loaded once for every candidate.
+    """
+    employees = get_skilled_employees(service)
 
-def send_cancellation_email_to_employee(employee_user, booking, service, customer):
-    msg = Message(
-        subject="Appointment Cancelled",
-        recipients=[employee_user.email],
-        body=f"""
-        Hello {employee_user.username or 'there'},
+    preferred_emp = None
+    if preferred_employee_id:
+        preferred_emp = Employee.query.get(preferred_employee_id)
+        if preferred_emp and not get_skill_index().has_skill(preferred_emp.id, service.id):
+            preferred_emp = None
 
-        A booking has been cancelled:
+    pool = employees if preferred_emp is None or preferred_emp in employees else employees + [preferred_emp]
+    availability = DayAvailability(pool, booking_date)
 
-        Service: {service.title}
-        Customer: {customer.username or 'Client'}
-        Date: {booking.booking_date.strftime('%Y-%m-%d')}
-        Time: {booking.start_time.strftime('%H:%M')} - {booking.end_time.strftime('%H:%M')}
+    ranked = rank_employees(availability, employees, start_time, end_with_buffer)
 
-        The time slot is now free.
+    held = load_hold_masks([emp.id for emp in ranked], booking_date, user_id, hold_token)
+    ranked = defer_held(ranked, held, start_time, end_with_buffer)
 
-        Best regards,
-        Your Salon/Team
-        """
-    )
-    mail.send(msg)
+    if preferred_emp and availability.is_available(preferred_emp, start_time, end_with_buffer):
+        ranked = [preferred_emp] + [emp for emp in ranked if emp is not preferred_emp]
+    return ranked
+
+
+def defer_held(ranked, held, start_time, end_with_buffer):
+    """Move employees whose held minutes overlap the slot to the back, keeping strategy order."""
+    if not held:
+        return ranked
+    slot = interval_mask(to_minutes(start_time), to_minutes(end_with_buffer))
+    return sorted(ranked, key=lambda emp: bool(held.get(emp.id, 0) & slot))
+
+
+def plan_bundle(services, booking_date, start_time, preferred_employee_id=None, user_id=None):
+    """
+    Chain the services back to back from start_time, each starting
+    BUFFER_MINUTES after the previous one ends, and pick an employee for
+    each from one load of the day's schedule. Keeps the preferred employee,
+    then the previous service's employee, where they are free.
+    Returns [(service, employee, start, end)], or None if a service can't be placed.
+    """
+    skill_index = get_skill_index()
+    skilled = set().union(*(skill_index.employees_for(service.id) for service in services))
+    if preferred_employee_id:
+        skilled.add(preferred_employee_id)
+
+    pool = Employee.query.filter(Employee.id.in_(skilled)).all()
+    availability = DayAvailability(pool, booking_date)
+    held = load_hold_masks([emp.id for emp in pool], booking_date, user_id)
+
+    plan = []
+    cursor = datetime.combine(booking_date, start_time)
+    previous = None
+    for service in services:
+        start = cursor.time()
+        end = (cursor + timedelta(minutes=service.duration_minutes)).time()
+        end_with_buffer = (cursor + timedelta(minutes=service.duration_minutes + BUFFER_MINUTES)).time()
+
+        employees = [
+            emp for emp in pool
+            if skill_index.has_skill(emp.id, service.id)
+            and (emp._is_active or emp.id == preferred_employee_id)
+        ]
+        ranked = defer_held(rank_employees(availability, employees, start, end_with_buffer), held, start, end_with_buffer)
+        if not ranked:
+            return None
+
+        employee = next(
+            (emp for emp in ranked if emp.id == preferred_employee_id),
+            next((emp for emp in ranked if emp is previous), ranked[0])
+        )
+        plan.append((service, employee, start, end))
+        previous = employee
+        cursor += timedelta(minutes=service.duration_minutes + BUFFER_MINUTES)
 
+    return plan
+
+
+def find_next_slots(service, after, count, employee_id=None, max_days=NEXT_SLOTS_MAX_DAYS):
+    """
+    The first `count` free slots of the service starting at or after the
+    `after` datetime, walking forward a day at a time. Schedules are loaded
+    a week per query and the walk stops as soon as enough slots are found.
+    Returns (slots, last_day_searched).
+    """
+    if employee_id:
+        employee = Employee.query.get(employee_id)
+        employees = [employee] if employee and get_skill_index().has_skill(employee.id, service.id) else []
+    else:
+        employees = get_skilled_employees(service)
+
+    after = max(after, datetime.now())
+    first_day = after.date()
+    last_day = first_day + timedelta(days=max_days - 1)
+
+    grid = slot_grid(service.duration_minutes)
+    slots = []
+    day = first_day
+    loaded_until = day - timedelta(days=1)
+    while employees and day <= last_day and len(slots) < count:
+        if day > loaded_until:
+            loaded_until = min(day + timedelta(days=6), last_day)
+            busy_by_day = load_busy_masks_range([emp.id for emp in employees], day, loaded_until)
+
+        availability = DayAvailability(employees, day, busy=busy_by_day.get(day, {}))
+        if availability.windows:
+            for i, emp in enumerate(availability.assign_slots(grid)):
+                if emp is None or (day == first_day and grid.times[i][0] < after.time()):
+                    continue
+                start_label, end_label = grid.labels[i]
+                slots.append({
+                    "date": day.strftime("%Y-%m-%d"),
+                    "start_time": start_label,
+                    "end_time": end_label,
+                    "period": grid.periods[i],
+                    "employee_id": emp.id,
+                    "employee_name": emp.full_name
+                })
+                if len(slots) == count:
+                    break
+        day += timedelta(days=1)
+
+    return slots, min(day - timedelta(days=1), last_day)
 
 
 # Slots
@@ -425,14 +732,18 @@ def available_slots():
     if booking_date < date.today():
         return jsonify({"error": "Cannot check slots for past dates"}), 400
 
-    # Generate all possible slots based on service duration
-    all_slots = generate_service_slots(service.duration_minutes)
+    # Serve from cache unless a booking or schedule change touched this date
+    slot_cache = get_slot_cache()
+    cache_key = slot_cache.key_for(service.id, booking_date)
+    cached = slot_cache.get(cache_key)
+    if cached is not None:
+        return jsonify({"date": date_str, "service_id": service_id, **cached}), 200
+
+    # Precomputed slot grid for this service duration
+    grid = slot_grid(service.duration_minutes)
 
     # Get employees who can perform this service
-    employees = Employee.query.filter(
-        Employee.skills.any(id=service.id),
-        Employee._is_active == True  # Pre-filter for active employees
-    ).all()
+    employees = get_skilled_employees(service)
 
     if not employees:
         return jsonify({
@@ -447,44 +758,23 @@ def available_slots():
         "evening": []
     }
 
-    # Check each slot for availability
-    for start_time, end_time in all_slots:
-        # Calculate end time with buffer for availability checking
-        start_datetime = datetime.combine(booking_date, start_time)
-        end_with_buffer = (start_datetime + timedelta(
-            minutes=service.duration_minutes + BUFFER_MINUTES
-        )).time()
-
-        # Check if ANY employee is available for this slot
-        slot_available = False
-        available_employee = None
-        
-        for emp in employees:
-            # CRITICAL: Pass the service object to is_available
-            if emp.is_available(
-                booking_date=booking_date,
-                start_time=start_time,
-                end_time=end_with_buffer,  # Use buffer time for checking
-                service=service  # Pass service object, not ID
-            ):
-                slot_available = True
-                available_employee = emp
-                break  # One available employee is enough
-
-        # If slot is available, add it to the appropriate time period
-        if slot_available:
-            period = categorize_slot(start_time)
-            available_slots[period].append({
-                "start_time": start_time.strftime("%H:%M"),
-                "end_time": end_time.strftime("%H:%M"),  # Return actual service end, not with buffer
+    # Load the day's bookings for every candidate and mask the whole grid at once;
+    # one available employee (slot + buffer) is enough
+    availability = DayAvailability(employees, booking_date)
+    assigned = availability.assign_slots(grid)
+
+    # Add each available slot to the appropriate time period
+    for i, available_employee in enumerate(assigned):
+        if available_employee:
+            start_label, end_label = grid.labels[i]
+            available_slots[grid.periods[i]].append({
+                "start_time": start_label,
+                "end_time": end_label,  # Return actual service end, not with buffer
                 "employee_id": available_employee.id,
                 "employee_name": available_employee.full_name
             })
 
-    # Return response with metadata
-    return jsonify({
-        "date": date_str,
-        "service_id": service_id,
+    payload = {
         "service_title": service.title,
         "duration_minutes": service.duration_minutes,
         "price": float(service.price),
@@ -494,11 +784,113 @@ def available_slots():
             len(available_slots["afternoon"]) +
             len(available_slots["evening"])
         )
+    }
+    slot_cache.set(cache_key, payload)
+
+    # Return response with metadata
+    return jsonify({"date": date_str, "service_id": service_id, **payload}), 200
+
+
+# Next available slots across days
+@booking_bp.route("/available-slots/next", methods=["GET"])
+def next_available_slots():
+    service_id = request.args.get("service_id", type=int)
+    from_str = request.args.get("from")  # YYYY-MM-DD or YYYY-MM-DDTHH:MM, default now
+    employee_id = request.args.get("employee_id", type=int)  # optional
+
+    if not service_id:
+        return jsonify({"error": "service_id is required"}), 400
+
+    service = Service.query.get(service_id)
+    if not service:
+        return jsonify({"error": "Service not found"}), 404
+
+    try:
+        after = datetime.fromisoformat(from_str) if from_str else datetime.now()
+        count = int(request.args.get("count", 5))
+    except ValueError:
+        return jsonify({"error": "Invalid from or count. Use YYYY-MM-DD or YYYY-MM-DDTHH:MM"}), 400
+    if after.tzinfo is not None:
+        # Schedules are in the salon's local time, which is the server's
+        after = after.astimezone().replace(tzinfo=None)
+    count = max(1, min(count, NEXT_SLOTS_MAX_COUNT))
+
+    slots, searched_until = find_next_slots(service, after, count, employee_id)
+
+    return jsonify({
+        "service_id": service.id,
+        "service_title": service.title,
+        "duration_minutes": service.duration_minutes,
+        "slots": slots,
+        "searched_until": searched_until.strftime("%Y-%m-%d")
     }), 200
 
 
+@booking_bp.route("/available-slots/cache-stats", methods=["GET"])
+@jwt_required()
+@admin_required
+def available_slots_cache_stats():
+    return jsonify(get_slot_cache().stats()), 200
+
+
+
+
+
+
+
+# Calendar
+@booking_bp.route("/available-slots/calendar", methods=["GET"])
+def available_slots_calendar():
+    """Number of free slots for every day of a month, for greying out calendar days"""
+    service_id = request.args.get("service_id")
+    month_str = request.args.get("month")  # YYYY-MM
+
+    if not service_id or not month_str:
+        return jsonify({"error": "service_id and month are required"}), 400
+
+    service = Service.query.get(service_id)
+
+    if not service:
+        return jsonify({"error": "Service not found"}), 404
+
+    try:
+        first_day = datetime.strptime(month_str, "%Y-%m").date()
+    except ValueError:
+        return jsonify({"error": "Invalid month format. Use YYYY-MM"}), 400
+
+    last_day = (first_day.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+    grid = slot_grid(service.duration_minutes)
+    employees = get_skilled_employees(service)
+
+    # One range query for the whole month's bookings
+    busy_by_day = load_busy_masks_range([emp.id for emp in employees], first_day, last_day)
+
+    today = date.today()
+    days = []
+    day = first_day
+    while day <= last_day:
+        free_slots = 0
+
+        # Past days can't be booked, so they have nothing free
+        if day >= today and employees:
+            availability = DayAvailability(employees, day, busy=busy_by_day.get(day, {}))
+            if availability.windows:
+                free_slots = sum(1 for emp in availability.assign_slots(grid) if emp)
 
+        days.append({
+            "date": day.strftime("%Y-%m-%d"),
+            "total_available": free_slots
+        })
+        day += timedelta(days=1)
 
+    return jsonify({
+        "month": first_day.strftime("%Y-%m"),
+        "service_id": service_id,
+        "service_title": service.title,
+        "duration_minutes": service.duration_minutes,
+        "days": days
+    }), 200
 
 
 
@@ -523,7 +915,7 @@ def complete_service(booking_id):
     booking.completed_by = booking.employee.full_name
     booking.completed_at = datetime.utcnow()
 
-    db.session.commit()
+    sync_claims(booking)
 
     # Get customer
     customer = booking.user  # assumes relationship exists
@@ -531,13 +923,16 @@ def complete_service(booking_id):
     # Generate PDF receipt
     pdf_buffer = generate_receipt_pdf(booking, customer)
 
-    # Send receipt email
+    # Queue the receipt email with the completion
     try:
         send_receipt_email(customer, booking, pdf_buffer)
     except Exception as e:
         # Log error but do NOT fail completion
         print("Receipt email failed:", str(e))
 
+    db.session.commit()
+    schedule_changed(booking.booking_date, booking.employee_id)
+
     return jsonify({
         "success": "Service completed successfully",
         "booking_id": booking.id,
@@ -550,28 +945,7 @@ def complete_service(booking_id):
 
 
 def send_receipt_email(user, booking, pdf_buffer):
-    msg = Message(
-        subject="Your Service Receipt – Poplar Beauty Place",
-        recipients=[user.email],
-    )
-
-    msg.body = f"""
-Hi {user.username},
-
-Thank you for choosing Poplar Beauty Place.
-
-Your service "{booking.service.title}" has been completed successfully.
-Please find your receipt attached.
-
-Service: {booking.service.title}
-Employee: {booking.employee.full_name}
-Date: {booking.booking_date.strftime('%d %b %Y')} | Time: {booking.start_time.strftime('%H:%M')}
-Amount Paid: R{booking.price:.2f}
-
-We look forward to serving you again.
-
-— Poplar Beauty Place
-"""
+    msg = get_email_templates().message("receipt", [user.email], user=user, booking=booking)
 
     msg.attach(
         filename=f"receipt-BK{booking.id:06d}.pdf",
@@ -579,7 +953,7 @@ We look forward to serving you again.
         data=pdf_buffer.getvalue(),
     )
 
-    mail.send(msg)
+    enqueue_email(msg)
 
 
 
@@ -623,9 +997,134 @@ def start_service(booking_id):
     }), 200
 
 
+# Batch status changes for the front desk and beauticians
+BATCH_TRANSITIONS = {
+    # action: (allowed current statuses, new status)
+    "start": (("confirmed",), "in_progress"),
+    "complete": (("in_progress",), "completed"),
+    "cancel": (("confirmed", "rescheduled"), "cancelled"),
+}
+MAX_BATCH_SIZE = 200
+
+
+@booking_bp.route("/bookings/batch-status", methods=["PATCH"])
+@jwt_required()
+def batch_update_status():
+    """
+    Apply one transition to many bookings in a single transaction:
+    {"action": "start" | "complete" | "cancel", "booking_ids": [...]}.
+    Beauticians may only change their own bookings; receptionists and
+    admins any. Bookings that can't make the transition are reported in
+    `failed` and left alone. Emails are queued with the transaction; receipt
+    PDFs are rendered in the background.
+    """
+    user = User.query.get_or_404(get_jwt_identity())
+    if not (user.is_beautician or user.is_receptionist or user.is_admin):
+        return jsonify({"error": "Access denied"}), 403
+
+    data = request.get_json() or {}
+    action = data.get("action")
+    booking_ids = data.get("booking_ids")
+
+    if action not in BATCH_TRANSITIONS:
+        return jsonify({"error": f"action must be one of: {', '.join(BATCH_TRANSITIONS)}"}), 400
+    if not isinstance(booking_ids, list) or not booking_ids or not all(isinstance(i, int) for i in booking_ids):
+        return jsonify({"error": "booking_ids must be a non-empty list of ids"}), 400
+    if len(booking_ids) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} bookings per batch"}), 400
+
+    from_statuses, new_status = BATCH_TRANSITIONS[action]
+    own_only = not (user.is_receptionist or user.is_admin)
+
+    # One SELECT for the whole batch
+    bookings = {
+        b.id: b for b in Booking.query
+        .options(joinedload(Booking.employee), joinedload(Booking.user), joinedload(Booking.service))
+        .filter(Booking.id.in_(booking_ids))
+        .all()
+    }
+
+    now = datetime.now()
+    updated, failed = [], []
+    for booking_id in dict.fromkeys(booking_ids):  # de-duplicated, in order
+        booking = bookings.get(booking_id)
+        if booking is None:
+            failed.append({"booking_id": booking_id, "error": "Booking not found"})
+        elif own_only and (not booking.employee or booking.employee.user_id != user.id):
+            failed.append({"booking_id": booking_id, "error": "Not your booking"})
+        elif booking.status not in from_statuses:
+            failed.append({"booking_id": booking_id, "error": f"Booking is {booking.status}"})
+        elif action == "start" and now < datetime.combine(booking.booking_date, booking.start_time) - timedelta(minutes=15):
+            failed.append({"booking_id": booking_id, "error": "Cannot start service too early"})
+        else:
+            booking.status = new_status
+            updated.append(booking)
+
+    if not updated:
+        return jsonify({"updated": [], "failed": failed}), 400
+
+    # Completed and cancelled bookings stop blocking their time
+    matches = []
+    if new_status not in BLOCKING_STATUSES:
+        release_claims([b.id for b in updated])
+        db.session.flush()
+        if action == "cancel":
+            for b in updated:
+                matches += match_freed_time(b.employee, b.booking_date, b.start_time, b.end_time, freed_by=b.user_id)
+            queue_cancellation_emails(updated)
+            notify_waitlist_matches(matches)
+
+    db.session.commit()
+
+    if new_status not in BLOCKING_STATUSES:
+        for booking_date, employee_id in {(b.booking_date, b.employee_id) for b in updated}:
+            schedule_changed(booking_date, employee_id)
+
+    updated_ids = [b.id for b in updated]
+    if action == "complete":
+        run_in_background(send_receipts, updated_ids)
+
+    return jsonify({
+        "success": f"{len(updated)} booking(s) updated",
+        "status": new_status,
+        "updated": updated_ids,
+        "failed": failed
+    }), 200
+
+
+def send_receipts(booking_ids):
+    """Render receipts for completed bookings and queue their emails; runs in the background"""
+    bookings = (
+        Booking.query
+        .options(joinedload(Booking.user), joinedload(Booking.service), joinedload(Booking.employee))
+        .filter(Booking.id.in_(booking_ids))
+        .all()
+    )
+    for booking in bookings:
+        try:
+            send_receipt_email(booking.user, booking, generate_receipt_pdf(booking, booking.user))
+        except Exception as e:
+            print(f"Receipt email failed for booking {booking.id}: {str(e)}")
+    db.session.commit()
+
+
+def queue_cancellation_emails(bookings):
+    """Tell customers and employees about cancelled bookings; call before commit"""
+    for booking in bookings:
+        customer, employee = booking.user, booking.employee
+        try:
+            if customer and customer.email:
+                send_cancellation_email_to_customer(customer, booking, booking.service, employee)
+            if employee and employee.user and employee.user.email:
+                send_cancellation_email_to_employee(employee.user, booking, booking.service, customer)
+        except Exception as e:
+            print(f"Cancellation email failed for booking {booking.id}: {str(e)}")
+
+
 # Reschedule
 @booking_bp.route("/bookings/reschedule/<int:booking_id>", methods=["PATCH"])
 @jwt_required()
+@idempotent
 def reschedule_booking(booking_id):
     user_id = get_jwt_identity()
     data = request.get_json()
@@ -669,33 +1168,24 @@ def reschedule_booking(booking_id):
     # Optional preferred employee
     preferred_employee_id = data.get("employee_id")
 
-    # Start transaction
-    # with db.session.begin():
-    available_employees = []
-
-    # Try preferred employee first
-    if preferred_employee_id:
-        preferred_emp = Employee.query.get(preferred_employee_id)
-        if preferred_emp and service in preferred_emp.skills:
-            if preferred_emp.is_available(new_date, new_start_time, new_end_datetime.time()):
-                available_employees.append(preferred_emp)
-
-    # If no preferred or unavailable, find any available
-    if not available_employees:
-        qualified_employees = Employee.query.filter(
-            Employee.skills.any(id=service.id)
-        ).order_by(db.func.random()).all()
-
-        for emp in qualified_employees:
-            if emp.is_available(new_date, new_start_time, new_end_datetime.time()):
-                available_employees.append(emp)
+    # Preferred employee first if free, otherwise the assignment strategy's pick
+    available_employees = rank_candidates(service, new_date, new_start_time, new_end_time, preferred_employee_id, user_id)
 
     if not available_employees:
-        return jsonify({"error": "No available employee for the requested time"}), 409
+        alternatives, _ = find_next_slots(service, new_start_datetime, ALTERNATIVE_SLOTS)
+        return jsonify({
+            "error": "No available employee for the requested time",
+            "alternatives": alternatives
+        }), 409
 
     # Pick the first available
     selected_employee = available_employees[0]
 
+    # Remember the slot being vacated so it can be released
+    old_date, old_employee_id = booking.booking_date, booking.employee_id
+    old_start_time, old_end_time = booking.start_time, booking.end_time
+    old_employee = booking.employee
+
     # Update booking
     booking.booking_date = new_date
     booking.start_time = new_start_time
@@ -705,7 +1195,11 @@ def reschedule_booking(booking_id):
 
     booking.reminder_sent = False
 
-    db.session.commit()
+    sync_claims(booking)
+
+    # Hand the vacated time to the waitlist in the same transaction
+    matches = match_freed_time(old_employee, old_date, old_start_time, old_end_time, freed_by=user_id)
+    notify_waitlist_matches(matches)
 
     # Fetch user (customer)
     customer = User.query.get(user_id)
@@ -728,6 +1222,11 @@ def reschedule_booking(booking_id):
     except Exception as e:
         print("Email error (employee):", e)
 
+    # The emails above commit with the reschedule
+    db.session.commit()
+    schedule_changed(old_date, old_employee_id)
+    schedule_changed(new_date, selected_employee.id)
+
     return jsonify({
         "success": "Booking rescheduled successfully",
         "booking_id": booking.id,
@@ -743,50 +1242,20 @@ def reschedule_booking(booking_id):
 def send_reschedule_email_to_customer(customer, booking, service, employee, preferred_employee_id):
     is_preferred = preferred_employee_id and int(preferred_employee_id) == employee.id
 
-    msg = Message(
-        subject="Your Booking Has Been Rescheduled",
-        recipients=[customer.email],
-        body=f"""
-        Hello {customer.username or 'there'},
-
-        Your appointment has been successfully rescheduled!
-
-        Service: {service.title}
-        New Date: {booking.booking_date.strftime('%Y-%m-%d')}
-        New Time: {booking.start_time.strftime('%H:%M')} - {booking.end_time.strftime('%H:%M')}
-        Employee: {employee.full_name} {'(your preferred employee)' if is_preferred else '(auto-assigned)'}
-
-        Thank you for booking with us!
-        Best regards,
-        Your Salon/Team
-        """
+    msg = get_email_templates().message(
+        "reschedule_customer", [customer.email],
+        customer=customer, booking=booking, service=service, employee=employee, is_preferred=is_preferred
     )
-    mail.send(msg)
+    enqueue_email(msg)
 
 
 # Email to employee (using employee.user)
 def send_reschedule_email_to_employee(employee_user, booking, service, customer):
-    msg = Message(
-        subject="Appointment Rescheduled",
-        recipients=[employee_user.email],
-        body=f"""
-        Hello {employee_user.username or 'there'},
-
-        A booking for your services has been rescheduled:
-
-        Service: {service.title}
-        Customer: {customer.username or 'Client'}
-        New Date: {booking.booking_date.strftime('%Y-%m-%d')}
-        New Time: {booking.start_time.strftime('%H:%M')} - {booking.end_time.strftime('%H:%M')}
-
-        Please ensure you're available at this time.
-        Thank you for your great work!
-
-        Best regards,
-        Your Salon/Team
-        """
+    msg = get_email_templates().message(
+        "reschedule_employee", [employee_user.email],
+        employee_user=employee_user, booking=booking, service=service, customer=customer
     )
-    mail.send(msg)
+    enqueue_email(msg)
 
 
 
@@ -838,15 +1307,13 @@ def get_beautician_bookings():
         Booking.query
         .filter(Booking.employee_id == employee_id)
         .options(
-            joinedload(Booking.user).joinedload(User.allergies),
+            joinedload(Booking.user).selectinload(User.allergies),
             joinedload(Booking.service)
         )
-        .order_by(Booking.booking_date.desc(), Booking.start_time.asc())
-        .all()
     )
 
-    response = [
-        {
+    def serialize(b):
+        return {
             "booking": {
                 "id": b.id,
                 "date": b.booking_date.isoformat(),
@@ -868,7 +1335,128 @@ def get_beautician_bookings():
                 "allergies": [{"id": a.id, "name": a.name} for a in (b.user.allergies or [])],
             },
         }
-        for b in bookings
-    ]
 
-    return jsonify(response), 200
+    # Newest day first, each day in time order
+    return stream_json(bookings, serialize, sort_key=(Booking.booking_date, Booking.start_time, Booking.id),
+                       descending=(True, False, False))
+
+
+
+
+# Master booking search for the front desk
+@booking_bp.route("/admin/bookings", methods=["GET"])
+@jwt_required()
+def search_bookings():
+    """
+    Every employee's bookings in schedule order, filtered in SQL.
+
+    Filters: date_from, date_to (YYYY-MM-DD), status (comma separated),
+    employee_id, service_id, customer_id, and customer (prefix of a
+    username or email). Pages with ?limit= and ?cursor=next_cursor.
+    counts covers every matching booking, not just the current page. It's
+    only computed for the first page; later pages (with a cursor) return
+    null, since the totals are the same.
+    """
+    user = User.query.get_or_404(get_jwt_identity())
+
+    if not (user.is_admin or user.is_receptionist):
+        return jsonify({"error": "Access denied"}), 403
+
+    args = request.args
+    try:
+        date_from = datetime.strptime(args["date_from"], "%Y-%m-%d").date() if args.get("date_from") else None
+        date_to = datetime.strptime(args["date_to"], "%Y-%m-%d").date() if args.get("date_to") else None
+        employee_id = args.get("employee_id", type=int)
+        service_id = args.get("service_id", type=int)
+        customer_id = args.get("customer_id", type=int)
+        limit = parse_limit(args.get("limit"))
+        cursor = args.get("cursor")
+        after = decode_cursor(cursor, (date, time, int)) if cursor else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    statuses = [s.strip() for s in args.get("status", "").split(",") if s.strip()]
+    unknown = set(statuses) - set(Booking.status.type.enums)
+    if unknown:
+        return jsonify({"error": f"Unknown status: {', '.join(sorted(unknown))}"}), 400
+
+    filters = []
+    if date_from:
+        filters.append(Booking.booking_date >= date_from)
+    if date_to:
+        filters.append(Booking.booking_date <= date_to)
+    if employee_id:
+        filters.append(Booking.employee_id == employee_id)
+    if service_id:
+        filters.append(Booking.service_id == service_id)
+    if customer_id:
+        filters.append(Booking.user_id == customer_id)
+    if args.get("customer"):
+        prefix = args["customer"].strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        filters.append(Booking.user_id.in_(
+            db.session.query(User.id).filter(
+                or_(User.username.ilike(prefix, escape="\\"), User.email.ilike(prefix, escape="\\"))
+            )
+        ))
+    if statuses:
+        filters.append(Booking.status.in_(statuses))
+
+    sort_key = (Booking.booking_date, Booking.start_time, Booking.id)
+
+    query = (
+        db.session.query(
+            *sort_key,
+            Booking.end_time,
+            Booking.status,
+            Booking.price,
+            Service.id.label("service_id"),
+            Service.title.label("service_title"),
+            Employee.id.label("employee_id"),
+            Employee.full_name.label("employee_name"),
+            User.id.label("customer_id"),
+            User.username.label("customer_username"),
+            User.email.label("customer_email"),
+        )
+        .join(Service, Booking.service_id == Service.id)
+        .join(Employee, Booking.employee_id == Employee.id)
+        .join(User, Booking.user_id == User.id)
+        .filter(*filters)
+    )
+    if after:
+        query = query.filter(keyset_after(sort_key, after, descending=False))
+
+    rows = query.order_by(*sort_key).limit(limit + 1).all()
+
+    counts = None
+    if not after:
+        by_status = dict(
+            db.session.query(Booking.status, func.count(Booking.id))
+            .filter(*filters)
+            .group_by(Booking.status)
+            .all()
+        )
+        counts = {
+            "total": sum(by_status.values()),
+            "by_status": {s: by_status.get(s, 0) for s in Booking.status.type.enums},
+        }
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor((last.booking_date, last.start_time, last.id))
+
+    return jsonify({
+        "bookings": [{
+            "id": b.id,
+            "date": b.booking_date.isoformat(),
+            "start_time": b.start_time.strftime("%H:%M"),
+            "end_time": b.end_time.strftime("%H:%M"),
+            "status": b.status,
+            "price": float(b.price or 0),
+            "service": {"id": b.service_id, "title": b.service_title},
+            "employee": {"id": b.employee_id, "name": b.employee_name},
+            "customer": {"id": b.customer_id, "username": b.customer_username, "email": b.customer_email},
+        } for b in rows[:limit]],
+        "next_cursor": next_cursor,
+        "counts": counts,
+    }), 200
@@ -1,9 +1,13 @@
 from models import db, Employee, Service, User
 from flask import jsonify,request, Blueprint
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from utils.constants import DAY_MAP, DAY_NAME_TO_NUM
+from utils.constants import DAY_NAME_TO_NUM
 from datetime import time, datetime
 from decorator import admin_required,beautician_required, receptionist_required
+from utils.skill_index import get_skill_index
+from utils.slot_cache import get_slot_cache
+from utils.streaming import stream_json
+from sqlalchemy.orm import joinedload, selectinload
 
 
 employee_bp = Blueprint("employee_bp", __name__)
@@ -104,6 +108,10 @@ def add_employee():
         db.session.rollback()
         return jsonify({"error": f"Failed to create employee: {str(e)}"}), 500
 
+    if employee.skills:
+        get_skill_index().invalidate()
+        get_slot_cache().invalidate_all()
+
     # Response
     employee_data = {
         "id": employee.id,
@@ -112,7 +120,7 @@ def add_employee():
         "role": role,
         "work_start": employee.work_start.strftime("%H:%M"),
         "work_end": employee.work_end.strftime("%H:%M"),
-        "work_days": [DAY_MAP[d] for d in employee.work_days.split(",") if d in DAY_MAP],
+        "work_days": employee.work_day_names,
         "skills": [s.title for s in employee.skills] if role == "beautician" else [],
         "other_skills": employee.other_skills.split(",") if employee.other_skills else [],
         "is_active": employee.is_active,
@@ -135,7 +143,7 @@ def get_my_employee_profile():
         return jsonify({"error": "Employee profile not found"}), 404
 
 
-    work_days_list = [DAY_MAP[d] for d in employee.work_days.split(",") if d in DAY_MAP]
+    work_days_list = employee.work_day_names
 
     employee_data = {
         "id": employee.id,
@@ -194,6 +202,7 @@ def update_employee(employee_id):
             return jsonify({"error": f"Invalid day name: {str(e)}"}), 400
 
     # Update skills (existing services)
+    skills_changed = False
     skills_names = data.get("skills")
     if skills_names is not None:  # allow clearing skills with empty list
         services = Service.query.filter(Service.title.in_(skills_names)).all()
@@ -207,6 +216,7 @@ def update_employee(employee_id):
             }), 400
 
         employee.skills = services  # replace current skills
+        skills_changed = True
 
     # Update other skills
     other_skills_list = data.get("other_skills")
@@ -233,13 +243,19 @@ def update_employee(employee_id):
 
     db.session.commit()
 
+    if skills_changed:
+        get_skill_index().invalidate()
+
+    # Hours, days, skills or active status may have changed
+    get_slot_cache().invalidate_all()
+
     # Prepare response
     employee_data = {
         "id": employee.id,
         "full_name": employee.full_name,
         "work_start": employee.work_start.strftime("%H:%M"),
         "work_end": employee.work_end.strftime("%H:%M"),
-        "work_days": [DAY_MAP[d] for d in employee.work_days.split(",") if d in DAY_MAP],
+        "work_days": employee.work_day_names,
         "skills": [s.title for s in employee.skills],
         "other_skills": employee.other_skills.split(",") if employee.other_skills else [],
         "is_active": employee.is_active,
@@ -274,6 +290,8 @@ def delete_employee(employee_id):
     # Delete employee
     db.session.delete(employee)
     db.session.commit()
+    get_skill_index().invalidate()
+    get_slot_cache().invalidate_all()
 
     return jsonify({"success": "Employee deleted successfully"}), 200
 
@@ -289,25 +307,24 @@ def list_employees():
     if not (user.is_admin or user.is_receptionist):
         return jsonify({"error": "Access denied"}), 403
 
-    employees = Employee.query.all()
-    employees_data = []
+    employees = Employee.query.options(joinedload(Employee.user), selectinload(Employee.skills))
 
-    for employee in employees:
-        employees_data.append({
+    def serialize(employee):
+        return {
             "id": employee.id,
             "full_name": employee.full_name,
             "username": employee.user.username,
             "email": employee.user.email,
             "work_start": employee.work_start.strftime("%H:%M"),
             "work_end": employee.work_end.strftime("%H:%M"),
-            "work_days": [DAY_MAP[d] for d in employee.work_days.split(",") if d in DAY_MAP],
+            "work_days": employee.work_day_names,
             "skills": [s.title for s in employee.skills],
             "other_skills": employee.other_skills.split(",") if employee.other_skills else [],
             "is_active": employee.is_active,
             "employee_profile_picture": employee.employee_profile_picture
-        })
+        }
 
-    return jsonify({"employees": employees_data}), 200
+    return stream_json(employees, serialize, sort_key=(Employee.id,), key="employees")
 
 
 # Fetch employee id 
@@ -319,10 +336,7 @@ def get_employee_profile(employee_id):
     if not employee:
         return jsonify({"error": "Employee profile not found"}), 404
 
-    work_days_list = [
-        DAY_MAP[d] for d in employee.work_days.split(",")
-        if d in DAY_MAP
-    ]
+    work_days_list = employee.work_day_names
 
     employee_data = {
         "id": employee.id,
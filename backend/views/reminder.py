@@ -1,103 +1,69 @@
-from flask import Blueprint, jsonify, current_app
+from flask import Blueprint, jsonify, current_app, request
 from datetime import datetime, timedelta
 from apscheduler.schedulers.background import BackgroundScheduler
-from models import db, Booking, User, Service, Employee
+from models import db, Booking, User, Service, Employee, IdempotencyKey, EmailOutbox, SchedulerRunRequest
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from decorator import admin_required
 import atexit
-from flask_mail import Message
+import time
 from app import mail
 from sqlalchemy import or_, and_
+from sqlalchemy.exc import IntegrityError
+from utils.occupancy import get_occupancy_grid
+from utils.smtp_dispatch import SmtpDispatcher
+from utils.email_templates import get_email_templates
+from utils.leader import get_scheduler_leader
+from utils.job_telemetry import get_job_telemetry, record_job
 
 
 # Create Blueprint for reminder routes
 reminder_bp = Blueprint('reminder_bp', __name__)
 
-db
+# Stats from the most recent reminder batch, shown by /api/reminders/status
+last_dispatch = None
+
+# Progress of the most recent expired-booking cleanup, shown alongside it
+last_cleanup = None
+
+# Jobs /api/reminders/process asks the scheduler to run now
+MANUAL_JOBS = ('reminder_check', 'booking_cleanup')
+
+# Picks up those requests on the leader; not a job of its own in /api/scheduler/stats
+RUN_REQUESTS_JOB = 'run_requests'
+
+
 def send_reminder_email_batch(mail, emails_data):
     """
-    Send reminder emails in batch (more efficient for many users)
+    Send reminder emails in batch over a pool of SMTP connections
+    (REMINDER_SMTP_CONNECTIONS, REMINDER_SMTP_RATE, REMINDER_SMTP_RETRIES).
+    Returns the DispatchStats; its `sent` lists the booking ids delivered.
     """
+    global last_dispatch
 
-    sent_count = 0
-    failed_count = 0
-    
-    with mail.connect() as conn:
-        for data in emails_data:
-            try:
-                user = data['user']
-                booking = data['booking']
-                service = data['service']
-                employee = data['employee']
-                booking_datetime = datetime.combine(booking.booking_date, booking.start_time)
-                
-                msg = Message(
-                    subject="Booking Reminder - Your Appointment is Tomorrow!",
-                    sender=current_app.config.get('MAIL_DEFAULT_SENDER'),
-                    recipients=[user.email]
-                )
-                
-                # HTML email body
-                msg.html = f"""
-                <html>
-                    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-                        <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                            <h2 style="color: #4CAF50;">Booking Reminder</h2>
-                            <p>Hello {user.username},</p>
-                            
-                            <p>This is a friendly reminder that your appointment is scheduled for tomorrow:</p>
-                            
-                            <div style="background-color: #f5f5f5; padding: 15px; border-radius: 5px; margin: 20px 0;">
-                                <p><strong>Service:</strong> {service.title}</p>
-                                <p><strong>Employee:</strong> {employee.full_name}</p>
-                                <p><strong>Date:</strong> {booking_datetime.strftime('%B %d, %Y')}</p>
-                                <p><strong>Time:</strong> {booking.start_time.strftime('%I:%M %p')} - {booking.end_time.strftime('%I:%M %p')}</p>
-                                <p><strong>Price:</strong> ${booking.price}</p>
-                                <p><strong>Status:</strong> {booking.status.upper()}</p>
-                            </div>
-                            
-                            <p>Please arrive 5-10 minutes early. If you need to reschedule or cancel, please contact us as soon as possible.</p>
-                            
-                            <p style="margin-top: 30px;">
-                                Best regards,<br>
-                                Salon Management Team
-                            </p>
-                        </div>
-                    </body>
-                </html>
-                """
-                
-                # Plain text fallback
-                msg.body = f"""
-                Booking Reminder
-                
-                Hello {user.username},
-                
-                This is a friendly reminder that your appointment is scheduled for tomorrow:
-                
-                Service: {service.title}
-                Employee: {employee.full_name}
-                Date: {booking_datetime.strftime('%B %d, %Y')}
-                Time: {booking.start_time.strftime('%I:%M %p')} - {booking.end_time.strftime('%I:%M %p')}
-                Price: ${booking.price}
-                Status: {booking.status.upper()}
-                
-                Please arrive 5-10 minutes early. If you need to reschedule or cancel, please contact us as soon as possible.
-                
-                Best regards,
-                Salon Management Team
-                """
-                
-                conn.send(msg)
-                sent_count += 1
-                print(f"✓ Reminder sent to {user.email} for booking #{booking.id}")
-                
-            except Exception as e:
-                print(f"✗ Error sending email to {user.email}: {str(e)}")
-                failed_count += 1
-                continue
-    
-    print(f"✓ Batch email complete: {sent_count} sent, {failed_count} failed")
-    return sent_count, failed_count
+    # One pass over the precompiled reminder templates, and one MIME prototype, for the whole batch
+    batch = get_email_templates().message_batch(
+        "reminder",
+        emails_data,
+        recipients=[[data['user'].email] for data in emails_data],
+        sender=current_app.config.get('MAIL_DEFAULT_SENDER')
+    )
+    messages = [(data['booking'].id, msg) for data, msg in zip(emails_data, batch)]
+
+    config = current_app.config
+    dispatcher = SmtpDispatcher(
+        mail,
+        connections=config.get("REMINDER_SMTP_CONNECTIONS", 4),
+        rate=config.get("REMINDER_SMTP_RATE", 0),
+        retries=config.get("REMINDER_SMTP_RETRIES", 2)
+    )
+    stats = dispatcher.dispatch(messages)
+    for booking_id, error in stats.failed.items():
+        print(f"✗ Error sending reminder for booking #{booking_id}: {error}")
+
+    last_dispatch = {**stats.as_dict(), "finished_at": datetime.utcnow().isoformat()}
+    print(f"✓ Batch email complete: {len(stats.sent)} sent, {len(stats.failed)} failed, "
+          f"{stats.throughput:.1f} msg/s over {stats.connections} connection(s)")
+    return stats
 
 
 def check_and_send_reminders(app):
@@ -123,10 +89,10 @@ def check_and_send_reminders(app):
                 Booking.booking_date >= reminder_start.date(),
                 Booking.booking_date <= reminder_end.date()
             ).all()
+            record_job(rows_scanned=len(bookings_data))
             
             # Prepare emails to send
             emails_to_send = []
-            booking_ids_to_update = []
             
             for booking, user, service, employee in bookings_data:
                 # Combine date and time for accurate comparison
@@ -140,18 +106,18 @@ def check_and_send_reminders(app):
                         'service': service,
                         'employee': employee
                     })
-                    booking_ids_to_update.append(booking.id)
             
             # Send emails in batch (more efficient)
             reminders_sent = 0
             if emails_to_send:
-                sent_count, failed_count = send_reminder_email_batch(mail, emails_to_send)
-                reminders_sent = sent_count
+                stats = send_reminder_email_batch(mail, emails_to_send)
+                reminders_sent = len(stats.sent)
+                record_job(rows_affected=reminders_sent, emails_sent=reminders_sent, emails_failed=len(stats.failed))
                 
-                # Bulk update reminder_sent flag (much faster than individual updates)
-                if booking_ids_to_update:
+                # Bulk update reminder_sent flag, only for delivered reminders so failures retry next hour
+                if stats.sent:
                     db.session.query(Booking).filter(
-                        Booking.id.in_(booking_ids_to_update)
+                        Booking.id.in_(stats.sent)
                     ).update(
                         {Booking.reminder_sent: True},
                         synchronize_session=False
@@ -166,60 +132,204 @@ def check_and_send_reminders(app):
         except Exception as e:
             print(f"✗ Error in check_and_send_reminders: {str(e)}")
             db.session.rollback()
+            record_job(error=e)
             return 0
 
 
+def expired_booking_filters(now):
+    """Bookings that ended over a day before `now` and weren't completed or rescheduled"""
+    cutoff_datetime = now - timedelta(days=1)
+    return (
+        or_(
+            Booking.booking_date < cutoff_datetime.date(),
+            and_(
+                Booking.booking_date == cutoff_datetime.date(),
+                Booking.end_time < cutoff_datetime.time()
+            )
+        ),
+        ~Booking.status.in_(['completed', 'rescheduled'])
+    )
+
+
 def delete_expired_bookings(app):
-    """Delete bookings that are 1 day past and not completed/rescheduled (optimized for scale)"""
+    """
+    Delete bookings that are 1 day past and not completed/rescheduled.
+
+    Works through them in id order, CLEANUP_CHUNK_SIZE at a time, each
+    chunk deleted by id range in its own short transaction so SQLite's write
+    lock is never held for more than one chunk. It sleeps
+    CLEANUP_PAUSE_SECONDS between chunks to let booking requests in, and
+    stops once CLEANUP_MAX_SECONDS have passed; the next run carries on from
+    there. Returns the number deleted; progress goes in last_cleanup.
+    """
+    global last_cleanup
+
     with app.app_context():
+        config = app.config
+        chunk_size = config["CLEANUP_CHUNK_SIZE"]
+        started = time.perf_counter()
+        expired = expired_booking_filters(datetime.utcnow())
+        progress = {
+            "chunks": 0,
+            "rows_scanned": 0,
+            "rows_deleted": 0,
+            "next_id": None,
+            "max_chunk_ms": 0.0,
+            "finished": False,
+            "error": None,
+        }
+
         try:
-            # Calculate cutoff datetime (1 day ago)
-            cutoff_datetime = datetime.utcnow() - timedelta(days=1)
-            cutoff_date = cutoff_datetime.date()
-            cutoff_time = cutoff_datetime.time()
-            
-            # Use bulk delete for better performance
-            deleted_count = db.session.query(Booking).filter(
-                or_(
-                    Booking.booking_date < cutoff_date,
-                    and_(
-                        Booking.booking_date == cutoff_date,
-                        Booking.end_time < cutoff_time
-                    )
-                ),
-                ~Booking.status.in_(['completed', 'rescheduled'])
+            next_id = 0
+            while True:
+                if time.perf_counter() - started >= config["CLEANUP_MAX_SECONDS"]:
+                    progress["next_id"] = next_id
+                    break
+
+                # Find the next chunk with a read, so the write below touches one id range
+                ids = [booking_id for (booking_id,) in db.session.query(Booking.id).filter(
+                    Booking.id >= next_id, *expired
+                ).order_by(Booking.id).limit(chunk_size)]
+                if not ids:
+                    progress["finished"] = True
+                    break
+
+                chunk_started = time.perf_counter()
+                deleted = db.session.query(Booking).filter(
+                    Booking.id.between(ids[0], ids[-1]), *expired
+                ).delete(synchronize_session=False)
+                db.session.commit()
+                chunk_ms = (time.perf_counter() - chunk_started) * 1000
+
+                progress["chunks"] += 1
+                progress["rows_scanned"] += len(ids)
+                progress["rows_deleted"] += deleted
+                progress["max_chunk_ms"] = round(max(progress["max_chunk_ms"], chunk_ms), 2)
+                next_id = ids[-1] + 1
+                if len(ids) < chunk_size:
+                    progress["finished"] = True
+                    break
+                time.sleep(config["CLEANUP_PAUSE_SECONDS"])
+
+            # Past days can no longer be booked, so drop their occupancy files
+            grid = get_occupancy_grid()
+            if grid is not None:
+                grid.prune(datetime.utcnow().date())
+
+        except Exception as e:
+            print(f"✗ Error in delete_expired_bookings: {str(e)}")
+            db.session.rollback()
+            progress["error"] = f"{type(e).__name__}: {e}"
+
+        elapsed = time.perf_counter() - started
+        last_cleanup = {
+            **progress,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(progress["rows_deleted"] / elapsed, 1) if elapsed else None,
+            "finished_at": datetime.utcnow().isoformat()
+        }
+        record_job(rows_scanned=progress["rows_scanned"], rows_affected=progress["rows_deleted"], error=progress["error"])
+        if not progress["error"]:
+            more = "" if progress["finished"] else f", stopped at id {progress['next_id']} after {elapsed:.1f}s"
+            print(f"✓ Deleted {progress['rows_deleted']} expired booking(s) in {progress['chunks']} chunk(s){more}")
+        return progress["rows_deleted"]
+
+
+def delete_expired_idempotency_keys(app):
+    """Delete stored Idempotency-Key responses past their TTL"""
+    with app.app_context():
+        try:
+            deleted_count = IdempotencyKey.query.filter(
+                IdempotencyKey.expires_at < datetime.utcnow()
             ).delete(synchronize_session=False)
-            
             db.session.commit()
-            
-            print(f"✓ Deleted {deleted_count} expired booking(s)")
+            record_job(rows_affected=deleted_count)
+
+            print(f"✓ Deleted {deleted_count} expired idempotency key(s)")
             return deleted_count
-            
+
         except Exception as e:
-            print(f"✗ Error in delete_expired_bookings: {str(e)}")
+            print(f"✗ Error in delete_expired_idempotency_keys: {str(e)}")
+            db.session.rollback()
+            record_job(error=e)
+            return 0
+
+
+def delete_sent_emails(app):
+    """Delete delivered outbox emails older than EMAIL_OUTBOX_RETENTION_DAYS"""
+    with app.app_context():
+        try:
+            cutoff = datetime.utcnow() - timedelta(days=app.config["EMAIL_OUTBOX_RETENTION_DAYS"])
+            deleted_count = EmailOutbox.query.filter(
+                EmailOutbox.status == "sent",
+                EmailOutbox.sent_at < cutoff
+            ).delete(synchronize_session=False)
+            db.session.commit()
+            record_job(rows_affected=deleted_count)
+
+            print(f"✓ Deleted {deleted_count} sent email(s) from the outbox")
+            return deleted_count
+
+        except Exception as e:
+            print(f"✗ Error in delete_sent_emails: {str(e)}")
             db.session.rollback()
+            record_job(error=e)
             return 0
 
 
+def run_requested_jobs(app):
+    """
+    Bring forward the jobs queued by /api/reminders/process so the scheduler
+    runs them now, under the usual lease and telemetry. Leader only.
+    """
+    with app.app_context():
+        try:
+            for run_request in SchedulerRunRequest.query.all():
+                if scheduler is not None and scheduler.get_job(run_request.job_id):
+                    scheduler.modify_job(run_request.job_id, next_run_time=datetime.now())
+                db.session.delete(run_request)
+            db.session.commit()
+        except Exception as e:
+            print(f"✗ Error in run_requested_jobs: {str(e)}")
+            db.session.rollback()
+
+
 @reminder_bp.route('/api/reminders/process', methods=['POST'])
+@jwt_required()
+@admin_required
 def process_reminders():
     """
-    Endpoint to manually trigger reminder processing
-    This will:
-    1. Send reminders for bookings 24 hours away
-    2. Delete expired bookings
+    Ask the scheduler to send reminders for bookings 24 hours away and
+    delete expired bookings now. Admins only.
+
+    Nothing runs in the request: the jobs are queued in
+    scheduler_run_requests and the process holding the scheduler lease
+    starts them within SCHEDULER_LEASE_RENEW_SECONDS. Results show up in
+    /api/reminders/status and /api/scheduler/stats.
     """
     try:
-        reminders_sent = check_and_send_reminders(current_app._get_current_object())
-        deleted_count = delete_expired_bookings(current_app._get_current_object())
-        
+        now = datetime.utcnow()
+        user_id = get_jwt_identity()
+        for job_id in MANUAL_JOBS:
+            run_request = db.session.get(SchedulerRunRequest, job_id)
+            if run_request:
+                run_request.requested_at = now
+                run_request.requested_by = user_id
+            else:
+                db.session.add(SchedulerRunRequest(job_id=job_id, requested_at=now, requested_by=user_id))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another admin queued them at the same moment
+            db.session.rollback()
+
         return jsonify({
             'success': True,
-            'reminders_sent': reminders_sent,
-            'bookings_deleted': deleted_count,
-            'timestamp': datetime.utcnow().isoformat()
-        }), 200
+            'queued': list(MANUAL_JOBS),
+            'timestamp': now.isoformat()
+        }), 202
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             'success': False,
             'error': str(e)
@@ -228,7 +338,10 @@ def process_reminders():
 
 @reminder_bp.route('/api/reminders/status', methods=['GET'])
 def reminder_status():
-    """Get status of upcoming reminders and expiring bookings"""
+    """
+    Get status of upcoming reminders and expiring bookings. Public, so the
+    scheduler lease (holder host:pid) is left to /api/scheduler/stats.
+    """
     try:
         now = datetime.utcnow()
         reminder_window = now + timedelta(hours=24)
@@ -242,22 +355,14 @@ def reminder_status():
         ).count()
         
         # Count bookings to be deleted (past due and not completed/rescheduled)
-        cutoff_datetime = now - timedelta(days=1)
-        expired_bookings = Booking.query.filter(
-            or_(
-                Booking.booking_date < cutoff_datetime.date(),
-                and_(
-                    Booking.booking_date == cutoff_datetime.date(),
-                    Booking.end_time < cutoff_datetime.time()
-                )
-            ),
-            ~Booking.status.in_(['completed', 'rescheduled'])
-        ).count()
+        expired_bookings = Booking.query.filter(*expired_booking_filters(now)).count()
         
         return jsonify({
             'success': True,
             'pending_reminders': upcoming_bookings,
             'bookings_to_delete': expired_bookings,
+            'last_dispatch': last_dispatch,
+            'last_cleanup': last_cleanup,
             'timestamp': now.isoformat()
         }), 200
         
@@ -268,6 +373,55 @@ def reminder_status():
         }), 500
 
 
+@reminder_bp.route('/api/scheduler/stats', methods=['GET'])
+@jwt_required()
+@admin_required
+def scheduler_stats():
+    """
+    How the scheduled jobs are doing: per-job durations, lag between the
+    scheduled and actual start, counts and failures over the last `hours`
+    (default 24), the latest `limit` runs (default 50), and the scheduler
+    lease. A job is flagged overrunning once a run takes its whole interval
+    or runs are repeatedly skipped because the previous one is still going.
+    Admins only.
+    """
+    try:
+        now = datetime.utcnow()
+        retention_hours = current_app.config["SCHEDULER_JOB_RUN_RETENTION_DAYS"] * 24
+        hours = min(request.args.get('hours', 24, type=int), retention_hours)
+        limit = min(request.args.get('limit', 50, type=int), 500)
+
+        # Intervals and next runs come from this process's scheduler, if it has started one
+        intervals, next_runs = {}, {}
+        for job in scheduler.get_jobs() if scheduler else []:
+            if job.id == RUN_REQUESTS_JOB:
+                continue
+            interval = getattr(job.trigger, 'interval', None)
+            if interval:
+                intervals[job.id] = interval.total_seconds()
+            next_runs[job.id] = job.next_run_time.isoformat() if job.next_run_time else None
+
+        telemetry = get_job_telemetry()
+        jobs = telemetry.summary(now - timedelta(hours=hours), intervals)
+        for job_id, job in jobs.items():
+            job['next_run_at'] = next_runs.get(job_id)
+
+        return jsonify({
+            'success': True,
+            'window_hours': hours,
+            'jobs': jobs,
+            'recent_runs': telemetry.recent(limit),
+            'scheduler': get_scheduler_leader().status(),
+            'timestamp': now.isoformat()
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @reminder_bp.route('/api/reminders/upcoming', methods=['GET'])
 def get_upcoming_reminders():
     """Get list of bookings that will receive reminders soon"""
@@ -344,12 +498,23 @@ def start_scheduler():
         return scheduler
     
     app = current_app._get_current_object()
+
+    # Every process schedules the jobs; only the lease holder runs them
+    leader = get_scheduler_leader()
+    leader.start()
+
+    # ...and records each run it makes for /api/scheduler/stats
+    telemetry = get_job_telemetry()
+
+    def leader_job(job_id, fn):
+        return lambda: leader.run_if_leader(telemetry.run, job_id, fn, app)
     
     scheduler = BackgroundScheduler()
+    telemetry.attach(scheduler)
     
     # Run reminder check every hour
     scheduler.add_job(
-        func=lambda: check_and_send_reminders(app),
+        func=leader_job('reminder_check', check_and_send_reminders),
         trigger="interval",
         hours=1,
         id='reminder_check',
@@ -359,13 +524,42 @@ def start_scheduler():
     
     # Run cleanup every 6 hours
     scheduler.add_job(
-        func=lambda: delete_expired_bookings(app),
+        func=leader_job('booking_cleanup', delete_expired_bookings),
         trigger="interval",
         hours=6,
         id='booking_cleanup',
         replace_existing=True,
         next_run_time=datetime.now() + timedelta(minutes=5)  # Run 5 min after startup
     )
+
+    # Drop expired Idempotency-Key responses every 6 hours
+    scheduler.add_job(
+        func=leader_job('idempotency_key_cleanup', delete_expired_idempotency_keys),
+        trigger="interval",
+        hours=6,
+        id='idempotency_key_cleanup',
+        replace_existing=True,
+        next_run_time=datetime.now() + timedelta(minutes=10)
+    )
+
+    # Drop delivered outbox emails once they're past retention
+    scheduler.add_job(
+        func=leader_job('email_outbox_cleanup', delete_sent_emails),
+        trigger="interval",
+        hours=6,
+        id='email_outbox_cleanup',
+        replace_existing=True,
+        next_run_time=datetime.now() + timedelta(minutes=15)
+    )
+    
+    # Pick up manual runs queued by /api/reminders/process
+    scheduler.add_job(
+        func=lambda: leader.run_if_leader(run_requested_jobs, app),
+        trigger="interval",
+        seconds=app.config["SCHEDULER_LEASE_RENEW_SECONDS"],
+        id=RUN_REQUESTS_JOB,
+        replace_existing=True
+    )
     
     scheduler.start()
     # print("✓ Automatic reminder scheduler started!")
@@ -2,6 +2,9 @@ from models import Service,db, Category
 from flask import jsonify,request, Blueprint
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from decorator import admin_required
+from utils.slot_cache import get_slot_cache
+from utils.streaming import stream_json
+from sqlalchemy.orm import joinedload, selectinload
 
 
 service_bp = Blueprint("service_bp", __name__)
@@ -71,13 +74,11 @@ def add_service():
 # Get all services
 @service_bp.route("/services", methods=["GET"])
 def get_services():
-    # Query all services
-    services = Service.query.all()
+    # Query all services, with what to_dict reads loaded up front
+    services = Service.query.options(joinedload(Service.category), selectinload(Service.employees))
 
-    # Convert each service to a dictionary
-    all_services = [service.to_dict() for service in services]
-
-    return jsonify(all_services), 200
+    # Convert each service to a dictionary as it streams out
+    return stream_json(services, Service.to_dict, sort_key=(Service.id,))
 
 
 
@@ -145,6 +146,9 @@ def update_service(service_id):
 
     db.session.commit()
 
+    # Cached slots embed the title, price and duration
+    get_slot_cache().invalidate_all()
+
     return jsonify({
         "message": f"Service '{service.title}' updated successfully",
         "service": service.to_dict()
@@ -163,6 +167,7 @@ def delete_service(service_id):
 
     db.session.delete(service)
     db.session.commit()
+    get_slot_cache().invalidate_all()
 
     return jsonify({"message": f"Service deleted successfully"}), 200
 
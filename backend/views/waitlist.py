@@ -0,0 +1,147 @@
+from models import WaitlistEntry, BookingHold, Service, Employee, db
+from flask import jsonify, request, Blueprint
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime, date
+from utils.constants import SALON_OPEN, SALON_CLOSE
+from utils.skill_index import get_skill_index
+from utils.outbox import enqueue_email
+from utils.email_templates import get_email_templates
+
+
+waitlist_bp = Blueprint("waitlist_bp", __name__)
+
+
+def serialize_entry(entry, hold=None):
+    return {
+        "id": entry.id,
+        "service": {"id": entry.service.id, "title": entry.service.title},
+        "employee_id": entry.employee_id,
+        "date_from": entry.date_from.isoformat(),
+        "date_to": entry.date_to.isoformat(),
+        "earliest_start": entry.earliest_start.strftime("%H:%M"),
+        "latest_start": entry.latest_start.strftime("%H:%M"),
+        "auto_book": entry.auto_book,
+        "status": entry.status,
+        "booking_id": entry.booking_id,
+        # An open offer: confirm it with POST /book and this hold_token
+        "offer": {
+            "hold_token": hold.token,
+            "date": hold.booking_date.isoformat(),
+            "start_time": hold.start_time.strftime("%H:%M"),
+            "employee_id": hold.employee_id,
+            "expires_at": hold.expires_at.isoformat() + "Z"
+        } if hold else None
+    }
+
+
+# Join the waitlist
+@waitlist_bp.route("/waitlist", methods=["POST"])
+@jwt_required()
+def join_waitlist():
+    user_id = get_jwt_identity()
+    data = request.get_json()
+
+    if not data or not all(field in data for field in ["service_id", "date_from", "date_to"]):
+        return jsonify({"error": "service_id, date_from and date_to are required"}), 400
+
+    try:
+        date_from = datetime.strptime(data["date_from"], "%Y-%m-%d").date()
+        date_to = datetime.strptime(data["date_to"], "%Y-%m-%d").date()
+        earliest_start = datetime.strptime(data["earliest_start"], "%H:%M").time() if data.get("earliest_start") else SALON_OPEN
+        latest_start = datetime.strptime(data["latest_start"], "%H:%M").time() if data.get("latest_start") else SALON_CLOSE
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid date or time format. Use YYYY-MM-DD and HH:MM"}), 400
+
+    if date_from > date_to or earliest_start > latest_start:
+        return jsonify({"error": "Invalid date or time range"}), 400
+    if date_to < date.today():
+        return jsonify({"error": "Cannot join the waitlist for past dates"}), 400
+
+    service = Service.query.get(data["service_id"])
+    if not service:
+        return jsonify({"error": "Service not found"}), 404
+
+    employee_id = data.get("employee_id")
+    if employee_id and not (Employee.query.get(employee_id) and get_skill_index().has_skill(employee_id, service.id)):
+        return jsonify({"error": "Selected employee cannot perform this service"}), 400
+
+    entry = WaitlistEntry(
+        user_id=user_id,
+        service_id=service.id,
+        employee_id=employee_id,
+        date_from=max(date_from, date.today()),
+        date_to=date_to,
+        earliest_start=earliest_start,
+        latest_start=latest_start,
+        auto_book=bool(data.get("auto_book", False))
+    )
+    db.session.add(entry)
+    db.session.commit()
+
+    return jsonify({
+        "success": "Added to the waitlist",
+        "entry": serialize_entry(entry)
+    }), 201
+
+
+# The current user's waitlist entries, with any open offers
+@waitlist_bp.route("/waitlist", methods=["GET"])
+@jwt_required()
+def get_waitlist():
+    user_id = get_jwt_identity()
+
+    rows = (
+        db.session.query(WaitlistEntry, BookingHold)
+        .outerjoin(BookingHold, (BookingHold.token == WaitlistEntry.offer_token)
+                   & (BookingHold.expires_at >= datetime.utcnow()))
+        .filter(WaitlistEntry.user_id == user_id, WaitlistEntry.status != "cancelled")
+        .order_by(WaitlistEntry.created_at.desc())
+        .all()
+    )
+
+    return jsonify([serialize_entry(entry, hold) for entry, hold in rows]), 200
+
+
+# Leave the waitlist
+@waitlist_bp.route("/waitlist/<int:entry_id>", methods=["DELETE"])
+@jwt_required()
+def leave_waitlist(entry_id):
+    user_id = get_jwt_identity()
+
+    entry = WaitlistEntry.query.filter_by(id=entry_id, user_id=user_id).first()
+    if not entry:
+        return jsonify({"error": "Waitlist entry not found"}), 404
+
+    if entry.offer_token:
+        BookingHold.query.filter_by(token=entry.offer_token).delete(synchronize_session=False)
+    entry.status = "cancelled"
+    db.session.commit()
+
+    return jsonify({"success": "Removed from the waitlist"}), 200
+
+
+def notify_waitlist_matches(matches):
+    """
+    Queue emails for customers matched by utils.waitlist.match_freed_time.
+    Call before the commit that makes the matches, so the emails go out
+    only if it does.
+    """
+    for match in matches:
+        try:
+            send_waitlist_email(match)
+        except Exception as e:
+            # Log but don't raise - a bad email shouldn't fail the cancellation
+            print(f"Failed to queue waitlist email: {str(e)}")
+
+
+def send_waitlist_email(match):
+    entry = match.entry
+    user = entry.user
+    if not user or not user.email:
+        return
+
+    if match.booking:
+        msg = get_email_templates().message("waitlist_booked", [user.email], user=user, entry=entry, booking=match.booking)
+    else:
+        msg = get_email_templates().message("waitlist_offer", [user.email], user=user, entry=entry, hold=match.hold)
+    enqueue_email(msg)
@@ -148,14 +148,29 @@ export const BookingProvider = ({children}) => {
     useEffect(() => {
         if (!authToken) return;
 
-        fetch("http://127.0.0.1:5000/bookings", {
-            headers: {
-            Authorization: `Bearer ${authToken}`,
-            },
-        })
-            .then((res) => res.json())
-            .then((data) => {
-                setAppointments(data);
+        // /bookings is paginated: follow next_cursor until the last page
+        const fetchAllBookings = async () => {
+            const all = [];
+            let cursor = null;
+            do {
+                const params = new URLSearchParams({ limit: 200 });
+                if (cursor) params.set("cursor", cursor);
+                const res = await fetch(`http://127.0.0.1:5000/bookings?${params}`, {
+                    headers: {
+                    Authorization: `Bearer ${authToken}`,
+                    },
+                });
+                const data = await res.json();
+                if (!res.ok) throw new Error(data.error || "Failed to fetch appointments");
+                all.push(...data.bookings);
+                cursor = data.next_cursor;
+            } while (cursor);
+            return all;
+        };
+
+        fetchAllBookings()
+            .then((bookings) => {
+                setAppointments(bookings);
             })
             .catch((err) => console.error("Error fetching appointments:", err));
         }, [authToken, onchange]);